@@ -1,9 +1,15 @@
 import json
+import os
+import sys
 import argparse
-from gensim import corpora
-from gensim.models.ldamodel import LdaModel
 
+import numpy as np
+from gensim.models.ldamodel import LdaModel
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.lda_infer import batch_doc_topics, doc_topics_to_json
+from core.lda_monitor import TrainingMonitor, print_summary
+from core.lda_train import build_corpus, run_passes, train_lda
 
 
 def load_json(path: str):
@@ -16,73 +22,78 @@ def save_json(obj, file_path):
         json.dump(obj, f, ensure_ascii=False, indent=2)
 
 
-
-def build_corpus(vocab_json: str, doc_freq_json: str):
+def grow_vocab(lda_model, dictionary, seed=42):
     """
-    vocab_tfidf.json : dict { "0": "考试", "1": "公务员", ... }
-    freq_tfidf.json  : list[dict] [ { "0": 2, "5": 1 }, ... ]
+    追加式词表版本（vocab/incremental.py）：前 num_terms 个词必须与模型一致，
+    新词的参数按 gensim 初始化方式补到末尾，旧词参数不动；返回新增词数
     """
+    old_terms = lda_model.num_terms
+    new_terms = dictionary.num_terms
 
-    vocab_raw = load_json(vocab_json)
-    docs = load_json(doc_freq_json)
-
-    if isinstance(vocab_raw, list):
-        raise TypeError(
-            f"[ERROR] 你把 freq 文件当成 vocab 传进来了: {vocab_json}"
-        )
-    if not isinstance(vocab_raw, dict):
-        raise TypeError(
-            f"[ERROR] vocab_tfidf.json 必须是 dict {{id: word}}"
-        )
+    if new_terms < old_terms:
+        raise ValueError(f"[ERROR] 词表比模型小（{new_terms} < {old_terms}），不是追加式版本")
+    for i in range(old_terms):
+        if lda_model.id2word[i] != dictionary.id2token[i]:
+            raise ValueError(f"[ERROR] 词表 id {i} 与模型不一致，不是追加式版本")
 
+    lda_model.id2word = dictionary
+    extra = new_terms - old_terms
+    if extra == 0:
+        return 0
 
-    if not isinstance(docs, list):
-        raise TypeError(
-            f"[ERROR] freq_tfidf.json 必须是 list[dict]"
-        )
-
-    id2token = {int(i): w for i, w in vocab_raw.items()}
+    dtype = lda_model.dtype
+    rng = np.random.RandomState(seed)
+    new_sstats = rng.gamma(100., 1. / 100., (lda_model.num_topics, extra)).astype(dtype)
+    lda_model.state.sstats = np.hstack([lda_model.state.sstats, new_sstats])
 
-    dictionary = corpora.Dictionary()
-    dictionary.id2token = id2token
-    dictionary.token2id = {w: i for i, w in id2token.items()}
-    dictionary.num_terms = len(id2token)
+    # eta 是长度 num_terms 的向量（symmetric / auto）；新词取已有均值
+    new_eta = np.full(lda_model.eta.shape[:-1] + (extra,), lda_model.eta.mean(), dtype=dtype)
+    lda_model.eta = np.concatenate([lda_model.eta, new_eta], axis=-1)
+    lda_model.state.eta = lda_model.eta
 
- 
-    corpus = []
-    for doc in docs:
-        bow = [(int(wid), int(freq)) for wid, freq in doc.items()]
-        corpus.append(bow)
+    lda_model.num_terms = new_terms
+    lda_model.expElogbeta = np.exp(lda_model.state.get_Elogbeta()).astype(dtype)
+    return extra
 
-    return corpus, dictionary
 
-
-
-def train_lda(
+def update_lda(
+    lda_model,
     corpus,
-    dictionary,
-    num_topics=50,
     passes=1,
     iterations=50,
-    chunksize=256
+    chunksize=256,
+    decay=0.5,
+    offset=1.0,
+    monitor=None
 ):
-    lda_model = LdaModel(
-        corpus=corpus,
-        id2word=dictionary,
-        num_topics=num_topics,
-        passes=passes,         
-        iterations=iterations,
-        alpha="auto",
-        eta="auto",
+    """
+    Hoffman 在线变分贝叶斯：rho_t = (offset + t) ^ -decay，
+    t 接着模型已有的更新次数往下数，新旧文档按数量比例混合
+    带 monitor 时走 core/lda_train.run_passes（与 LdaModel.update 逐步相同）
+    """
+    # gensim 4 的 update(iterations=...) 不起作用，E 步读的是模型自身的 iterations
+    lda_model.iterations = iterations
+    if monitor is not None:
+        return run_passes(
+            lda_model, corpus,
+            passes=passes,
+            chunksize=chunksize,
+            on_chunk=monitor,
+            decay=decay,
+            offset=offset
+        )
+
+    lda_model.update(
+        corpus,
         chunksize=chunksize,
-        random_state=42,
+        decay=decay,
+        offset=offset,
+        passes=passes,
         eval_every=None
     )
     return lda_model
 
 
-
-
 def extract_topics(lda_model, num_topics, top_words=15):
     topics = {}
     for i, topic in lda_model.show_topics(
@@ -94,59 +105,145 @@ def extract_topics(lda_model, num_topics, top_words=15):
     return topics
 
 
-def get_document_topics(lda_model, corpus):
+def get_document_topics(lda_model, corpus, chunk_docs=4096):
     """
-    返回可 JSON 序列化的文档-主题分布
-    关键修复点：numpy.float32 -> Python float
+    返回 float32[n_docs, num_topics] 文档-主题分布
+    按 chunk_docs 篇一块做矩阵化 E 步（core/lda_infer.py），结果与逐篇 get_document_topics 一致
     """
-    results = []
-    for doc in corpus:
-        topics = lda_model.get_document_topics(
-            doc,
-            minimum_probability=0.0
-        )
-        results.append([
-            [int(tid), float(prob)]
-            for tid, prob in topics
-        ])
-    return results
+    return batch_doc_topics(lda_model, corpus, chunk_docs=chunk_docs)
 
 
+def save_doc_topics(theta, json_out=None, npy_out=None, append=False):
+    """
+    npy_out  : 稠密 float32 数组（np.save），下游可 mmap_mode="r" 读取
+    json_out : 原来的 [[tid, prob], ...] 格式（丢弃 < 1e-8 的主题，同 gensim）
+    append   : 追加到已有文件末尾（在线模式）
+    """
+    if npy_out:
+        if append and os.path.exists(npy_out):
+            theta_all = np.concatenate([np.load(npy_out), theta])
+        else:
+            theta_all = theta
+        np.save(npy_out, theta_all)
+
+    if json_out:
+        doc_topics = doc_topics_to_json(theta)
+        if append and os.path.exists(json_out):
+            doc_topics = load_json(json_out) + doc_topics
+        save_json(doc_topics, json_out)
 
 
 def main():
     parser = argparse.ArgumentParser(description="LDA / OLDA 训练脚本（gensim）")
 
     parser.add_argument("--vocab", required=True, help="vocab_tfidf.json")
-    parser.add_argument("--docs", required=True, help="freq_tfidf.json")
+    parser.add_argument("--docs", required=True, help="freq_tfidf.json 或二进制语料目录")
+    parser.add_argument("--corpus_cache", default=None,
+                        help="freq_tfidf.json 的 mmap 语料缓存目录（默认 <docs>.corpus/）")
 
     parser.add_argument("--num_topics", type=int, default=50)
     parser.add_argument("--passes", type=int, default=1)
     parser.add_argument("--iterations", type=int, default=50)
     parser.add_argument("--chunksize", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="> 1 时用 LdaMulticore 多进程训练（alpha 改为 symmetric，结果不再逐次可复现）")
 
     parser.add_argument("--top_words", type=int, default=15)
     parser.add_argument("--topics_out", default="/home/liuyuan/Class_data/model/topics.json")
     parser.add_argument("--doc_topics_out", default="/home/liuyuan/Class_data/model/doc_topics.json")
     parser.add_argument("--model_out", default="lda.model")
+    parser.add_argument("--doc_topics_npy", default=None,
+                        help="文档主题分布另存为 float32 稠密数组 .npy")
+    parser.add_argument("--no_doc_topics_json", action="store_true",
+                        help="不写 --doc_topics_out 的 JSON（只配合 --doc_topics_npy 使用）")
+    parser.add_argument("--chunk_docs", type=int, default=4096,
+                        help="文档主题推理每块文档数（块越大越快，内存约 块内非零项 x 主题数 x 4B）")
+
+    # ---- 断点续训 ----
+    parser.add_argument("--checkpoint_dir", default=None,
+                        help="训练中定期写断点（模型状态 / pass 与 chunk 位置 / 随机数状态）")
+    parser.add_argument("--checkpoint_every", type=int, default=100,
+                        help="每多少个 chunk 写一次断点（每个 pass 结束时总会写）")
+    parser.add_argument("--resume", action="store_true", help="从 --checkpoint_dir 的最近断点继续训练")
+
+    # ---- 训练监控 ----
+    parser.add_argument("--metrics", action="store_true",
+                        help="逐 chunk / pass 记录耗时、吞吐、perplexity、内存到 <model_out>.metrics.jsonl，并写汇总")
+    parser.add_argument("--metrics_bound_every", type=int, default=10,
+                        help="每多少个 chunk 估一次 perplexity（0 = 不估）")
+    parser.add_argument("--trace_alloc", action="store_true",
+                        help="同时用 tracemalloc 统计 Python 分配热点（训练会变慢）")
+
+    # ---- 在线更新 ----
+    parser.add_argument("--update_model", default=None,
+                        help="在线模式：加载已有模型，--docs 只传新增文档（如 corpus_delta）")
+    parser.add_argument("--decay", type=float, default=0.5, help="在线模式 kappa，取值 (0.5, 1]")
+    parser.add_argument("--offset", type=float, default=1.0, help="在线模式 tau0，越大前几步越保守")
+    parser.add_argument("--append_doc_topics", action="store_true",
+                        help="在线模式：新文档的主题分布追加到已有 doc_topics 文件末尾")
 
     args = parser.parse_args()
+    if args.no_doc_topics_json and not args.doc_topics_npy:
+        parser.error("--no_doc_topics_json 需要同时指定 --doc_topics_npy")
+    if args.resume and not args.checkpoint_dir:
+        parser.error("--resume 需要同时指定 --checkpoint_dir")
+    if args.checkpoint_dir and (args.workers > 1 or args.update_model):
+        print("[WARN] 断点续训只支持单进程全量训练，忽略 --workers / 不对在线更新写断点")
+        args.workers = 1
+    if args.metrics and args.workers > 1:
+        print("[WARN] 训练监控只支持单进程，忽略 --workers")
+        args.workers = 1
 
     # ---- 构建语料 ----
-    corpus, dictionary = build_corpus(args.vocab, args.docs)
+    corpus, dictionary = build_corpus(args.vocab, args.docs, args.corpus_cache)
 
     print(f"[INFO] 文档数: {len(corpus)}")
     print(f"[INFO] 词表大小: {dictionary.num_terms}")
 
+    monitor = None
+    if args.metrics:
+        monitor = TrainingMonitor(
+            f"{args.model_out}.metrics.jsonl",
+            n_docs=len(corpus),
+            bound_every=args.metrics_bound_every,
+            trace_alloc=args.trace_alloc
+        )
+
     # ---- 训练 LDA / OLDA ----
-    lda_model = train_lda(
-        corpus=corpus,
-        dictionary=dictionary,
-        num_topics=args.num_topics,
-        passes=args.passes,
-        iterations=args.iterations,
-        chunksize=args.chunksize
-    )
+    if args.update_model:
+        if args.workers > 1:
+            print("[WARN] 在线更新只支持单进程，忽略 --workers")
+        lda_model = LdaModel.load(args.update_model)
+        args.num_topics = lda_model.num_topics
+        added = grow_vocab(lda_model, dictionary)
+        print(f"[INFO] 在线更新 {args.update_model}（已更新 {lda_model.num_updates} 篇次，词表新增 {added}）")
+        update_lda(
+            lda_model,
+            corpus,
+            passes=args.passes,
+            iterations=args.iterations,
+            chunksize=args.chunksize,
+            decay=args.decay,
+            offset=args.offset,
+            monitor=monitor
+        )
+    else:
+        lda_model = train_lda(
+            corpus=corpus,
+            dictionary=dictionary,
+            num_topics=args.num_topics,
+            passes=args.passes,
+            iterations=args.iterations,
+            chunksize=args.chunksize,
+            workers=args.workers,
+            checkpoint_dir=args.checkpoint_dir,
+            checkpoint_every=args.checkpoint_every,
+            resume=args.resume,
+            monitor=monitor
+        )
+
+    if monitor is not None:
+        print_summary(monitor.close(f"{args.model_out}.metrics_summary.json"))
 
     # ---- 保存模型 ----
     lda_model.save(args.model_out)
@@ -159,14 +256,24 @@ def main():
     )
     save_json(topics, args.topics_out)
 
-    # ---- 输出文档主题分布 ----
-    doc_topics = get_document_topics(lda_model, corpus)
-    save_json(doc_topics, args.doc_topics_out)
+    # ---- 输出文档主题分布（在线模式下只推理新文档）----
+    theta = get_document_topics(lda_model, corpus, chunk_docs=args.chunk_docs)
+    save_doc_topics(
+        theta,
+        json_out=None if args.no_doc_topics_json else args.doc_topics_out,
+        npy_out=args.doc_topics_npy,
+        append=bool(args.update_model and args.append_doc_topics)
+    )
 
     print(f"[OK] LDA 训练完成")
     print(f"[OK] 主题词文件: {args.topics_out}")
-    print(f"[OK] 文档主题分布: {args.doc_topics_out}")
+    if not args.no_doc_topics_json:
+        print(f"[OK] 文档主题分布: {args.doc_topics_out}")
+    if args.doc_topics_npy:
+        print(f"[OK] 文档主题矩阵: {args.doc_topics_npy} {theta.shape}")
     print(f"[OK] 模型文件: {args.model_out}")
+    if monitor is not None:
+        print(f"[OK] 训练指标: {args.model_out}.metrics.jsonl / {args.model_out}.metrics_summary.json")
 
 
 if __name__ == "__main__":
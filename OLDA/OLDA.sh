@@ -1,5 +1,14 @@
+OUT_DIR="/home/liuyuan/Class_data/data/IT-IDF"
+
+# pipeline.sh 只输出二进制语料 corpus_tfidf/；tf_idf.sh（freq.json 输入）输出 freq_tfidf.json
+# 两者都在时用较新的那个，避免读到上一次流程留下的旧语料
+DOCS="$OUT_DIR/corpus_tfidf"
+if [ ! -d "$DOCS" ] || [ "$OUT_DIR/freq_tfidf.json" -nt "$DOCS" ]; then
+  DOCS="$OUT_DIR/freq_tfidf.json"
+fi
+
 python OLDA.py \
-  --vocab /home/liuyuan/Class_data/data/IT-IDF/vocab_tfidf.json \
-  --docs /home/liuyuan/Class_data/data/IT-IDF/freq_tfidf.json\
+  --vocab $OUT_DIR/vocab_tfidf.json \
+  --docs $DOCS \
   --num_topics 50 \
-  --model_out /home/liuyuan/Class_data/model/lda.model
\ No newline at end of file
+  --model_out /home/liuyuan/Class_data/model/lda.model
@@ -0,0 +1,100 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.lda_train import build_corpus, train_lda
+
+
+# =========================================================
+# LDA 训练扩展性基准：固定语料，比较 LdaModel（单进程）与 LdaMulticore（不同 workers）
+# 默认用 LDA 生成过程合成语料（固定种子），也可以传 --vocab / --docs 用真实语料
+# 输出墙钟时间、docs/sec，以及留出样本上的 log perplexity 作为质量参照
+# 所有配置用同一组 alpha / eta（LdaMulticore 不支持 alpha="auto"，默认 symmetric），速度与质量可以直接对比
+# =========================================================
+
+
+def synth_corpus(n_docs: int, vocab_size: int, num_topics: int, avg_len: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    topic_word = rng.dirichlet(np.full(vocab_size, 0.05), size=num_topics)
+    corpus = []
+    for _ in range(n_docs):
+        theta = rng.dirichlet(np.full(num_topics, 0.1))
+        length = rng.poisson(avg_len) + 1
+        z = rng.choice(num_topics, size=length, p=theta)
+        words = np.concatenate([
+            rng.choice(vocab_size, size=c, p=topic_word[k])
+            for k, c in zip(*np.unique(z, return_counts=True))
+        ])
+        ids, counts = np.unique(words, return_counts=True)
+        corpus.append(list(zip(ids.tolist(), counts.tolist())))
+
+    from gensim import corpora
+    dictionary = corpora.Dictionary()
+    dictionary.id2token = {i: f"w{i}" for i in range(vocab_size)}
+    dictionary.token2id = {w: i for i, w in dictionary.id2token.items()}
+    dictionary.num_terms = vocab_size
+    return corpus, dictionary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LDA 多进程训练扩展性基准")
+    parser.add_argument("--vocab", default=None, help="vocab_tfidf.json（不传则用合成语料）")
+    parser.add_argument("--docs", default=None, help="freq_tfidf.json 或二进制语料目录")
+    parser.add_argument("--n_docs", type=int, default=20000)
+    parser.add_argument("--vocab_size", type=int, default=5000)
+    parser.add_argument("--avg_len", type=int, default=60)
+    parser.add_argument("--num_topics", type=int, default=50)
+    parser.add_argument("--passes", type=int, default=1)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--chunksize", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--holdout", type=int, default=1000, help="评估 perplexity 的留出文档数")
+    parser.add_argument("--alpha", choices=["symmetric", "asymmetric", "auto"], default="symmetric",
+                        help="所有配置共用；有多进程配置时不能用 auto")
+    parser.add_argument("--eta", choices=["symmetric", "auto"], default="auto", help="所有配置共用")
+    args = parser.parse_args()
+
+    if args.alpha == "auto" and any(w > 1 for w in args.workers):
+        parser.error("LdaMulticore 不支持 alpha=auto，多进程对比请用 symmetric / asymmetric")
+
+    if args.vocab and args.docs:
+        corpus, dictionary = build_corpus(args.vocab, args.docs)
+        corpus = list(corpus)
+    else:
+        corpus, dictionary = synth_corpus(args.n_docs, args.vocab_size, args.num_topics, args.avg_len)
+
+    holdout = corpus[-args.holdout:] if args.holdout else []
+    train = corpus[:len(corpus) - len(holdout)]
+    print(f"[INFO] 训练文档 {len(train)}，留出 {len(holdout)}，词表 {dictionary.num_terms}，"
+          f"主题数 {args.num_topics}，alpha={args.alpha} eta={args.eta}，CPU {os.cpu_count()}")
+
+    base = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        lda = train_lda(
+            train, dictionary,
+            num_topics=args.num_topics,
+            passes=args.passes,
+            iterations=args.iterations,
+            chunksize=args.chunksize,
+            workers=workers,
+            alpha=args.alpha,
+            eta=args.eta
+        )
+        elapsed = time.perf_counter() - start
+        base = base or elapsed
+        kind = "LdaModel" if workers <= 1 else "LdaMulticore"
+        perplexity = lda.log_perplexity(holdout) if holdout else float("nan")
+        print(
+            f"{kind:<12} workers={workers:<3} | {elapsed:8.2f}s | "
+            f"{len(train) * args.passes / elapsed:9.0f} docs/s | "
+            f"加速 {base / elapsed:5.2f}x | log perplexity {perplexity:.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core import lda_metrics
+from core.lda_train import build_corpus, train_lda
+
+
+# =========================================================
+# 主题数 / alpha / eta 网格搜索
+#
+# 语料只准备一次：freq_tfidf.json 先转换成 mmap 语料缓存（同 OLDA.py），
+# 各子进程直接打开同一份 mmap，不再各自解析 JSON
+# 每个配置训练一个单进程 LdaModel，评估：
+#   perplexity  末尾 --holdout 篇留出文档上的 perplexity（越低越好）
+#   coherence   训练语料上各主题 top 词的 u_mass 均值（越接近 0 越好）
+#
+# out_dir/
+#   runs/<配置>.json   每个配置一个结果文件（原子写入）；重新运行时已有结果的配置直接跳过
+#   models/<配置>      --save_models 时保存的模型
+#   summary.json       按 --rank_by 排序的汇总
+# =========================================================
+
+
+def parse_prior(value: str):
+    """
+    "auto" / "symmetric" / "asymmetric" 原样返回，其余按数值解析
+    """
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def config_key(cfg) -> str:
+    return f"k{cfg['num_topics']}_a{cfg['alpha']}_e{cfg['eta']}"
+
+
+def save_json_atomic(obj, path: str):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+# ======================
+# 子进程
+# ======================
+
+_STATE = {}
+
+
+def _init_worker(vocab_json, corpus_dir, holdout, settings):
+    corpus, dictionary = build_corpus(vocab_json, corpus_dir)
+    n_train = max(len(corpus) - holdout, 0)
+    _STATE.update(
+        dictionary=dictionary,
+        train=corpus.select(0, n_train),
+        heldout=corpus.select(n_train, len(corpus)),
+        settings=settings,
+    )
+
+
+def run_config(cfg):
+    settings = _STATE["settings"]
+    train, heldout = _STATE["train"], _STATE["heldout"]
+
+    start = time.perf_counter()
+    lda_model = train_lda(
+        train, _STATE["dictionary"],
+        num_topics=cfg["num_topics"],
+        passes=settings["passes"],
+        iterations=settings["iterations"],
+        chunksize=settings["chunksize"],
+        alpha=cfg["alpha"],
+        eta=cfg["eta"]
+    )
+    train_seconds = time.perf_counter() - start
+
+    coherence = lda_metrics.umass_coherence(train, lda_metrics.top_word_ids(lda_model, settings["top_words"]))
+    record = dict(
+        cfg,
+        key=config_key(cfg),
+        perplexity=lda_metrics.perplexity(lda_model, heldout, total_docs=len(train)) if len(heldout) else None,
+        coherence=float(coherence.mean()),
+        coherence_min=float(coherence.min()),
+        train_seconds=round(train_seconds, 3),
+        n_train=len(train),
+        n_heldout=len(heldout),
+    )
+
+    out_dir = settings["out_dir"]
+    if settings["save_models"]:
+        lda_model.save(os.path.join(out_dir, "models", record["key"]))
+    save_json_atomic(record, os.path.join(out_dir, "runs", f"{record['key']}.json"))
+    return record
+
+
+# ======================
+# 汇总
+# ======================
+
+def load_runs(runs_dir: str):
+    records = []
+    for name in sorted(os.listdir(runs_dir)):
+        if name.endswith(".json"):
+            with open(os.path.join(runs_dir, name), "r", encoding="utf-8") as f:
+                records.append(json.load(f))
+    return records
+
+
+def rank_runs(records, rank_by: str):
+    if rank_by == "perplexity":
+        key = lambda r: (r["perplexity"] is None, r["perplexity"] or 0.0)
+    else:
+        key = lambda r: -r["coherence"]
+    ranked = sorted(records, key=key)
+    for rank, r in enumerate(ranked, start=1):
+        r["rank"] = rank
+    return ranked
+
+
+def print_summary(ranked):
+    print(f"{'rank':>4}  {'num_topics':>10}  {'alpha':>10}  {'eta':>10}  {'perplexity':>12}  {'u_mass':>8}  {'秒':>8}")
+    for r in ranked:
+        perplexity = "-" if r["perplexity"] is None else f"{r['perplexity']:.2f}"
+        print(
+            f"{r['rank']:>4}  {r['num_topics']:>10}  {str(r['alpha']):>10}  {str(r['eta']):>10}  "
+            f"{perplexity:>12}  {r['coherence']:>8.3f}  {r['train_seconds']:>8.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LDA 主题数 / alpha / eta 网格搜索（多进程，可断点续跑）")
+    parser.add_argument("--vocab", required=True, help="vocab_tfidf.json")
+    parser.add_argument("--docs", required=True, help="freq_tfidf.json 或二进制语料目录")
+    parser.add_argument("--corpus_cache", default=None,
+                        help="freq_tfidf.json 的 mmap 语料缓存目录（默认 <docs>.corpus/）")
+    parser.add_argument("--out_dir", required=True, help="结果目录（runs/ + summary.json）")
+
+    parser.add_argument("--num_topics", type=int, nargs="+", default=[20, 30, 50, 80])
+    parser.add_argument("--alpha", nargs="+", default=["auto"], help="auto / symmetric / asymmetric / 数值")
+    parser.add_argument("--eta", nargs="+", default=["auto"], help="auto / symmetric / 数值")
+    parser.add_argument("--passes", type=int, default=1)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--chunksize", type=int, default=256)
+
+    parser.add_argument("--holdout", type=int, default=1000, help="末尾留出的评估文档数")
+    parser.add_argument("--top_words", type=int, default=10, help="计算 coherence 用的每主题 top 词数")
+    parser.add_argument("--rank_by", choices=["perplexity", "coherence"], default="perplexity")
+    parser.add_argument("--workers", type=int, default=1, help="同时训练的配置数（进程数）")
+    parser.add_argument("--save_models", action="store_true", help="保存每个配置的模型到 out_dir/models/")
+    args = parser.parse_args()
+
+    corpus, _ = build_corpus(args.vocab, args.docs, args.corpus_cache)
+    if args.holdout >= len(corpus):
+        parser.error(f"--holdout {args.holdout} 不小于文档数 {len(corpus)}")
+    print(f"[INFO] 文档数 {len(corpus)}（训练 {len(corpus) - args.holdout}，留出 {args.holdout}）")
+
+    runs_dir = os.path.join(args.out_dir, "runs")
+    os.makedirs(runs_dir, exist_ok=True)
+    if args.save_models:
+        os.makedirs(os.path.join(args.out_dir, "models"), exist_ok=True)
+
+    grid = [
+        {"num_topics": k, "alpha": parse_prior(a), "eta": parse_prior(e)}
+        for k, a, e in itertools.product(args.num_topics, args.alpha, args.eta)
+    ]
+    todo = [cfg for cfg in grid if not os.path.exists(os.path.join(runs_dir, f"{config_key(cfg)}.json"))]
+    print(f"[INFO] 配置 {len(grid)} 个，已完成 {len(grid) - len(todo)} 个，本次运行 {len(todo)} 个")
+
+    settings = dict(
+        passes=args.passes,
+        iterations=args.iterations,
+        chunksize=args.chunksize,
+        top_words=args.top_words,
+        out_dir=args.out_dir,
+        save_models=args.save_models,
+    )
+    init_args = (args.vocab, corpus.corpus_dir, args.holdout, settings)
+
+    if todo:
+        if args.workers <= 1:
+            _init_worker(*init_args)
+            results = map(run_config, todo)
+            pool = None
+        else:
+            from multiprocessing import Pool
+            pool = Pool(min(args.workers, len(todo)), initializer=_init_worker, initargs=init_args)
+            results = pool.imap_unordered(run_config, todo)
+
+        try:
+            for done, r in enumerate(results, start=1):
+                perplexity = "-" if r["perplexity"] is None else f"{r['perplexity']:.2f}"
+                print(f"[INFO] ({done}/{len(todo)}) {r['key']}  perplexity {perplexity}  "
+                      f"u_mass {r['coherence']:.3f}  {r['train_seconds']:.1f}s")
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    keys = {config_key(cfg) for cfg in grid}
+    ranked = rank_runs([r for r in load_runs(runs_dir) if r["key"] in keys], args.rank_by)
+    save_json_atomic(ranked, os.path.join(args.out_dir, "summary.json"))
+
+    print_summary(ranked)
+    print(f"[OK] 汇总（按 {args.rank_by} 排序）: {os.path.join(args.out_dir, 'summary.json')}")
+
+
+if __name__ == "__main__":
+    main()
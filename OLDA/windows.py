@@ -0,0 +1,227 @@
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.corpus import is_corpus_dir
+from core.lda_infer import batch_doc_topics
+from core.lda_train import build_corpus, run_passes, train_lda
+
+
+# =========================================================
+# 按发布时间分窗口的主题演化
+#
+# 语料必须是带发布时间的二进制语料（pipeline.py / TF-IDF.py 输出的 corpus_tfidf/），
+# 按天 / 按周切成窗口，依次训练：
+#   - 第一个窗口从头训练（--passes），或从 --init_model 热启动
+#   - 之后每个窗口复制上一窗口的模型，只用本窗口文档做 --warm_passes 遍在线更新
+#     （rho = (offset + t) ^ -decay，t 从 0 重新计数；offset 越大保留上一窗口的主题越多）
+#   - 训练完用匈牙利算法按 Bhattacharyya 系数把主题与上一窗口一一匹配并重排，主题 id 跨窗口一致
+#   - 每个窗口输出主题强度（文档主题分布的均值）
+#
+# out_dir/
+#   windows.json       每个窗口：起止时间 / 文档数 / 耗时 / 主题强度 / 与上一窗口的匹配相似度
+#   prevalence.npy     float32[n_windows, num_topics]
+#   topics/<窗口>.json  对齐后的主题词
+#   models/<窗口>       --save_models 时保存的模型
+# =========================================================
+
+DAY = 86400
+
+
+def window_keys(times: np.ndarray, window: str) -> np.ndarray:
+    """
+    发布时间（秒）-> 窗口起点（秒）；周窗口从周一开始（1970-01-01 是周四）
+    """
+    days = times // DAY
+    if window == "week":
+        return ((days + 3) // 7 * 7 - 3) * DAY
+    return days * DAY
+
+
+def window_label(start: int) -> str:
+    return datetime.fromtimestamp(start, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+# ======================
+# 主题对齐
+# ======================
+
+def match_topics(prev_topics: np.ndarray, topics: np.ndarray):
+    """
+    prev_topics / topics : (num_topics, num_terms) 主题-词分布
+    返回 (perm, similarity)：新 id k 对应当前模型的第 perm[k] 个主题，similarity[k] 为两者的 Bhattacharyya 系数
+    """
+    from scipy.optimize import linear_sum_assignment
+    bc = np.sqrt(prev_topics) @ np.sqrt(topics).T
+    rows, cols = linear_sum_assignment(-bc)
+    perm = cols[np.argsort(rows)]
+    return perm, bc[np.arange(len(perm)), perm]
+
+
+def permute_topics(lda_model, perm: np.ndarray):
+    """
+    按 perm 原地重排模型的主题（sstats / expElogbeta / alpha，以及矩阵形式的 eta）
+    """
+    lda_model.state.sstats = lda_model.state.sstats[perm]
+    lda_model.expElogbeta = lda_model.expElogbeta[perm]
+    lda_model.alpha = np.asarray(lda_model.alpha)[perm]
+    if np.ndim(lda_model.eta) == 2:
+        lda_model.eta = lda_model.eta[perm]
+        lda_model.state.eta = lda_model.eta
+
+
+def top_words(lda_model, n: int):
+    return {
+        k: [word for word, _ in lda_model.show_topic(k, topn=n)]
+        for k in range(lda_model.num_topics)
+    }
+
+
+# ======================
+# 训练
+# ======================
+
+def warm_start(prev_model, corpus, passes, iterations, chunksize, decay, offset):
+    lda_model = copy.deepcopy(prev_model)
+    lda_model.iterations = iterations
+    lda_model.num_updates = 0
+    lda_model.state.numdocs = 0
+    lda_model.decay = decay
+    lda_model.offset = offset
+    return run_passes(lda_model, corpus, passes=passes, chunksize=chunksize)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按天 / 周分窗口训练主题模型（热启动 + 主题对齐 + 主题强度）")
+    parser.add_argument("--vocab", required=True, help="vocab_tfidf.json")
+    parser.add_argument("--docs", required=True, help="带发布时间的二进制语料目录（corpus_tfidf/）")
+    parser.add_argument("--out_dir", required=True)
+    parser.add_argument("--window", choices=["day", "week"], default="day")
+    parser.add_argument("--min_docs", type=int, default=50,
+                        help="文档数少于此值的窗口不训练，只用上一窗口模型推理（还没有模型时跳过）")
+
+    parser.add_argument("--init_model", default=None, help="第一个窗口从已有模型热启动（如全量 lda.model）")
+    parser.add_argument("--num_topics", type=int, default=50)
+    parser.add_argument("--passes", type=int, default=5, help="第一个窗口从头训练的遍数")
+    parser.add_argument("--warm_passes", type=int, default=1, help="热启动窗口的遍数")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--chunksize", type=int, default=256)
+    parser.add_argument("--decay", type=float, default=0.5, help="热启动窗口的 kappa")
+    parser.add_argument("--offset", type=float, default=4.0, help="热启动窗口的 tau0，越大越保留上一窗口的主题")
+
+    parser.add_argument("--top_words", type=int, default=15)
+    parser.add_argument("--save_models", action="store_true")
+    args = parser.parse_args()
+
+    if not is_corpus_dir(args.docs):
+        parser.error("--docs 需要带发布时间的二进制语料目录（freq_tfidf.json 不含时间）")
+
+    corpus, dictionary = build_corpus(args.vocab, args.docs)
+    times = np.asarray(corpus.times)
+    dated = np.flatnonzero(times >= 0)
+    if len(dated) < len(times):
+        print(f"[WARN] {len(times) - len(dated)} 篇文档没有发布时间，不参与分窗口")
+    if len(dated) == 0:
+        parser.error("语料中没有任何发布时间")
+
+    keys = window_keys(times[dated], args.window)
+    order = np.argsort(keys, kind="stable")
+    starts, first_pos, counts = np.unique(keys[order], return_index=True, return_counts=True)
+    print(f"[INFO] {len(dated)} 篇文档，{len(starts)} 个{'天' if args.window == 'day' else '周'}窗口")
+
+    for name in ("topics", "models") if args.save_models else ("topics",):
+        os.makedirs(os.path.join(args.out_dir, name), exist_ok=True)
+
+    prev_model = None
+    if args.init_model:
+        from gensim.models.ldamodel import LdaModel
+        prev_model = LdaModel.load(args.init_model)
+        prev_model.id2word = dictionary
+        args.num_topics = prev_model.num_topics
+
+    window_days = 7 if args.window == "week" else 1
+    records = []
+    prevalence = []
+    for start, pos, n in zip(starts.tolist(), first_pos.tolist(), counts.tolist()):
+        label = window_label(start)
+        window_corpus = corpus.take(np.sort(dated[order[pos:pos + n]]))
+        t0 = time.perf_counter()
+
+        if n < args.min_docs and prev_model is None:
+            # 还没有模型可用，文档又太少，不足以从头训练
+            print(f"[WARN] {label} 只有 {n} 篇文档且还没有模型，跳过（主题强度记为 NaN）")
+            prevalence.append(np.full(args.num_topics, np.nan, dtype=np.float32))
+            records.append({
+                "window": label, "start": start, "end": start + window_days * DAY,
+                "n_docs": n, "mode": "skip", "train_seconds": 0.0,
+                "prevalence": None, "similarity": None,
+            })
+            continue
+        if n < args.min_docs:
+            lda_model, mode = prev_model, "infer"
+        elif prev_model is None:
+            lda_model, mode = train_lda(
+                window_corpus, dictionary,
+                num_topics=args.num_topics,
+                passes=args.passes,
+                iterations=args.iterations,
+                chunksize=args.chunksize
+            ), "cold"
+        else:
+            lda_model, mode = warm_start(
+                prev_model, window_corpus,
+                passes=args.warm_passes,
+                iterations=args.iterations,
+                chunksize=args.chunksize,
+                decay=args.decay,
+                offset=args.offset
+            ), "warm"
+
+        similarity = None
+        if mode == "warm":
+            perm, sim = match_topics(prev_model.get_topics(), lda_model.get_topics())
+            permute_topics(lda_model, perm)
+            similarity = sim.round(4).tolist()
+        train_seconds = time.perf_counter() - t0
+
+        theta = batch_doc_topics(lda_model, window_corpus)
+        share = theta.mean(axis=0)
+        prevalence.append(share)
+
+        records.append({
+            "window": label,
+            "start": start,
+            "end": start + window_days * DAY,
+            "n_docs": n,
+            "mode": mode,
+            "train_seconds": round(train_seconds, 3),
+            "prevalence": share.round(6).tolist(),
+            "similarity": similarity,
+        })
+        with open(os.path.join(args.out_dir, "topics", f"{label}.json"), "w", encoding="utf-8") as f:
+            json.dump(top_words(lda_model, args.top_words), f, ensure_ascii=False, indent=2)
+        if args.save_models and mode != "infer":
+            lda_model.save(os.path.join(args.out_dir, "models", label))
+
+        hot = np.argsort(-share)[:3].tolist()
+        print(f"[INFO] {label} {mode:<5} {n:>7} 篇 {train_seconds:7.2f}s  热点主题 "
+              + "  ".join(f"{k}({share[k]:.3f})" for k in hot))
+        prev_model = lda_model
+
+    np.save(os.path.join(args.out_dir, "prevalence.npy"), np.asarray(prevalence, dtype=np.float32))
+    with open(os.path.join(args.out_dir, "windows.json"), "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+
+    print(f"[OK] {len(records)} 个窗口，主题强度矩阵 {args.out_dir}/prevalence.npy")
+    print(f"[OK] 窗口明细 {args.out_dir}/windows.json，主题词 {args.out_dir}/topics/")
+
+
+if __name__ == "__main__":
+    main()
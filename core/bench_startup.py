@@ -0,0 +1,75 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# 每个场景都在全新解释器里跑，测的是真实的冷启动墙钟时间
+SCENARIOS = {
+    "jieba 默认初始化（marshal 缓存）": (
+        "import jieba, logging; jieba.setLogLevel(logging.WARNING); "
+        "jieba.lcut('今天讨论人工智能的发展')"
+    ),
+    "jieba 预构建缓存（core.jieba_init）": (
+        "from core.jieba_init import init_jieba; init_jieba(); "
+        "import jieba; jieba.lcut('今天讨论人工智能的发展')"
+    ),
+    "推理启动：顶层导入 gensim + jieba 默认初始化": (
+        "from gensim.models import LdaModel; import jieba, logging; "
+        "jieba.setLogLevel(logging.WARNING); jieba.lcut('今天讨论人工智能的发展')"
+    ),
+    "推理启动：infer.py 按需导入 + 预构建缓存": (
+        "import runpy; m = runpy.run_path('infer/infer.py', run_name='bench'); "
+        "m['jieba_lcut']('今天讨论人工智能的发展'); from gensim.models import LdaModel"
+    ),
+    "加载 infer.py 模块（--help 等参数错误路径）": (
+        "import runpy; runpy.run_path('infer/infer.py', run_name='bench')"
+    ),
+}
+
+
+def run_once(code: str) -> float:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = BASE_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BASE_DIR,
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI 冷启动耗时基准")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", default=None, help="只跑名字包含这些关键字的场景")
+    args = parser.parse_args()
+
+    # 先各跑一次，保证两种缓存都已生成，只比较"有缓存"时的启动
+    for name, code in SCENARIOS.items():
+        if args.only and not any(k in name for k in args.only):
+            continue
+        try:
+            run_once(code)
+        except subprocess.CalledProcessError:
+            print(f"[WARN] 场景失败，跳过: {name}")
+            continue
+
+        times = [run_once(code) for _ in range(args.repeat)]
+        print(
+            f"{name:<40} | 均值 {statistics.mean(times):.3f}s | "
+            f"最小 {min(times):.3f}s | 最大 {max(times):.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -15,4 +15,13 @@ STOP_LIST = os.path.join(BASE_DIR, "..", "vocab", "stopwords.txt")
 
 CONTENT_INFO = os.path.join(BASE_DIR, "..", "content_info", "content.json")
 
+# 增量入库清单（已处理文件 / 行号 / 微博id）
+MANIFEST_PATH = os.path.join(BASE_DIR, "..", "content_info", "manifest.json")
+
 DATA_PATH = os.path.join(BASE_DIR, "..", "data")
+
+# jieba 预构建词典缓存目录（core/jieba_init.py），可用环境变量覆盖
+JIEBA_CACHE_DIR = os.environ.get(
+    "JIEBA_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".jieba_cache")
+)
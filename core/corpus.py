@@ -0,0 +1,405 @@
+import argparse
+import calendar
+import copy
+import json
+import os
+from datetime import datetime
+from typing import Dict
+
+import numpy as np
+
+from core.tinydb_stream import iter_json_array, iter_tinydb_records
+
+
+# =========================================================
+# 二进制 CSR 语料格式
+#
+# corpus_dir/
+#   meta.json      格式版本 / 文档数 / 非零项数 / 词表大小 / 微博id 宽度
+#   offsets.bin    int64[n_docs + 1]   第 i 篇文档 = ids[offsets[i]:offsets[i+1]]
+#   ids.bin        int32[nnz]          token id
+#   counts.bin     int32[nnz]          词频
+#   times.bin      int64[n_docs]       发布时间（秒，未知为 -1）
+#   weibo_ids.bin  S{id_width}[n_docs] 微博id（未知为空）
+#
+# 全部是裸数组，np.memmap 直接打开，读取不拷贝
+# =========================================================
+
+FORMAT_VERSION = 1
+
+ARRAYS = {
+    "offsets": np.int64,
+    "ids": np.int32,
+    "counts": np.int32,
+    "times": np.int64,
+}
+
+TIME_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d")
+
+
+def parse_time(value) -> int:
+    """
+    发布时间字符串 -> 秒（按 UTC 解释，只用于排序 / 分窗口）；解析失败返回 -1
+    """
+    if value is None:
+        return -1
+    if isinstance(value, (int, float)):
+        return int(value) if value == value else -1
+    value = str(value).strip()
+    for fmt in TIME_FORMATS:
+        try:
+            return calendar.timegm(datetime.strptime(value, fmt).timetuple())
+        except ValueError:
+            continue
+    return -1
+
+
+# =========================================================
+# 写
+# =========================================================
+
+class CorpusWriter:
+    """
+    流式写入：逐篇 add，按块追加到磁盘，内存只保留当前缓冲区
+    """
+
+    FLUSH_TOKENS = 1 << 20
+
+    def __init__(self, corpus_dir: str, vocab_size: int = None, id_width: int = 32):
+        self.corpus_dir = corpus_dir
+        self.vocab_size = vocab_size
+        self.id_width = id_width
+
+        os.makedirs(corpus_dir, exist_ok=True)
+        self.files = {
+            name: open(os.path.join(corpus_dir, f"{name}.bin"), "wb")
+            for name in list(ARRAYS) + ["weibo_ids"]
+        }
+
+        self.n_docs = 0
+        self.nnz = 0
+        self.max_id = -1
+        self.meta = None
+        self._reset_buffers()
+        self.buf["offsets"].append(0)
+
+    def _reset_buffers(self):
+        self.buf = {name: [] for name in self.files}
+        self.buf_tokens = 0
+
+    def add(self, ids, counts, time: int = -1, weibo_id: str = ""):
+        ids = np.asarray(ids, dtype=np.int32)
+        counts = np.asarray(counts, dtype=np.int32)
+        if ids.shape != counts.shape:
+            raise ValueError("ids 与 counts 长度不一致")
+
+        self.buf["ids"].append(ids)
+        self.buf["counts"].append(counts)
+        self.nnz += len(ids)
+        self.n_docs += 1
+        self.buf["offsets"].append(self.nnz)
+        self.buf["times"].append(time)
+        self.buf["weibo_ids"].append(str(weibo_id).encode("utf-8")[:self.id_width])
+        if len(ids):
+            self.max_id = max(self.max_id, int(ids.max()))
+
+        self.buf_tokens += len(ids)
+        if self.buf_tokens >= self.FLUSH_TOKENS:
+            self.flush()
+
+    def add_bow(self, bow: Dict, time: int = -1, weibo_id: str = ""):
+        """
+        bow: {"12": 2, "7": 1}（JSON 里的 str id）或 {12: 2}
+        """
+        ids = np.fromiter((int(k) for k in bow.keys()), dtype=np.int32, count=len(bow))
+        counts = np.fromiter((int(v) for v in bow.values()), dtype=np.int32, count=len(bow))
+        self.add(ids, counts, time, weibo_id)
+
+    def add_block(self, offsets, ids, counts, times=None, weibo_ids=None):
+        """
+        一次追加一整块文档（向量化处理后的结果用这个），offsets 从 0 开始
+        """
+        offsets = np.asarray(offsets, dtype=np.int64)
+        n = len(offsets) - 1
+        if n <= 0:
+            return
+        ids = np.asarray(ids, dtype=np.int32)
+        counts = np.asarray(counts, dtype=np.int32)
+
+        self.buf["ids"].append(ids)
+        self.buf["counts"].append(counts)
+        self.buf["offsets"].extend((offsets[1:] + self.nnz).tolist())
+        self.buf["times"].extend(
+            np.full(n, -1, dtype=np.int64).tolist() if times is None else np.asarray(times).tolist()
+        )
+        self.buf["weibo_ids"].extend(
+            [b""] * n if weibo_ids is None else [bytes(w) for w in weibo_ids]
+        )
+        self.nnz += len(ids)
+        self.n_docs += n
+        if len(ids):
+            self.max_id = max(self.max_id, int(ids.max()))
+
+        self.buf_tokens += len(ids)
+        if self.buf_tokens >= self.FLUSH_TOKENS:
+            self.flush()
+
+    def flush(self):
+        for name in ("ids", "counts"):
+            if self.buf[name]:
+                np.concatenate(self.buf[name]).tofile(self.files[name])
+        for name in ("offsets", "times"):
+            np.asarray(self.buf[name], dtype=ARRAYS[name]).tofile(self.files[name])
+        np.asarray(self.buf["weibo_ids"], dtype=f"S{self.id_width}").tofile(self.files["weibo_ids"])
+        self._reset_buffers()
+
+    def close(self):
+        if self.meta is not None:
+            return self.meta
+        self.flush()
+        for f in self.files.values():
+            f.close()
+
+        meta = {
+            "version": FORMAT_VERSION,
+            "n_docs": self.n_docs,
+            "nnz": self.nnz,
+            "vocab_size": self.vocab_size if self.vocab_size is not None else self.max_id + 1,
+            "id_width": self.id_width,
+        }
+        with open(os.path.join(self.corpus_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        self.meta = meta
+        return meta
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# =========================================================
+# 读
+# =========================================================
+
+def is_corpus_dir(path: str) -> bool:
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, "meta.json"))
+
+
+class CsrCorpus:
+    """
+    mmap 只读语料。
+    - 迭代时产出 gensim BOW：[(id, count), ...]，可多次迭代（LDA 多 pass）
+    - doc(i) / 各数组属性直接是 mmap 视图，不拷贝
+    """
+
+    BLOCK_DOCS = 4096
+
+    def __init__(self, corpus_dir: str, mmap: bool = True):
+        self.corpus_dir = corpus_dir
+        with open(os.path.join(corpus_dir, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+        if self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"[ERROR] 不支持的语料格式版本: {self.meta.get('version')}")
+
+        n_docs, nnz = self.meta["n_docs"], self.meta["nnz"]
+        self.offsets = self._open("offsets", np.int64, n_docs + 1, mmap)
+        self.ids = self._open("ids", np.int32, nnz, mmap)
+        self.counts = self._open("counts", np.int32, nnz, mmap)
+        self.times = self._open("times", np.int64, n_docs, mmap)
+        self.weibo_ids = self._open("weibo_ids", f"S{self.meta['id_width']}", n_docs, mmap)
+
+    def _open(self, name, dtype, length, mmap):
+        path = os.path.join(self.corpus_dir, f"{name}.bin")
+        if length == 0:
+            return np.zeros(0, dtype=dtype)
+        if mmap:
+            return np.memmap(path, dtype=dtype, mode="r", shape=(length,))
+        return np.fromfile(path, dtype=dtype, count=length)
+
+    @property
+    def n_docs(self) -> int:
+        return self.meta["n_docs"]
+
+    @property
+    def num_terms(self) -> int:
+        return self.meta["vocab_size"]
+
+    def __len__(self):
+        return self.n_docs
+
+    def doc(self, i: int):
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.ids[start:end], self.counts[start:end]
+
+    def select(self, start: int, end: int) -> "CsrCorpus":
+        """
+        文档 [start, end) 的视图：ids / counts 仍是 mmap 切片，只有 offsets 平移后拷贝一份
+        """
+        end = min(end, self.n_docs)
+        lo, hi = int(self.offsets[start]), int(self.offsets[end])
+        view = copy.copy(self)
+        view.meta = dict(self.meta, n_docs=end - start, nnz=hi - lo)
+        view.offsets = np.asarray(self.offsets[start:end + 1]) - lo
+        view.ids = self.ids[lo:hi]
+        view.counts = self.counts[lo:hi]
+        view.times = self.times[start:end]
+        view.weibo_ids = self.weibo_ids[start:end]
+        return view
+
+    def take(self, doc_ids) -> "CsrCorpus":
+        """
+        任意文档子集（按 doc_ids 顺序）；下标连续时等同 select，否则把这些文档的数组拷贝到内存
+        """
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        if len(doc_ids) and doc_ids[-1] - doc_ids[0] + 1 == len(doc_ids) and np.all(np.diff(doc_ids) == 1):
+            return self.select(int(doc_ids[0]), int(doc_ids[-1]) + 1)
+
+        starts = np.asarray(self.offsets[doc_ids])
+        lens = np.asarray(self.offsets[doc_ids + 1]) - starts
+        offsets = np.zeros(len(doc_ids) + 1, dtype=np.int64)
+        np.cumsum(lens, out=offsets[1:])
+        positions = np.repeat(starts - offsets[:-1], lens) + np.arange(offsets[-1])
+
+        view = copy.copy(self)
+        view.meta = dict(self.meta, n_docs=len(doc_ids), nnz=int(offsets[-1]))
+        view.offsets = offsets
+        view.ids = np.asarray(self.ids[positions])
+        view.counts = np.asarray(self.counts[positions])
+        view.times = np.asarray(self.times[doc_ids])
+        view.weibo_ids = np.asarray(self.weibo_ids[doc_ids])
+        return view
+
+    def weibo_id(self, i: int) -> str:
+        return self.weibo_ids[i].decode("utf-8")
+
+    def iter_blocks(self, block_docs: int = None):
+        """
+        按块产出 (doc_start, offsets, ids, counts)，offsets 已平移到块内从 0 开始
+        """
+        block_docs = block_docs or self.BLOCK_DOCS
+        for start in range(0, self.n_docs, block_docs):
+            end = min(start + block_docs, self.n_docs)
+            lo, hi = int(self.offsets[start]), int(self.offsets[end])
+            yield (
+                start,
+                np.asarray(self.offsets[start:end + 1]) - lo,
+                self.ids[lo:hi],
+                self.counts[lo:hi],
+            )
+
+    def __iter__(self):
+        for _, offsets, ids, counts in self.iter_blocks():
+            ids_list = ids.tolist()
+            counts_list = counts.tolist()
+            offsets_list = offsets.tolist()
+            for j in range(len(offsets_list) - 1):
+                a, b = offsets_list[j], offsets_list[j + 1]
+                yield list(zip(ids_list[a:b], counts_list[a:b]))
+
+    def to_csr(self):
+        """
+        scipy.sparse.csr_matrix(n_docs, vocab_size)，数据直接引用 mmap 数组
+        """
+        from scipy.sparse import csr_matrix
+        return csr_matrix(
+            (self.counts, self.ids, self.offsets),
+            shape=(self.n_docs, self.num_terms),
+            copy=False,
+        )
+
+
+# =========================================================
+# JSON -> CSR 转换
+# =========================================================
+
+def load_json(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def convert_freq_json(vocab_json: str, docs_json: str, out_dir: str, keep_empty: bool = False) -> dict:
+    """
+    vocab.json {id: word} + freq.json [ {id: freq}, ... ] -> CSR
+    （data/process_1 与 data/IT-IDF 两个阶段的文件都适用）
+    freq.json 逐篇流式读取；keep_empty=True 时保留空文档，文档数与 JSON 一致
+    """
+    vocab = load_json(vocab_json)
+    vocab_size = max((int(i) for i in vocab), default=-1) + 1
+
+    with CorpusWriter(out_dir, vocab_size=vocab_size) as writer:
+        for doc in iter_json_array(docs_json):
+            if isinstance(doc, dict) and (doc or keep_empty):
+                writer.add_bow(doc)
+    return writer.meta
+
+
+def cached_freq_corpus(vocab_json: str, docs_json: str, cache_dir: str = None) -> "CsrCorpus":
+    """
+    freq.json 的 mmap 缓存：第一次流式转换成二进制语料，之后源文件不变就直接打开
+    缓存默认放在 <docs_json>.corpus/，source.json 记录源文件与词表的大小 / 修改时间；
+    空文档保留，文档下标与 freq.json 一一对应
+    """
+    cache_dir = cache_dir or docs_json.rstrip("/") + ".corpus"
+    source = {
+        name: {"path": os.path.abspath(path), "size": os.stat(path).st_size, "mtime": os.stat(path).st_mtime}
+        for name, path in (("docs", docs_json), ("vocab", vocab_json))
+    }
+    source_path = os.path.join(cache_dir, "source.json")
+
+    if is_corpus_dir(cache_dir) and os.path.exists(source_path) and load_json(source_path) == source:
+        return CsrCorpus(cache_dir)
+
+    if os.path.exists(source_path):
+        os.remove(source_path)
+    meta = convert_freq_json(vocab_json, docs_json, cache_dir, keep_empty=True)
+    with open(source_path, "w", encoding="utf-8") as f:
+        json.dump(source, f, ensure_ascii=False, indent=2)
+    print(f"[INFO] {docs_json} 已转换为 mmap 语料缓存 {cache_dir}（{meta['n_docs']} 篇）")
+    return CsrCorpus(cache_dir)
+
+
+def convert_tinydb_content(vocab_json: str, content_json: str, out_dir: str) -> dict:
+    """
+    TinyDB content.json（词 -> 词频，带 id / time）+ vocab.json {id: word} -> CSR
+    保留 微博id 与发布时间；不含任何词表内词的文档丢弃（与 freq_2_json 一致）
+    """
+    vocab = load_json(vocab_json)
+    word2id = {w: int(i) for i, w in vocab.items()}
+    vocab_size = max(word2id.values(), default=-1) + 1
+
+    # content.json 逐条流式读取，不整体载入
+    with CorpusWriter(out_dir, vocab_size=vocab_size) as writer:
+        for _, doc_info in iter_tinydb_records(content_json):
+            ids, counts = [], []
+            for word, freq in doc_info.get("words", {}).items():
+                wid = word2id.get(word)
+                if wid is not None and freq > 0:
+                    ids.append(wid)
+                    counts.append(freq)
+            if ids:
+                writer.add(ids, counts, parse_time(doc_info.get("time")), doc_info.get("id", ""))
+    return writer.meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON 语料 -> 二进制 CSR 语料（mmap）")
+    parser.add_argument("--vocab", required=True, help="词表 JSON {id: word}")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--docs", help="freq.json / freq_tfidf.json")
+    src.add_argument("--content", help="TinyDB content.json（保留 微博id 与发布时间）")
+    parser.add_argument("--out_dir", required=True, help="输出语料目录")
+    args = parser.parse_args()
+
+    if args.docs:
+        meta = convert_freq_json(args.vocab, args.docs, args.out_dir)
+    else:
+        meta = convert_tinydb_content(args.vocab, args.content, args.out_dir)
+
+    print(f"[OK] 语料已写入 {args.out_dir}：{meta['n_docs']} 篇，{meta['nnz']} 个非零项，词表 {meta['vocab_size']}")
+
+
+if __name__ == "__main__":
+    main()
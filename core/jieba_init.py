@@ -0,0 +1,131 @@
+import argparse
+import gc
+import hashlib
+import json
+import os
+import pickle
+import sys
+import time
+
+from core.config import JIEBA_CACHE_DIR
+
+
+# =========================================================
+# jieba 快速启动
+# jieba 自带的 marshal 缓存放在 /tmp，只按 mtime 校验，加载约 1 秒；
+# 这里用 pickle 预构建前缀词典，文件头记录 jieba 版本 / Python 版本 / 词典文件状态，
+# 任何一项变化都会自动重建。加载时关闭 GC，避免构造几十万个 dict 项时反复触发回收
+# =========================================================
+
+CACHE_FORMAT = 1
+
+
+def _dict_path(dictionary: str = None) -> str:
+    import jieba
+    if dictionary:
+        return os.path.abspath(dictionary)
+    return os.path.join(os.path.dirname(jieba.__file__), jieba.DEFAULT_DICT_NAME)
+
+
+def dict_fingerprint(dictionary: str = None) -> dict:
+    import jieba
+    path = _dict_path(dictionary)
+    st = os.stat(path)
+    return {
+        "format": CACHE_FORMAT,
+        "jieba": jieba.__version__,
+        "python": list(sys.version_info[:2]),
+        "dict": path,
+        "size": st.st_size,
+        "mtime": st.st_mtime,
+    }
+
+
+def cache_path(cache_dir: str, fingerprint: dict) -> str:
+    digest = hashlib.md5(json.dumps(fingerprint, sort_keys=True).encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"jieba.{digest[:16]}.pkl")
+
+
+def build_cache(cache_dir: str = None, dictionary: str = None) -> str:
+    """
+    生成前缀词典并原子写入缓存文件，返回缓存路径
+    """
+    import jieba
+
+    cache_dir = cache_dir or JIEBA_CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    fingerprint = dict_fingerprint(dictionary)
+
+    tokenizer = jieba.Tokenizer(dictionary) if dictionary else jieba.dt
+    with tokenizer.get_dict_file() as f:
+        freq, total = tokenizer.gen_pfdict(f)
+
+    path = cache_path(cache_dir, fingerprint)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump((fingerprint, freq, total), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _load_cache(path: str, fingerprint: dict):
+    if not os.path.exists(path):
+        return None
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with open(path, "rb") as f:
+            header, freq, total = pickle.load(f)
+    except Exception:
+        return None
+    finally:
+        if gc_enabled:
+            gc.enable()
+    if header != fingerprint:
+        return None
+    return freq, total
+
+
+def init_jieba(cache_dir: str = None, dictionary: str = None, user_dict: str = None):
+    """
+    用预构建缓存初始化全局 jieba.dt；缓存缺失或版本不符时重建一次
+    """
+    import jieba
+
+    if jieba.dt.initialized:
+        return jieba.dt
+
+    cache_dir = cache_dir or JIEBA_CACHE_DIR
+    jieba.dt.tmp_dir = cache_dir
+    if dictionary:
+        jieba.dt.dictionary = os.path.abspath(dictionary)
+
+    fingerprint = dict_fingerprint(dictionary)
+    path = cache_path(cache_dir, fingerprint)
+    loaded = _load_cache(path, fingerprint)
+    if loaded is None:
+        path = build_cache(cache_dir, dictionary)
+        loaded = _load_cache(path, fingerprint)
+
+    with jieba.dt.lock:
+        jieba.dt.FREQ, jieba.dt.total = loaded
+        jieba.dt.initialized = True
+
+    if user_dict:
+        jieba.load_userdict(user_dict)
+    return jieba.dt
+
+
+def main():
+    parser = argparse.ArgumentParser(description="预构建 jieba 词典缓存")
+    parser.add_argument("--cache_dir", default=JIEBA_CACHE_DIR)
+    parser.add_argument("--dictionary", default=None, help="自定义主词典（可选）")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    path = build_cache(args.cache_dir, args.dictionary)
+    print(f"[OK] jieba 词典缓存: {path}（{time.perf_counter() - start:.2f}s）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import argparse
+import json
+import os
+import time
+import zlib
+
+import numpy as np
+
+from core.lda_infer import batch_doc_topics, infer_gamma
+
+
+# =========================================================
+# 只读推理产物：从 gensim 模型导出 E 步所需的最小数据，mmap 打开，多进程共享
+#   python -m core.lda_artifact --model model/lda.model --vocab vocab_tfidf.json --out_dir model/lda.artifact
+#
+# artifact_dir/
+#   meta.json         格式版本 / 主题数 / 词数 / iterations / gamma_threshold / 来源模型
+#   expElogbeta.npy   float32[num_topics, num_terms]
+#   alpha.npy         float32[num_topics]
+#   words.bin         所有词的 utf-8 拼接
+#   word_offsets.npy  int64[num_terms + 1]   第 i 个词 = words.bin[off[i]:off[i+1]]
+#   slots.npy         int32[2^k]             开放寻址哈希表（crc32 + 线性探测），值为词 id，空位 -1
+#
+# 全部用 np.load(mmap_mode="r") / np.memmap 打开，不反序列化训练状态（lda.model.state），
+# 同一台机器上的多个推理进程共享页缓存中的同一份矩阵
+# 推理与 gensim get_document_topics 同一套 E 步（core/lda_infer.py）：随机数状态相同时结果一致（差 ~1e-7 的 float32 舍入），
+# 默认各自的随机种子，差别与 gensim 模型换一个 random_state 相同
+# =========================================================
+
+ARTIFACT_FORMAT = 1
+
+
+def is_artifact_dir(path: str) -> bool:
+    # 二进制语料目录（core/corpus.py）也有 meta.json，用只有推理产物才有的 expElogbeta.npy 区分
+    return (
+        os.path.isdir(path)
+        and os.path.exists(os.path.join(path, "meta.json"))
+        and os.path.exists(os.path.join(path, "expElogbeta.npy"))
+    )
+
+
+def _hash(word_bytes: bytes) -> int:
+    return zlib.crc32(word_bytes)
+
+
+def build_slots(encoded) -> np.ndarray:
+    size = 1
+    while size < 2 * max(len(encoded), 1):
+        size *= 2
+    mask = size - 1
+    slots = np.full(size, -1, dtype=np.int32)
+    for wid, word_bytes in enumerate(encoded):
+        pos = _hash(word_bytes) & mask
+        while slots[pos] >= 0:
+            pos = (pos + 1) & mask
+        slots[pos] = wid
+    return slots
+
+
+def _save_array(path: str, arr: np.ndarray):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, arr)
+    os.replace(tmp_path, path)
+
+
+def export_artifact(lda_model, out_dir: str, vocab=None, source: str = None) -> dict:
+    """
+    vocab : {id: word}，默认用模型自带的 id2word
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    num_terms = lda_model.num_terms
+    if vocab is None:
+        vocab = {i: lda_model.id2word[i] for i in range(num_terms)}
+    vocab = {int(i): w for i, w in vocab.items()}
+    if len(vocab) != num_terms or max(vocab, default=-1) != num_terms - 1:
+        raise ValueError(f"[ERROR] 词表大小 {len(vocab)} 与模型词数 {num_terms} 不一致")
+
+    encoded = [vocab[i].encode("utf-8") for i in range(num_terms)]
+    offsets = np.zeros(num_terms + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+
+    _save_array(os.path.join(out_dir, "expElogbeta.npy"), np.asarray(lda_model.expElogbeta, dtype=np.float32))
+    _save_array(os.path.join(out_dir, "alpha.npy"), np.asarray(lda_model.alpha, dtype=np.float32))
+    _save_array(os.path.join(out_dir, "word_offsets.npy"), offsets)
+    _save_array(os.path.join(out_dir, "slots.npy"), build_slots(encoded))
+    with open(os.path.join(out_dir, "words.bin"), "wb") as f:
+        f.write(b"".join(encoded))
+
+    meta = {
+        "format": ARTIFACT_FORMAT,
+        "num_topics": int(lda_model.num_topics),
+        "num_terms": int(num_terms),
+        "iterations": int(lda_model.iterations),
+        "gamma_threshold": float(lda_model.gamma_threshold),
+        "source": os.path.abspath(source) if source else None,
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    # meta.json 最后写，存在即表示导出完整
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return meta
+
+
+class TokenTable:
+    """
+    mmap 哈希表：词 -> id，接口同 dict.get / in / len，可直接当 word2id 用
+    """
+
+    def __init__(self, artifact_dir: str):
+        self.artifact_dir = artifact_dir
+        self.offsets = np.load(os.path.join(artifact_dir, "word_offsets.npy"), mmap_mode="r")
+        self.slots = np.load(os.path.join(artifact_dir, "slots.npy"), mmap_mode="r")
+        words_path = os.path.join(artifact_dir, "words.bin")
+        self.words = np.memmap(words_path, dtype=np.uint8, mode="r") if os.path.getsize(words_path) else b""
+        self.mask = len(self.slots) - 1
+
+    # 传给子进程时只传目录，子进程自己 mmap，不把数组拷贝进 pickle
+    def __getstate__(self):
+        return {"artifact_dir": self.artifact_dir}
+
+    def __setstate__(self, state):
+        self.__init__(state["artifact_dir"])
+
+    def word(self, wid: int) -> str:
+        return bytes(self.words[self.offsets[wid]:self.offsets[wid + 1]]).decode("utf-8")
+
+    def get(self, word: str, default=None):
+        word_bytes = word.encode("utf-8")
+        pos = _hash(word_bytes) & self.mask
+        while True:
+            wid = int(self.slots[pos])
+            if wid < 0:
+                return default
+            if bytes(self.words[self.offsets[wid]:self.offsets[wid + 1]]) == word_bytes:
+                return wid
+            pos = (pos + 1) & self.mask
+
+    def __contains__(self, word: str) -> bool:
+        return self.get(word) is not None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def vocab(self) -> dict:
+        """
+        {"0": word, ...}，与 vocab_tfidf.json 相同结构
+        """
+        return {str(i): self.word(i) for i in range(len(self))}
+
+
+class InferenceArtifact:
+    """
+    属性名与 gensim LdaModel 推理相关的部分一致（expElogbeta / alpha / num_topics / iterations /
+    gamma_threshold / random_state），core.lda_infer.batch_doc_topics 可直接使用；
+    get_document_topics(bow) 与 LdaModel.get_document_topics 用法相同
+    """
+
+    def __init__(self, artifact_dir: str, seed: int = 42):
+        with open(os.path.join(artifact_dir, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != ARTIFACT_FORMAT:
+            raise ValueError(f"[ERROR] 不支持的推理产物格式: {self.meta.get('format')}")
+
+        self.artifact_dir = artifact_dir
+        self.expElogbeta = np.load(os.path.join(artifact_dir, "expElogbeta.npy"), mmap_mode="r")
+        self.alpha = np.load(os.path.join(artifact_dir, "alpha.npy"))
+        self.num_topics = self.meta["num_topics"]
+        self.num_terms = self.meta["num_terms"]
+        self.iterations = self.meta["iterations"]
+        self.gamma_threshold = self.meta["gamma_threshold"]
+        self.dtype = self.expElogbeta.dtype
+        self.random_state = np.random.RandomState(seed)
+        self.tokens = TokenTable(artifact_dir)
+
+    def infer(self, offsets, ids, counts) -> np.ndarray:
+        """
+        一块 CSR 文档 -> 归一化主题分布 float32[n_docs, num_topics]
+        """
+        n_docs = len(offsets) - 1
+        gamma = self.random_state.gamma(100., 1. / 100., (n_docs, self.num_topics)).astype(self.dtype)
+        gamma = infer_gamma(
+            self.expElogbeta, self.alpha, offsets, np.asarray(ids), np.asarray(counts), gamma,
+            iterations=self.iterations,
+            gamma_threshold=self.gamma_threshold
+        )
+        return (gamma / gamma.sum(axis=1, keepdims=True)).astype(np.float32)
+
+    def doc_topics(self, corpus, chunk_docs: int = 4096) -> np.ndarray:
+        return batch_doc_topics(self, corpus, chunk_docs)
+
+    def get_document_topics(self, bow, minimum_probability=None):
+        minimum_probability = max(minimum_probability or 0.0, 1e-8)
+        ids = np.fromiter((w for w, _ in bow), dtype=np.int64, count=len(bow))
+        counts = np.fromiter((c for _, c in bow), dtype=np.float64, count=len(bow))
+        theta = self.infer(np.array([0, len(bow)], dtype=np.int64), ids, counts)[0]
+        return [(tid, prob) for tid, prob in enumerate(theta.tolist()) if prob >= minimum_probability]
+
+
+def load_model(path: str):
+    """
+    推理产物目录 -> InferenceArtifact；否则按 gensim 模型文件加载
+    """
+    if is_artifact_dir(path):
+        return InferenceArtifact(path)
+    if os.path.isdir(path):
+        raise ValueError(f"[ERROR] {path} 是目录但不是推理产物（缺少 expElogbeta.npy / meta.json），"
+                         f"二进制语料目录应作为输入传入，而不是模型")
+    from gensim.models import LdaModel
+    return LdaModel.load(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出只读推理产物（float32 expElogbeta / alpha / 词表哈希表，mmap 加载）")
+    parser.add_argument("--model", required=True, help="已训练好的 lda.model")
+    parser.add_argument("--vocab", default=None, help="vocab_tfidf.json（默认用模型自带的 id2word）")
+    parser.add_argument("--out_dir", required=True, help="推理产物目录")
+    parser.add_argument("--check_docs", default=None,
+                        help="可选：freq_tfidf.json 或二进制语料目录，导出后与 gensim 推理结果对比")
+    args = parser.parse_args()
+
+    from gensim.models import LdaModel
+    lda_model = LdaModel.load(args.model)
+    vocab = None
+    if args.vocab:
+        with open(args.vocab, "r", encoding="utf-8") as f:
+            vocab = json.load(f)
+
+    meta = export_artifact(lda_model, args.out_dir, vocab=vocab, source=args.model)
+    size_mb = sum(
+        os.path.getsize(os.path.join(args.out_dir, name)) for name in os.listdir(args.out_dir)
+    ) / 2 ** 20
+    print(f"[OK] 推理产物 {args.out_dir}：{meta['num_topics']} 主题 x {meta['num_terms']} 词，{size_mb:.1f} MB")
+
+    start = time.perf_counter()
+    artifact = InferenceArtifact(args.out_dir)
+    print(f"[INFO] mmap 加载耗时 {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    if args.check_docs:
+        from core.corpus import CsrCorpus, is_corpus_dir
+        if is_corpus_dir(args.check_docs):
+            corpus = CsrCorpus(args.check_docs)
+        else:
+            from core.tinydb_stream import iter_json_array
+            corpus = [[(int(w), c) for w, c in doc.items()] for doc in iter_json_array(args.check_docs)]
+        ref = batch_doc_topics(lda_model, corpus)
+        theta = artifact.doc_topics(corpus)
+        diff = np.abs(theta - ref).max(axis=1) if len(ref) else np.zeros(0)
+        same_top = float(np.mean(theta.argmax(axis=1) == ref.argmax(axis=1))) if len(ref) else 1.0
+        print(f"[INFO] 对比 {len(ref)} 篇：最大概率差 {diff.max(initial=0.0):.2e}，"
+              f"中位数 {np.median(diff) if len(diff) else 0.0:.2e}，Top1 主题一致率 {same_top:.4f}")
+
+
+if __name__ == "__main__":
+    main()
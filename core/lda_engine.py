@@ -0,0 +1,171 @@
+import json
+
+import numpy as np
+
+from core.lda_artifact import load_model
+from core.lda_infer import batch_doc_topics
+from tokenier.batch_tokenizer import BatchTokenizer
+
+
+# =========================================================
+# 常驻推理引擎：模型 / 词表反向索引 / 主题标签只加载一次，之后逐条或批量推理
+#
+#   from core.lda_engine import InferenceEngine
+#   engine = InferenceEngine("lda.model", vocab_path="vocab_tfidf.json", topics_path="topics_labeled.json")
+#   engine.infer_one("一条微博")           -> [(tid, prob), ...]，按概率降序
+#   engine.infer_many(texts, workers=4)   -> 每条一个上面的列表（无有效词的文档为 []）
+#   engine.doc_topic_matrix(texts)        -> float32[n_docs, num_topics]（view / cluster 直接当特征矩阵）
+#
+# infer_one / infer_bow 逐条调用模型的 get_document_topics，结果与 infer.py 原来的逐条推理相同；
+# infer_many / doc_topic_matrix 整批分词后走 core/lda_infer.py 的矩阵化 E 步（跳过空文档，与 infer_bow 一样不抽随机数），
+# 模型随机数状态相同时与逐条推理一致，只差 float32 收敛判据带来的 ~1e-4 误差
+# =========================================================
+
+
+def load_topics(path: str) -> dict:
+    """
+    topics.json（{tid: [词, ...]}）或 data/topic_make.py 输出的 topics_labeled.json
+    （{tid: {"label": ..., "keywords": [...]}}）统一成 {tid: {"label": ..., "keywords": [...]}}
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    topics = {}
+    for tid, value in raw.items():
+        if isinstance(value, dict):
+            topics[int(tid)] = {"label": value.get("label"), "keywords": list(value.get("keywords", []))}
+        else:
+            topics[int(tid)] = {"label": None, "keywords": list(value)}
+    return topics
+
+
+class InferenceEngine:
+    """
+    model_path : gensim 模型文件，或 core/lda_artifact.py 导出的推理产物目录
+    vocab_path : vocab.json（id -> word）；推理产物自带词表哈希表，可省略；只推理 bow 时也可省略
+    topics_path: topics.json / topics_labeled.json（可选，用于 label / keywords）
+    cache      : 可选 TokenCache，重复 / 转发文本直接复用切词结果
+    """
+
+    def __init__(self, model_path: str, vocab_path: str = None, topics_path: str = None,
+                 cache=None, chunk_docs: int = 4096):
+        self.lda = load_model(model_path)
+        self.num_topics = self.lda.num_topics
+        self.chunk_docs = chunk_docs
+
+        if vocab_path:
+            with open(vocab_path, "r", encoding="utf-8") as f:
+                vocab = json.load(f)
+        else:
+            vocab = getattr(self.lda, "tokens", None)
+
+        # 词表只在这里反转一次，之后每条文本只做查表；没有词表时只能推理现成的 bow / 二进制语料
+        self.tokenizer = BatchTokenizer.for_inference(vocab, cache=cache) if vocab is not None else None
+        self.topics = load_topics(topics_path) if topics_path else {}
+
+    # ======================
+    # 主题信息
+    # ======================
+
+    def label(self, tid: int) -> str:
+        label = self.topics.get(int(tid), {}).get("label")
+        return label if label else f"Topic {tid}"
+
+    def keywords(self, tid: int, n: int = None) -> list:
+        words = self.topics.get(int(tid), {}).get("keywords", [])
+        return words[:n] if n else words
+
+    # ======================
+    # 逐条
+    # ======================
+
+    def _require_tokenizer(self):
+        if self.tokenizer is None:
+            raise ValueError("[ERROR] 文本推理需要词表：gensim 模型请传 vocab_path")
+        return self.tokenizer
+
+    def bow(self, text: str) -> list:
+        return self._require_tokenizer().bow(text)
+
+    def bows(self, texts, workers: int = 1):
+        """
+        texts -> 逐条 bow 的生成器；workers > 1 时先多进程整批分词
+        """
+        if workers <= 1:
+            return (self.bow(text) for text in texts)
+        offsets, ids, counts = self._require_tokenizer().encode_batch(texts, workers=workers)
+        ids, counts = ids.tolist(), counts.tolist()
+        return (
+            list(zip(ids[offsets[i]:offsets[i + 1]], counts[offsets[i]:offsets[i + 1]]))
+            for i in range(len(offsets) - 1)
+        )
+
+    def infer_bow(self, bow) -> list:
+        """
+        bow -> [(tid, prob), ...] 按概率降序；空 bow 返回 []
+        """
+        if not bow:
+            return []
+        doc_topics = self.lda.get_document_topics(bow, minimum_probability=0.0)
+        return sorted(((int(tid), float(prob)) for tid, prob in doc_topics), key=lambda x: x[1], reverse=True)
+
+    def infer_one(self, text: str) -> list:
+        return self.infer_bow(self.bow(text))
+
+    # ======================
+    # 批量
+    # ======================
+
+    def doc_topic_matrix(self, texts, workers: int = 1) -> np.ndarray:
+        """
+        texts -> float32[n_docs, num_topics]；无有效词的文档整行为 0
+        """
+        offsets, ids, counts = self._require_tokenizer().encode_batch(texts, workers=workers)
+        lens = np.diff(offsets)
+        theta = np.zeros((len(lens), self.num_topics), dtype=np.float32)
+        nonempty = np.flatnonzero(lens > 0)
+        if len(nonempty) == 0:
+            return theta
+
+        if len(nonempty) < len(lens):
+            # 去掉空文档再拼 CSR，空文档不参与推理
+            keep = np.repeat(lens > 0, lens)
+            offsets = np.zeros(len(nonempty) + 1, dtype=np.int64)
+            np.cumsum(lens[nonempty], out=offsets[1:])
+            ids, counts = ids[keep], counts[keep]
+
+        theta[nonempty] = batch_doc_topics(self.lda, _CsrBlocks(offsets, ids, counts), self.chunk_docs)
+        return theta
+
+    def infer_many(self, texts, workers: int = 1, minimum_probability: float = 1e-8) -> list:
+        """
+        texts -> 每条 [(tid, prob), ...] 按概率降序；概率 < minimum_probability 的主题丢弃（同 gensim）
+        """
+        theta = self.doc_topic_matrix(texts, workers=workers)
+        results = []
+        for row in theta:
+            if not row.any():
+                results.append([])
+                continue
+            order = np.argsort(-row, kind="stable")
+            results.append([(int(tid), float(row[tid])) for tid in order if row[tid] >= minimum_probability])
+        return results
+
+
+class _CsrBlocks:
+    """
+    内存中的 CSR 三元组，按 core/corpus.py CsrCorpus.iter_blocks 的接口分块，供 batch_doc_topics 使用
+    """
+
+    def __init__(self, offsets, ids, counts):
+        self.offsets = offsets
+        self.ids = ids
+        self.counts = counts
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def iter_blocks(self, block_docs: int):
+        for start in range(0, len(self), block_docs):
+            end = min(start + block_docs, len(self))
+            lo, hi = self.offsets[start], self.offsets[end]
+            yield start, self.offsets[start:end + 1] - lo, self.ids[lo:hi], self.counts[lo:hi]
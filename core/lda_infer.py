@@ -0,0 +1,139 @@
+import numpy as np
+
+
+# =========================================================
+# 批量 LDA E 步（文档 - 主题推理）
+#
+# 与 gensim LdaModel.inference 的逐篇循环等价（同样的初始化、迭代公式与收敛判据），
+# 但一次处理一整块文档：
+#   phinorm[t]  = expElogtheta[doc(t)] · expElogbeta[:, id(t)]               每个非零项
+#   gamma       = alpha + expElogtheta * (S @ expElogbeta[:, ids].T)         S[d, t] = cts[t] / phinorm[t]
+# 每篇文档 gamma 的平均变化量 < gamma_threshold 后冻结，不再更新
+# 初始 gamma 按块一次抽取，随机数序列与逐篇调用 get_document_topics 相同
+# =========================================================
+
+
+def dirichlet_expectation(alpha: np.ndarray) -> np.ndarray:
+    from scipy.special import psi
+    return (psi(alpha) - psi(alpha.sum(axis=1))[:, None]).astype(alpha.dtype, copy=False)
+
+
+def infer_gamma(
+    expElogbeta: np.ndarray,
+    alpha: np.ndarray,
+    offsets,
+    ids,
+    counts,
+    gamma: np.ndarray,
+    iterations: int = 50,
+    gamma_threshold: float = 0.001
+) -> np.ndarray:
+    """
+    offsets / ids / counts : 一块文档的 CSR 三元组（offsets 从 0 开始）
+    gamma                  : 初始值 (n_docs, num_topics)，原地更新并返回
+    """
+    from scipy.sparse import csr_matrix
+
+    dtype = expElogbeta.dtype
+    n_docs = len(offsets) - 1
+    nnz = len(ids)
+    epsilon = np.finfo(dtype).eps
+
+    offsets = np.asarray(offsets, dtype=np.int64)
+    doc_index = np.repeat(np.arange(n_docs), np.diff(offsets))
+    beta_t = np.ascontiguousarray(expElogbeta[:, np.asarray(ids)].T)      # (nnz, K)
+    cts = np.asarray(counts, dtype=dtype)
+    token_pos = np.arange(nnz)
+
+    exp_elogtheta = np.exp(dirichlet_expectation(gamma))
+    phinorm = np.einsum("tk,tk->t", exp_elogtheta[doc_index], beta_t) + epsilon
+    active = np.ones(n_docs, dtype=bool)
+
+    for _ in range(iterations):
+        if n_docs == 1:
+            # 单篇（在线推理常见）直接点乘，省掉每轮构造稀疏矩阵
+            doc_sum = ((cts / phinorm) @ beta_t)[None, :]
+        else:
+            doc_sum = csr_matrix((cts / phinorm, token_pos, offsets), shape=(n_docs, nnz)) @ beta_t
+        new_gamma = alpha + exp_elogtheta * doc_sum
+        meanchange = np.abs(new_gamma - gamma).mean(axis=1)
+
+        gamma[active] = new_gamma[active]
+        exp_elogtheta[active] = np.exp(dirichlet_expectation(new_gamma[active]))
+        phinorm = np.einsum("tk,tk->t", exp_elogtheta[doc_index], beta_t) + epsilon
+
+        active &= ~(meanchange < gamma_threshold)
+        if not active.any():
+            break
+
+    return gamma
+
+
+def iter_csr_chunks(corpus, chunk_docs: int):
+    """
+    CsrCorpus 直接按块取数组；普通 BOW 列表 / 迭代器按 chunk_docs 篇拼成 CSR 三元组
+    """
+    if hasattr(corpus, "iter_blocks"):
+        for _, offsets, ids, counts in corpus.iter_blocks(chunk_docs):
+            yield offsets, np.asarray(ids), np.asarray(counts)
+        return
+
+    def pack(chunk):
+        lens = np.fromiter((len(doc) for doc in chunk), dtype=np.int64, count=len(chunk))
+        offsets = np.zeros(len(chunk) + 1, dtype=np.int64)
+        np.cumsum(lens, out=offsets[1:])
+        ids = np.fromiter((int(w) for doc in chunk for w, _ in doc), dtype=np.int64, count=int(offsets[-1]))
+        counts = np.fromiter((c for doc in chunk for _, c in doc), dtype=np.float64, count=int(offsets[-1]))
+        return offsets, ids, counts
+
+    chunk = []
+    for doc in corpus:
+        chunk.append(doc)
+        if len(chunk) >= chunk_docs:
+            yield pack(chunk)
+            chunk = []
+    if chunk:
+        yield pack(chunk)
+
+
+def corpus_gamma(lda_model, corpus, chunk_docs: int = 4096) -> np.ndarray:
+    """
+    整个语料的变分参数 gamma[n_docs, num_topics]（未归一化，dtype 同模型）
+    可直接传给 lda_model.bound(corpus, gamma=...) 算留出集 perplexity
+    """
+    expElogbeta = lda_model.expElogbeta
+    dtype = expElogbeta.dtype
+    alpha = np.asarray(lda_model.alpha, dtype=dtype)
+
+    parts = []
+    for offsets, ids, counts in iter_csr_chunks(corpus, chunk_docs):
+        n_docs = len(offsets) - 1
+        gamma = lda_model.random_state.gamma(100., 1. / 100., (n_docs, lda_model.num_topics)).astype(dtype)
+        parts.append(infer_gamma(
+            expElogbeta, alpha, offsets, ids, counts, gamma,
+            iterations=lda_model.iterations,
+            gamma_threshold=lda_model.gamma_threshold
+        ))
+
+    if not parts:
+        return np.zeros((0, lda_model.num_topics), dtype=dtype)
+    return np.concatenate(parts)
+
+
+def batch_doc_topics(lda_model, corpus, chunk_docs: int = 4096) -> np.ndarray:
+    """
+    返回 float32[n_docs, num_topics]，每行是归一化后的 gamma（与 get_document_topics 的概率相同）
+    """
+    gamma = corpus_gamma(lda_model, corpus, chunk_docs)
+    return (gamma / gamma.sum(axis=1, keepdims=True)).astype(np.float32)
+
+
+def doc_topics_to_json(theta: np.ndarray, minimum_probability: float = 1e-8):
+    """
+    稠密数组 -> 原来的 JSON 结构 [[ [tid, prob], ... ], ...]
+    gensim get_document_topics 会丢掉概率 < 1e-8 的主题，这里保持一致
+    """
+    results = []
+    for row in theta.tolist():
+        results.append([[tid, prob] for tid, prob in enumerate(row) if prob >= minimum_probability])
+    return results
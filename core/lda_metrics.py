@@ -0,0 +1,126 @@
+import numpy as np
+
+from core.lda_infer import dirichlet_expectation, infer_gamma, iter_csr_chunks
+
+
+# =========================================================
+# LDA 模型质量指标
+#
+# perplexity : 留出文档上的变分下界，perplexity = 2 ^ (-bound / (ratio * 词数))，越低越好
+#              ratio = total_docs / 留出文档数，文档部分按比例放大到整个语料，再与 K×V 的全局项相加
+#              （与 gensim log_perplexity(heldout, total_docs) 的口径相同，E 步用 core/lda_infer.py 的批量版本）
+# u_mass     : Mimno et al. 2011 的主题一致性，在训练语料上按文档共现统计
+#              C(t) = mean_{i > j} log((D(w_i, w_j) + 1) / D(w_j))，w 按主题内概率降序；越接近 0 越好
+# =========================================================
+
+
+def corpus_bound(lda_model, corpus, chunk_docs: int = 4096, subsample_ratio: float = 1.0, random_state=None):
+    """
+    与 gensim LdaModel.bound 相同的变分下界，按块矩阵化计算
+    random_state 默认用模型自己的；训练中途评估时传独立的 RandomState，不影响训练结果
+    返回 (bound, corpus_words)
+    """
+    random_state = lda_model.random_state if random_state is None else random_state
+    from scipy.special import gammaln, logsumexp
+
+    dtype = lda_model.expElogbeta.dtype
+    alpha = np.asarray(lda_model.alpha, dtype=dtype)
+    _lambda = lda_model.state.get_lambda()
+    Elogbeta = dirichlet_expectation(_lambda)
+
+    score = 0.0
+    corpus_words = 0.0
+    for offsets, ids, counts in iter_csr_chunks(corpus, chunk_docs):
+        n_docs = len(offsets) - 1
+        gamma = random_state.gamma(100., 1. / 100., (n_docs, lda_model.num_topics)).astype(dtype)
+        gamma = infer_gamma(
+            lda_model.expElogbeta, alpha, offsets, ids, counts, gamma,
+            iterations=lda_model.iterations,
+            gamma_threshold=lda_model.gamma_threshold
+        )
+        Elogtheta = dirichlet_expectation(gamma)
+
+        # E[log p(doc | theta, beta)]
+        doc_index = np.repeat(np.arange(n_docs), np.diff(offsets))
+        ids = np.asarray(ids)
+        cts = np.asarray(counts, dtype=np.float64)
+        token_ll = logsumexp(Elogtheta[doc_index] + Elogbeta[:, ids].T, axis=1)
+        score += float(np.dot(cts, token_ll))
+        corpus_words += float(cts.sum())
+
+        # E[log p(theta | alpha) - log q(theta | gamma)]
+        score += float(np.sum((alpha - gamma) * Elogtheta))
+        score += float(np.sum(gammaln(gamma) - gammaln(alpha)))
+        score += float(np.sum(gammaln(np.sum(alpha)) - gammaln(gamma.sum(axis=1))))
+
+    score *= subsample_ratio
+
+    # E[log p(beta | eta) - log q(beta | lambda)]
+    eta = lda_model.eta
+    score += float(np.sum((eta - _lambda) * Elogbeta))
+    score += float(np.sum(gammaln(_lambda) - gammaln(eta)))
+    sum_eta = eta * lda_model.num_terms if np.ndim(eta) == 0 else np.sum(eta)
+    score += float(np.sum(gammaln(sum_eta) - gammaln(np.sum(_lambda, 1))))
+    return score, corpus_words
+
+
+def perplexity(lda_model, heldout, total_docs: int = None, chunk_docs: int = 4096) -> float:
+    """
+    total_docs : 训练语料文档数；不传时按留出集本身大小（ratio = 1，全局项不缩放，主题数越多数值越大）
+    """
+    if len(heldout) == 0:
+        return float("nan")
+    ratio = (total_docs or len(heldout)) / len(heldout)
+    bound, corpus_words = corpus_bound(lda_model, heldout, chunk_docs, subsample_ratio=ratio)
+    if corpus_words == 0:
+        return float("nan")
+    return float(np.exp2(-bound / (ratio * corpus_words)))
+
+
+def top_word_ids(lda_model, top_n: int = 10) -> np.ndarray:
+    """
+    int64[num_topics, top_n]，每个主题概率最高的 top_n 个词 id（降序）
+    """
+    topics = lda_model.get_topics()
+    top_n = min(top_n, topics.shape[1])
+    part = np.argpartition(-topics, top_n - 1, axis=1)[:, :top_n]
+    rank = np.argsort(-np.take_along_axis(topics, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, rank, axis=1)
+
+
+def umass_coherence(corpus, topic_words: np.ndarray, chunk_docs: int = 4096) -> np.ndarray:
+    """
+    topic_words : top_word_ids 的结果
+    返回 float64[num_topics]；只统计所有主题 top 词的并集，共现矩阵大小 = 并集大小 ^ 2
+    """
+    from scipy.sparse import csr_matrix
+
+    words = np.unique(topic_words)
+    lut = np.full(int(words.max()) + 1, -1, dtype=np.int64)
+    lut[words] = np.arange(len(words))
+
+    co_docs = np.zeros((len(words), len(words)), dtype=np.int64)
+    for offsets, ids, _ in iter_csr_chunks(corpus, chunk_docs):
+        ids = np.asarray(ids, dtype=np.int64)
+        in_range = ids < len(lut)
+        col = np.full(len(ids), -1, dtype=np.int64)
+        col[in_range] = lut[ids[in_range]]
+        keep = col >= 0
+        rows = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))[keep]
+        block = csr_matrix(
+            (np.ones(len(rows), dtype=np.int64), (rows, col[keep])),
+            shape=(len(offsets) - 1, len(words))
+        )
+        block.data[:] = 1
+        co_docs += (block.T @ block).toarray()
+
+    doc_freq = np.diag(co_docs)
+    local = lut[topic_words]
+    scores = np.zeros(len(topic_words), dtype=np.float64)
+    for t, ws in enumerate(local):
+        i, j = np.tril_indices(len(ws), k=-1)
+        d_j = doc_freq[ws[j]]
+        valid = d_j > 0
+        if valid.any():
+            scores[t] = np.mean(np.log((co_docs[ws[i], ws[j]][valid] + 1) / d_j[valid]))
+    return scores
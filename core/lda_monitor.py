@@ -0,0 +1,185 @@
+import json
+import os
+import resource
+import time
+import tracemalloc
+
+import numpy as np
+
+from core.lda_metrics import corpus_bound
+
+
+# =========================================================
+# LDA 训练监控（core/lda_train.run_passes 的 on_chunk 回调）
+#
+# 每个 chunk 一行 JSON（type=chunk），每个 pass 结束一行汇总（type=pass）：
+#   docs / docs_per_sec / estep_seconds / mstep_seconds / rho
+#   topic_diff        本次 M 步前后 expElogbeta 的平均绝对变化（收敛情况）
+#   perplexity        每 bound_every 个 chunk 在刚训练的 chunk 上估一次（同 gensim eval_every 的口径，
+#                     按全语料放缩）；用独立的随机数，不改变训练结果
+#   rss_mb / peak_rss_mb / traced_mb / traced_peak_mb（--trace_alloc 时才有 tracemalloc 数据）
+# 结束时写 summary：总耗时、吞吐、E / M 步耗时分位数、perplexity 轨迹、峰值内存、Python 分配热点
+# =========================================================
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_mb() -> float:
+    # Linux 下 ru_maxrss 单位是 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _round(value, digits=4):
+    return None if value is None else round(float(value), digits)
+
+
+class TrainingMonitor:
+
+    def __init__(self, metrics_path: str, n_docs: int, bound_every: int = 0, trace_alloc: bool = False, top_alloc: int = 10):
+        self.metrics_path = metrics_path
+        self.n_docs = n_docs
+        self.bound_every = bound_every
+        self.trace_alloc = trace_alloc
+        self.top_alloc = top_alloc
+
+        self.f = open(metrics_path, "w", encoding="utf-8")
+        self.rng = np.random.RandomState(0)
+        self.chunks = []
+        self.passes = []
+        self.pass_rows = []
+        self.prev_beta = None
+        self.step = 0
+        self.start_time = time.perf_counter()
+        self.last_time = self.start_time
+        if trace_alloc:
+            tracemalloc.start()
+
+    def _write(self, row: dict):
+        self.f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self.f.flush()
+
+    def __call__(self, lda_model, pass_, next_chunk, end_of_pass, info):
+        now = time.perf_counter()
+        self.step += 1
+        beta = lda_model.expElogbeta
+        topic_diff = None if self.prev_beta is None else float(np.mean(np.abs(beta - self.prev_beta)))
+        self.prev_beta = beta.copy()
+
+        perplexity = None
+        if self.bound_every > 0 and self.step % self.bound_every == 0:
+            chunk = info["chunk"]
+            ratio = self.n_docs / max(len(chunk), 1)
+            bound, words = corpus_bound(lda_model, chunk, subsample_ratio=ratio, random_state=self.rng)
+            if words > 0:
+                perplexity = float(np.exp2(-bound / (ratio * words)))
+
+        seconds = now - self.last_time
+        rss = current_rss_mb()
+        row = {
+            "type": "chunk",
+            "step": self.step,
+            "pass": pass_,
+            "chunk": next_chunk - 1,
+            "docs": info["docs"],
+            "seconds": _round(seconds),
+            "docs_per_sec": _round(info["docs"] / seconds if seconds > 0 else None, 1),
+            "estep_seconds": _round(info["estep_seconds"]),
+            "mstep_seconds": _round(info["mstep_seconds"]),
+            "rho": _round(info["rho"], 6),
+            "topic_diff": _round(topic_diff, 8),
+            "perplexity": _round(perplexity, 3),
+            "rss_mb": _round(rss, 1),
+            "peak_rss_mb": _round(max(peak_rss_mb(), rss or 0.0), 1),
+        }
+        if self.trace_alloc:
+            traced, traced_peak = tracemalloc.get_traced_memory()
+            row["traced_mb"] = _round(traced / 2 ** 20, 2)
+            row["traced_peak_mb"] = _round(traced_peak / 2 ** 20, 2)
+        self._write(row)
+        self.chunks.append(row)
+        self.pass_rows.append(row)
+
+        if end_of_pass:
+            self._end_pass(pass_)
+        # 回调自身（含 bound 估计）的耗时不计入下一个 chunk
+        self.last_time = time.perf_counter()
+
+    def _end_pass(self, pass_):
+        rows = self.pass_rows
+        seconds = sum(r["seconds"] for r in rows)
+        docs = sum(r["docs"] for r in rows)
+        perplexities = [r["perplexity"] for r in rows if r["perplexity"] is not None]
+        row = {
+            "type": "pass",
+            "pass": pass_,
+            "chunks": len(rows),
+            "docs": docs,
+            "seconds": _round(seconds),
+            "docs_per_sec": _round(docs / seconds if seconds > 0 else None, 1),
+            "estep_seconds": _round(sum(r["estep_seconds"] for r in rows)),
+            "mstep_seconds": _round(sum(r["mstep_seconds"] for r in rows)),
+            "perplexity": perplexities[-1] if perplexities else None,
+            "peak_rss_mb": _round(peak_rss_mb(), 1),
+        }
+        self._write(row)
+        self.passes.append(row)
+        self.pass_rows = []
+
+    def close(self, summary_path: str = None) -> dict:
+        self.f.close()
+        total = time.perf_counter() - self.start_time
+        estep = np.array([r["estep_seconds"] for r in self.chunks] or [0.0])
+        mstep = np.array([r["mstep_seconds"] for r in self.chunks] or [0.0])
+        docs = sum(r["docs"] for r in self.chunks)
+
+        summary = {
+            "chunks": len(self.chunks),
+            "passes": len(self.passes),
+            "docs": docs,
+            "total_seconds": _round(total),
+            "docs_per_sec": _round(docs / total if total > 0 else None, 1),
+            "estep_seconds": {"total": _round(estep.sum()), "p50": _round(np.percentile(estep, 50)),
+                              "p95": _round(np.percentile(estep, 95)), "max": _round(estep.max())},
+            "mstep_seconds": {"total": _round(mstep.sum()), "p50": _round(np.percentile(mstep, 50)),
+                              "p95": _round(np.percentile(mstep, 95)), "max": _round(mstep.max())},
+            "estep_share": _round(estep.sum() / max(estep.sum() + mstep.sum(), 1e-12), 3),
+            "perplexity": [[r["step"], r["perplexity"]] for r in self.chunks if r["perplexity"] is not None],
+            "pass_docs_per_sec": [r["docs_per_sec"] for r in self.passes],
+            "peak_rss_mb": _round(peak_rss_mb(), 1),
+        }
+
+        if self.trace_alloc:
+            _, traced_peak = tracemalloc.get_traced_memory()
+            stats = tracemalloc.take_snapshot().statistics("lineno")[:self.top_alloc]
+            tracemalloc.stop()
+            summary["traced_peak_mb"] = _round(traced_peak / 2 ** 20, 2)
+            summary["alloc_top"] = [
+                {"where": f"{s.traceback[0].filename}:{s.traceback[0].lineno}",
+                 "size_mb": _round(s.size / 2 ** 20, 3), "count": s.count}
+                for s in stats
+            ]
+
+        if summary_path:
+            with open(summary_path, "w", encoding="utf-8") as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+        return summary
+
+
+def print_summary(summary: dict):
+    print(f"[INFO] 训练 {summary['passes']} pass / {summary['chunks']} chunk / {summary['docs']} 篇次，"
+          f"{summary['total_seconds']}s，{summary['docs_per_sec']} 篇/s")
+    print(f"[INFO] E 步 {summary['estep_seconds']['total']}s（p50 {summary['estep_seconds']['p50']}s，"
+          f"p95 {summary['estep_seconds']['p95']}s），M 步 {summary['mstep_seconds']['total']}s，"
+          f"E 步占比 {summary['estep_share']}")
+    if summary["perplexity"]:
+        first, last = summary["perplexity"][0][1], summary["perplexity"][-1][1]
+        print(f"[INFO] chunk perplexity {first} -> {last}（{len(summary['perplexity'])} 次估计）")
+    print(f"[INFO] 峰值 RSS {summary['peak_rss_mb']} MB")
+    for item in summary.get("alloc_top", [])[:5]:
+        print(f"[INFO] 分配热点 {item['size_mb']:>9.3f} MB  {item['count']:>8}  {item['where']}")
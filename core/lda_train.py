@@ -0,0 +1,316 @@
+import json
+import os
+import shutil
+import time
+
+from gensim import corpora, utils
+from gensim.models.ldamodel import LdaModel, LdaState
+
+from core.corpus import CsrCorpus, cached_freq_corpus, is_corpus_dir
+
+
+# =========================================================
+# 可断点续训的 LdaModel 训练循环
+#
+# run_passes 与 gensim LdaModel.update 的单进程在线路径逐步相同
+# （update_every=1：每个 chunk 一次 E 步 + 一次 M 步，rho = (offset + pass + num_updates / chunksize) ^ -decay），
+# 区别只是可以从任意 (pass, chunk) 位置开始，并在每个 chunk 之后回调 on_chunk
+# （断点 Checkpointer / 训练监控 core/lda_monitor.TrainingMonitor，可传列表同时使用）
+#
+# 断点目录：
+#   checkpoint_dir/
+#     ckpt-000012/     lda.save() 的全部文件（模型 / state / expElogbeta / random_state 随模型 pickle）
+#                      + progress.json（下一个要训练的 pass / chunk 与训练参数）
+#     LATEST           当前有效断点的目录名（原子替换）
+# 断点先完整写进新目录，最后才替换 LATEST，中途被杀不会留下半个断点；只保留最近 keep 个
+#
+# OLDA/OLDA.py、sweep.py、windows.py、bench_lda.py 共用的语料加载 build_corpus 与训练入口 train_lda 也在这里
+# =========================================================
+
+LATEST = "LATEST"
+
+
+def iter_chunks(corpus, chunksize: int, start_chunk: int = 0):
+    """
+    从第 start_chunk 个 chunk 开始按 chunksize 分块；CsrCorpus 直接切视图跳过，不重复读前面的文档
+    """
+    start = start_chunk * chunksize
+    if hasattr(corpus, "select"):
+        corpus = corpus.select(start, len(corpus))
+    else:
+        corpus = corpus[start:]
+    return utils.grouper(corpus, chunksize, as_numpy=False)
+
+
+def run_passes(
+    lda_model,
+    corpus,
+    passes: int,
+    chunksize: int,
+    start_pass: int = 0,
+    start_chunk: int = 0,
+    on_chunk=None,
+    decay: float = None,
+    offset: float = None
+):
+    """
+    on_chunk(lda_model, pass_, next_chunk, end_of_pass, info)：每个 chunk 的 M 步之后调用，
+    info = {chunk, docs, estep_seconds, mstep_seconds, rho}
+    decay / offset 默认取模型自身的值（在线更新时传入本次的值，同 LdaModel.update）
+    """
+    lencorpus = len(corpus)
+    if lencorpus == 0:
+        return lda_model
+    if start_pass == 0 and start_chunk == 0:
+        lda_model.state.numdocs += lencorpus
+    n_chunks = (lencorpus + chunksize - 1) // chunksize
+    decay = lda_model.decay if decay is None else decay
+    offset = lda_model.offset if offset is None else offset
+    callbacks = on_chunk if isinstance(on_chunk, (list, tuple)) else [on_chunk] if on_chunk else []
+
+    for pass_ in range(start_pass, passes):
+        def rho():
+            return pow(offset + pass_ + (lda_model.num_updates / chunksize), -decay)
+
+        first = start_chunk if pass_ == start_pass else 0
+        for chunk_no, chunk in enumerate(iter_chunks(corpus, chunksize, first), start=first):
+            t0 = time.perf_counter()
+            other = LdaState(lda_model.eta, lda_model.state.sstats.shape, lda_model.dtype)
+            gammat = lda_model.do_estep(chunk, other)
+            if lda_model.optimize_alpha:
+                lda_model.update_alpha(gammat, rho())
+            t1 = time.perf_counter()
+            step_rho = rho()
+            lda_model.do_mstep(step_rho, other, pass_ > 0)
+            t2 = time.perf_counter()
+
+            info = {
+                "chunk": chunk,
+                "docs": len(chunk),
+                "estep_seconds": t1 - t0,
+                "mstep_seconds": t2 - t1,
+                "rho": step_rho,
+            }
+            for callback in callbacks:
+                callback(lda_model, pass_, chunk_no + 1, chunk_no + 1 == n_chunks, info)
+
+    return lda_model
+
+
+# ======================
+# 断点
+# ======================
+
+def save_checkpoint(checkpoint_dir: str, lda_model, progress: dict, keep: int = 2) -> str:
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    name = f"ckpt-{progress['step']:06d}"
+    path = os.path.join(checkpoint_dir, name)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.makedirs(path)
+
+    lda_model.save(os.path.join(path, "lda.model"))
+    with open(os.path.join(path, "progress.json"), "w", encoding="utf-8") as f:
+        json.dump(progress, f, ensure_ascii=False, indent=2)
+
+    tmp_path = os.path.join(checkpoint_dir, LATEST + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(checkpoint_dir, LATEST))
+
+    old = sorted(d for d in os.listdir(checkpoint_dir) if d.startswith("ckpt-") and d != name)
+    for d in old[:max(len(old) - keep + 1, 0)]:
+        shutil.rmtree(os.path.join(checkpoint_dir, d), ignore_errors=True)
+    return path
+
+
+def load_checkpoint(checkpoint_dir: str):
+    """
+    返回 (lda_model, progress)；没有可用断点时返回 (None, None)
+    """
+    latest_path = os.path.join(checkpoint_dir, LATEST)
+    if not os.path.exists(latest_path):
+        return None, None
+    with open(latest_path, "r", encoding="utf-8") as f:
+        path = os.path.join(checkpoint_dir, f.read().strip())
+    with open(os.path.join(path, "progress.json"), "r", encoding="utf-8") as f:
+        progress = json.load(f)
+    return LdaModel.load(os.path.join(path, "lda.model")), progress
+
+
+class Checkpointer:
+    """
+    run_passes 的 on_chunk 回调：每 every 个 chunk 以及每个 pass 结束时写一次断点
+    """
+
+    def __init__(self, checkpoint_dir: str, params: dict, every: int = 100, keep: int = 2, step: int = 0):
+        self.checkpoint_dir = checkpoint_dir
+        self.params = params
+        self.every = every
+        self.keep = keep
+        self.step = step
+
+    def __call__(self, lda_model, pass_, next_chunk, end_of_pass, info=None):
+        self.step += 1
+        if not end_of_pass and (self.every <= 0 or self.step % self.every != 0):
+            return
+        progress = dict(
+            self.params,
+            step=self.step,
+            pass_=pass_ + 1 if end_of_pass else pass_,
+            chunk=0 if end_of_pass else next_chunk,
+            time=time.strftime("%Y-%m-%d %H:%M:%S"),
+        )
+        save_checkpoint(self.checkpoint_dir, lda_model, progress, self.keep)
+        print(f"[INFO] 断点 step {self.step}（pass {progress['pass_']} chunk {progress['chunk']}）-> {self.checkpoint_dir}")
+
+
+# ======================
+# 语料 / 训练入口
+# ======================
+
+def build_corpus(vocab_json: str, doc_freq_json: str, corpus_cache: str = None):
+    """
+    vocab_tfidf.json : dict { "0": "考试", "1": "公务员", ... }
+    freq_tfidf.json  : list[dict] [ { "0": 2, "5": 1 }, ... ]
+                       或 core/corpus.py 的二进制语料目录（mmap，不展开到内存）
+    freq_tfidf.json 第一次使用时流式转换成 mmap 语料缓存（默认 <freq_tfidf.json>.corpus/），
+    训练时逐篇从磁盘读取，内存与文档数无关，多个 pass 直接重复读 mmap
+    """
+
+    with open(vocab_json, "r", encoding="utf-8") as f:
+        vocab_raw = json.load(f)
+
+    if isinstance(vocab_raw, list):
+        raise TypeError(
+            f"[ERROR] 你把 freq 文件当成 vocab 传进来了: {vocab_json}"
+        )
+    if not isinstance(vocab_raw, dict):
+        raise TypeError(
+            f"[ERROR] vocab_tfidf.json 必须是 dict {{id: word}}"
+        )
+
+    id2token = {int(i): w for i, w in vocab_raw.items()}
+
+    dictionary = corpora.Dictionary()
+    dictionary.id2token = id2token
+    dictionary.token2id = {w: i for i, w in id2token.items()}
+    dictionary.num_terms = len(id2token)
+
+    if is_corpus_dir(doc_freq_json):
+        return CsrCorpus(doc_freq_json), dictionary
+
+    return cached_freq_corpus(vocab_json, doc_freq_json, corpus_cache), dictionary
+
+
+def train_lda(
+    corpus,
+    dictionary,
+    num_topics=50,
+    passes=1,
+    iterations=50,
+    chunksize=256,
+    workers=1,
+    alpha="auto",
+    eta="auto",
+    checkpoint_dir=None,
+    checkpoint_every=100,
+    resume=False,
+    monitor=None
+):
+    """
+    alpha / eta 可以是 gensim 支持的字符串（auto / symmetric / asymmetric）或数值
+    checkpoint_dir 不为空时用上面的 run_passes 训练循环，每 checkpoint_every 个 chunk
+    和每个 pass 结束时写断点；resume=True 从最近断点继续，结果与不中断一次训练完相同
+    monitor（core/lda_monitor.TrainingMonitor）同样走该训练循环，逐 chunk 记录耗时 / 收敛 / 内存，不改变训练结果
+    workers > 1 时用 LdaMulticore（E 步在 workers 个进程里并行，主进程做 M 步）
+    注意：
+      - LdaMulticore 不支持 alpha="auto"，多进程模式下 auto 改用 symmetric alpha
+      - 各 worker 返回的顺序取决于调度，即使 random_state=42 结果也不保证逐次一致；
+        单进程（workers=1）仍是原来的 LdaModel，结果可复现
+    """
+    if workers > 1:
+        from gensim.models.ldamulticore import LdaMulticore
+        return LdaMulticore(
+            corpus=corpus,
+            id2word=dictionary,
+            num_topics=num_topics,
+            passes=passes,
+            iterations=iterations,
+            alpha="symmetric" if alpha == "auto" else alpha,
+            eta=eta,
+            chunksize=chunksize,
+            random_state=42,
+            eval_every=None,
+            workers=workers
+        )
+
+    if checkpoint_dir or monitor is not None:
+        return train_lda_loop(
+            corpus, dictionary, checkpoint_dir, checkpoint_every, resume, monitor,
+            num_topics=num_topics,
+            passes=passes,
+            iterations=iterations,
+            chunksize=chunksize,
+            alpha=alpha,
+            eta=eta
+        )
+
+    lda_model = LdaModel(
+        corpus=corpus,
+        id2word=dictionary,
+        num_topics=num_topics,
+        passes=passes,         
+        iterations=iterations,
+        alpha=alpha,
+        eta=eta,
+        chunksize=chunksize,
+        random_state=42,
+        eval_every=None
+    )
+    return lda_model
+
+
+def train_lda_loop(corpus, dictionary, checkpoint_dir, checkpoint_every, resume, monitor, **params):
+    """
+    断点中记录的训练参数与本次不一致时拒绝续训（passes 可以加大，接着多训几遍）
+    """
+    params["n_docs"] = len(corpus)
+    start_pass, start_chunk, step = 0, 0, 0
+    lda_model, progress = load_checkpoint(checkpoint_dir) if checkpoint_dir and resume else (None, None)
+
+    if lda_model is not None:
+        for key, value in params.items():
+            if key != "passes" and progress.get(key) != value:
+                raise ValueError(f"[ERROR] 断点参数 {key}={progress.get(key)} 与本次 {value} 不一致，无法续训")
+        start_pass, start_chunk, step = progress["pass_"], progress["chunk"], progress["step"]
+        lda_model.id2word = dictionary
+        print(f"[INFO] 从断点续训：pass {start_pass} chunk {start_chunk}（step {step}）")
+    else:
+        if resume:
+            print(f"[WARN] {checkpoint_dir} 没有可用断点，从头训练")
+        lda_model = LdaModel(
+            id2word=dictionary,
+            num_topics=params["num_topics"],
+            passes=params["passes"],
+            iterations=params["iterations"],
+            alpha=params["alpha"],
+            eta=params["eta"],
+            chunksize=params["chunksize"],
+            random_state=42,
+            eval_every=None
+        )
+
+    callbacks = [monitor] if monitor is not None else []
+    if checkpoint_dir:
+        callbacks.append(Checkpointer(checkpoint_dir, params, every=checkpoint_every, step=step))
+    return run_passes(
+        lda_model, corpus,
+        passes=params["passes"],
+        chunksize=params["chunksize"],
+        start_pass=start_pass,
+        start_chunk=start_chunk,
+        on_chunk=callbacks
+    )
@@ -0,0 +1,294 @@
+from typing import Dict, List
+
+import numpy as np
+
+
+# =========================================================
+# 向量化 TF-IDF 引擎
+# 文档 - 词矩阵统一用 CSR 三元组 (offsets, ids, counts) 表示，
+# 与 scipy.sparse.csr_matrix 的 (indptr, indices, data) 以及 core/corpus.py 的语料块一一对应
+#
+#   DF      = bincount(ids)
+#   IDF     = log((N + 1) / (DF + 1)) + 1
+#   TF-IDF  = bincount(ids, weights = count / doc_len * IDF[ids])   全语料累计
+#
+# bincount 按数组顺序逐项累加，与原来逐文档遍历 dict 的加法顺序相近但不保证相同，
+# 浮点结果可能有 1e-13 量级的差异（足以改变几乎相等的词之间的排序）
+# =========================================================
+
+
+# ======================
+# 构建矩阵
+# ======================
+
+def docs_to_arrays(docs: List[Dict[str, int]]):
+    """
+    freq.json [ {id: freq}, ... ] -> (offsets int64, ids int32, counts int32)
+    """
+    lens = np.fromiter((len(d) for d in docs), dtype=np.int64, count=len(docs))
+    offsets = np.zeros(len(docs) + 1, dtype=np.int64)
+    np.cumsum(lens, out=offsets[1:])
+    nnz = int(offsets[-1])
+    ids = np.fromiter((int(k) for d in docs for k in d), dtype=np.int32, count=nnz)
+    counts = np.fromiter((v for d in docs for v in d.values()), dtype=np.int32, count=nnz)
+    return offsets, ids, counts
+
+
+def build_matrix(offsets, ids, counts, n_terms: int = None):
+    """
+    CSR 三元组 -> scipy.sparse.csr_matrix(n_docs, n_terms)，不拷贝、不合并重复项、不重排列
+    """
+    from scipy.sparse import csr_matrix
+
+    if n_terms is None:
+        n_terms = int(np.max(ids, initial=-1)) + 1
+    return csr_matrix((counts, ids, offsets), shape=(len(offsets) - 1, n_terms), copy=False)
+
+
+def docs_to_matrix(docs: List[Dict[str, int]], n_terms: int = None):
+    return build_matrix(*docs_to_arrays(docs), n_terms=n_terms)
+
+
+def matrix_to_docs(X) -> List[Dict[str, int]]:
+    """
+    CSR 矩阵 -> freq.json 结构，每篇文档内保持原有词顺序
+    """
+    ids = X.indices.tolist()
+    counts = X.data.tolist()
+    bounds = X.indptr.tolist()
+    return [
+        {str(w): c for w, c in zip(ids[a:b], counts[a:b])}
+        for a, b in zip(bounds[:-1], bounds[1:])
+    ]
+
+
+# ======================
+# DF / IDF / TF-IDF
+# ======================
+
+def doc_lengths(offsets, counts) -> np.ndarray:
+    """
+    每篇文档的总词频（float64）；前缀和相减，空文档为 0
+    """
+    cum = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=cum[1:])
+    return (cum[offsets[1:]] - cum[offsets[:-1]]).astype(np.float64)
+
+
+def block_df(ids, n_terms: int) -> np.ndarray:
+    return np.bincount(ids, minlength=n_terms).astype(np.int64)
+
+
+def compute_idf(df: np.ndarray, doc_count: int) -> np.ndarray:
+    return np.log((doc_count + 1) / (df + 1)) + 1
+
+
+def block_tf_norm(offsets, counts) -> np.ndarray:
+    """
+    每个非零项的 count / doc_len；总词频为 0 的文档记 0
+    """
+    doc_len = doc_lengths(offsets, counts)
+    per_token_len = np.repeat(doc_len, np.diff(offsets))
+    tf_norm = np.zeros(len(counts), dtype=np.float64)
+    np.divide(counts, per_token_len, out=tf_norm, where=per_token_len > 0)
+    return tf_norm
+
+
+def block_tfidf(offsets, ids, counts, idf: np.ndarray) -> np.ndarray:
+    """
+    一个文档块对全语料 TF-IDF 的贡献；总词频为 0 的文档不参与
+    """
+    weights = block_tf_norm(offsets, counts) * idf[ids]
+    return np.bincount(ids, weights=weights, minlength=len(idf))
+
+
+def block_tf_sum(offsets, ids, counts, n_terms: int) -> np.ndarray:
+    """
+    每个词 count / doc_len 的块内累计；IDF 只与词有关，全语料 TF-IDF = IDF * 各块之和，
+    分片时先累计这个量，DF 汇总之后再乘 IDF
+    """
+    return np.bincount(ids, weights=block_tf_norm(offsets, counts), minlength=n_terms)
+
+
+SCORE_DIGITS = 10
+
+
+def round_scores(tfidf: np.ndarray, digits: int = SCORE_DIGITS) -> np.ndarray:
+    """
+    全语料 TF-IDF 保留 digits 位有效数字，之后的阈值过滤与排序都用取整后的分数
+    整块 / 分块 / 分片 / 增量统计的加法顺序不同，浮点误差约 1e-13，足以让几乎相等的词换位；
+    取整后这些词变成并列，再按 first_seen 排，各路径的选词顺序一致
+    （只有恰好跨过取整边界的分数仍可能不同，概率约 1e-13 / 10^-digits）
+    """
+    out = np.zeros_like(tfidf, dtype=np.float64)
+    nz = tfidf > 0
+    scale = 10.0 ** (digits - 1 - np.floor(np.log10(tfidf[nz])))
+    out[nz] = np.round(tfidf[nz] * scale) / scale
+    return out
+
+
+def first_seen(ids, n_terms: int) -> np.ndarray:
+    """
+    每个词第一次出现的位置（未出现为 nnz），用作排序时的稳定次序，
+    等价于 dict 实现中按插入顺序排序
+    """
+    pos = np.full(n_terms, len(ids), dtype=np.int64)
+    np.minimum.at(pos, ids, np.arange(len(ids), dtype=np.int64))
+    return pos
+
+
+def term_stats(X):
+    """
+    返回 (df, idf, tfidf, order)，均为长度 n_terms 的数组
+    """
+    offsets, ids, counts = X.indptr, X.indices, X.data
+    n_terms = X.shape[1]
+    df = block_df(ids, n_terms)
+    idf = compute_idf(df, X.shape[0])
+    tfidf = round_scores(block_tfidf(offsets, ids, counts, idf))
+    return df, idf, tfidf, first_seen(ids, n_terms)
+
+
+# ======================
+# 选词 + 重编号
+# ======================
+
+def candidate_mask(df, tfidf, doc_count, min_df, max_df_ratio, min_tfidf) -> np.ndarray:
+    return (
+        (df > 0)
+        & (df >= min_df)
+        & (df <= doc_count * max_df_ratio)
+        & (tfidf >= min_tfidf)
+    )
+
+
+def top_k(candidates: np.ndarray, tfidf: np.ndarray, k: int, order: np.ndarray = None) -> np.ndarray:
+    """
+    候选中 TF-IDF 最高的 k 个，降序（并列按 order 升序）
+    先 argpartition 找第 k 大的分数，只对入选的 k 个排序，O(n + k log k)
+    """
+    tie = order if order is not None else np.arange(len(tfidf))
+    if len(candidates) > k:
+        scores = tfidf[candidates]
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        above = candidates[scores > kth]
+        at = candidates[scores == kth]
+        at = at[np.argsort(tie[at], kind="stable")][:k - len(above)]
+        candidates = np.concatenate([above, at])
+    return candidates[np.lexsort((tie[candidates], -tfidf[candidates]))]
+
+
+def select_terms(
+    df: np.ndarray,
+    tfidf: np.ndarray,
+    doc_count: int,
+    min_df: int,
+    max_df_ratio: float,
+    min_tfidf: float,
+    target_max: int,
+    order: np.ndarray = None
+) -> np.ndarray:
+    """
+    规则过滤后按 TF-IDF 降序（并列按 order 升序）取前 target_max 个，返回旧 id 数组
+    """
+    mask = candidate_mask(df, tfidf, doc_count, min_df, max_df_ratio, min_tfidf)
+    candidates = np.flatnonzero(mask)
+    print(f"[INFO] 规则过滤后词数: {len(candidates)}")
+    return top_k(candidates, tfidf, target_max, order)
+
+
+def search_thresholds(
+    df: np.ndarray,
+    tfidf: np.ndarray,
+    doc_count: int,
+    min_df: int,
+    max_df_ratio: float,
+    min_tfidf: float,
+    target_min: int
+):
+    """
+    在已算好的 DF / TF-IDF 数组上放宽阈值，直到规则过滤后至少剩 target_min 个词
+    （超过 target_max 的部分由 top_k 截断，不需要收紧）
+    放宽顺序：min_tfidf -> min_df -> max_df_ratio，每一步只放宽到刚好够用
+    返回 (min_df, max_df_ratio, min_tfidf)
+    """
+    def df_ok(md, ratio):
+        return (df > 0) & (df >= md) & (df <= doc_count * ratio)
+
+    def tfidf_cut(md, ratio):
+        # 满足 DF 条件的词里第 target_min 大的 TF-IDF；不足 target_min 个返回 None
+        scores = tfidf[df_ok(md, ratio)]
+        if len(scores) < target_min:
+            return None
+        return min(min_tfidf, float(np.partition(scores, len(scores) - target_min)[len(scores) - target_min]))
+
+    if int(candidate_mask(df, tfidf, doc_count, min_df, max_df_ratio, min_tfidf).sum()) >= target_min:
+        return min_df, max_df_ratio, min_tfidf
+
+    # 1. 只降 min_tfidf
+    cut = tfidf_cut(min_df, max_df_ratio)
+    if cut is not None:
+        return min_df, max_df_ratio, cut
+
+    # 2. 降 min_df：满足 DF 条件的词数随 min_df 单调，二分找最大的可行值
+    if df_ok(1, max_df_ratio).sum() >= target_min:
+        lo, hi = 1, min_df
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if df_ok(mid, max_df_ratio).sum() >= target_min:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo, max_df_ratio, tfidf_cut(lo, max_df_ratio)
+
+    # 3. 再放宽 max_df_ratio：候选值只需要取语料中实际出现的 DF，同样二分
+    #    （nextafter 防止 ratio * doc_count 的舍入把 DF 恰好等于边界的词排除掉）
+    ratios = np.nextafter(np.unique(df[df > doc_count * max_df_ratio]) / max(doc_count, 1), np.inf)
+    if len(ratios) and df_ok(1, ratios[-1]).sum() >= target_min:
+        lo, hi = 0, len(ratios) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if df_ok(1, ratios[mid]).sum() >= target_min:
+                hi = mid
+            else:
+                lo = mid + 1
+        return 1, float(ratios[lo]), tfidf_cut(1, ratios[lo])
+
+    # 全部放开也不够：词表本身就小于 target_min
+    return 1, 1.0, float(min(min_tfidf, tfidf[df > 0].min(initial=0.0)))
+
+
+def build_lut(ordered_old_ids, n_terms: int) -> np.ndarray:
+    """
+    old_id -> new_id 查表数组，词表外为 -1
+    """
+    old_ids = np.asarray(ordered_old_ids, dtype=np.int64)
+    lut = np.full(max(n_terms, int(old_ids.max(initial=-1)) + 1), -1, dtype=np.int32)
+    lut[old_ids] = np.arange(len(old_ids), dtype=np.int32)
+    return lut
+
+
+def remap_block(offsets, ids, counts, lut: np.ndarray):
+    """
+    查表重编号，去掉词表外的词与变空的文档
+    返回 (new_offsets, new_ids, new_counts, non_empty)，non_empty 为保留文档的布尔掩码
+    """
+    n = len(offsets) - 1
+    doc_index = np.repeat(np.arange(n), np.diff(offsets))
+    new_ids = lut[ids]
+    keep = new_ids >= 0
+
+    kept_per_doc = np.bincount(doc_index[keep], minlength=n)
+    non_empty = kept_per_doc > 0
+    new_offsets = np.zeros(int(non_empty.sum()) + 1, dtype=np.int64)
+    np.cumsum(kept_per_doc[non_empty], out=new_offsets[1:])
+    return new_offsets, new_ids[keep], np.asarray(counts)[keep], non_empty
+
+
+def remap_matrix(X, ordered_old_ids):
+    """
+    返回 (新矩阵, 保留文档的布尔掩码)
+    """
+    lut = build_lut(ordered_old_ids, X.shape[1])
+    new_offsets, new_ids, new_counts, non_empty = remap_block(X.indptr, X.indices, X.data, lut)
+    return build_matrix(new_offsets, new_ids, new_counts, n_terms=len(ordered_old_ids)), non_empty
@@ -0,0 +1,151 @@
+import os
+import shutil
+from multiprocessing import Pool
+
+import numpy as np
+
+from core import tfidf as tfidf_engine
+from core.corpus import CsrCorpus, CorpusWriter
+
+
+# =========================================================
+# 分片 map-reduce TF-IDF（语料大于内存时使用）
+#
+# 输入是 core/corpus.py 的二进制语料，按文档区间切成分片，
+# 每个 worker 自己 mmap 打开语料，只把自己那一段读进内存：
+#
+#   map     分片 -> (DF, sum(count / doc_len), 首次出现位置)   长度 n_terms 的部分累加量
+#   reduce  主进程按分片顺序逐个累加，IDF 由全局 DF 得出，TF-IDF = IDF * 累加和
+#   rewrite 第二遍扫描：worker 各自查表重编号、写出分片语料，主进程按顺序拼接
+#
+# 内存上限 ≈ workers * 分片大小 + 几个 n_terms 长度的数组；
+# 结果按分片顺序累加，与 worker 数无关
+# =========================================================
+
+
+def shard_ranges(n_docs: int, shard_docs: int):
+    return [(start, min(start + shard_docs, n_docs)) for start in range(0, n_docs, shard_docs)]
+
+
+def _load_shard(corpus: CsrCorpus, start: int, end: int):
+    lo, hi = int(corpus.offsets[start]), int(corpus.offsets[end])
+    offsets = np.asarray(corpus.offsets[start:end + 1]) - lo
+    return lo, offsets, np.asarray(corpus.ids[lo:hi]), np.asarray(corpus.counts[lo:hi])
+
+
+def _run(fn, tasks, workers: int, initializer=None, initargs=()):
+    """
+    按任务顺序产出结果；workers <= 1 时在主进程里直接跑
+    """
+    if workers <= 1:
+        if initializer:
+            initializer(*initargs)
+        yield from map(fn, tasks)
+        return
+    with Pool(workers, initializer=initializer, initargs=initargs) as pool:
+        yield from pool.imap(fn, tasks)
+
+
+# ======================
+# map / reduce
+# ======================
+
+def map_shard(task):
+    corpus_dir, start, end = task
+    corpus = CsrCorpus(corpus_dir)
+    n_terms = corpus.num_terms
+    lo, offsets, ids, counts = _load_shard(corpus, start, end)
+
+    df = tfidf_engine.block_df(ids, n_terms)
+    tf_sum = tfidf_engine.block_tf_sum(offsets, ids, counts, n_terms)
+    order = tfidf_engine.first_seen(ids, n_terms) + lo
+    order[df == 0] = len(corpus.ids)   # 本分片没出现的词用全局哨兵，避免 min 时抢占
+    return df, tf_sum, order
+
+
+def sharded_stats(corpus_dir: str, shard_docs: int, workers: int = 1):
+    """
+    返回 (df, tfidf, order)，与 vocab/TF-IDF.py 的 compute_stats 结构相同
+    """
+    corpus = CsrCorpus(corpus_dir)
+    n_terms = corpus.num_terms
+    tasks = [(corpus_dir, start, end) for start, end in shard_ranges(corpus.n_docs, shard_docs)]
+    print(f"[INFO] 分片统计：{len(tasks)} 个分片，每片 {shard_docs} 篇，{workers} 个进程")
+
+    df = np.zeros(n_terms, dtype=np.int64)
+    tf_sum = np.zeros(n_terms, dtype=np.float64)
+    order = np.full(n_terms, len(corpus.ids), dtype=np.int64)
+
+    for part_df, part_tf_sum, part_order in _run(map_shard, tasks, workers):
+        df += part_df
+        tf_sum += part_tf_sum
+        np.minimum(order, part_order, out=order)
+
+    idf = tfidf_engine.compute_idf(df, corpus.n_docs)
+    return df, tfidf_engine.round_scores(tf_sum * idf), order
+
+
+# ======================
+# 第二遍：重编号写出
+# ======================
+
+_lut = None
+
+
+def _init_rewrite(lut: np.ndarray):
+    global _lut
+    _lut = lut
+
+
+def rewrite_shard(task):
+    corpus_dir, start, end, part_dir, vocab_size = task
+    corpus = CsrCorpus(corpus_dir)
+    _, offsets, ids, counts = _load_shard(corpus, start, end)
+
+    new_offsets, new_ids, new_counts, non_empty = tfidf_engine.remap_block(offsets, ids, counts, _lut)
+    with CorpusWriter(part_dir, vocab_size=vocab_size, id_width=corpus.meta["id_width"]) as writer:
+        writer.add_block(
+            new_offsets,
+            new_ids,
+            new_counts,
+            np.asarray(corpus.times[start:end])[non_empty],
+            np.asarray(corpus.weibo_ids[start:end])[non_empty],
+        )
+    return part_dir
+
+
+def sharded_rewrite(
+    corpus_dir: str,
+    ordered_old_ids,
+    out_dir: str,
+    shard_docs: int,
+    workers: int = 1
+) -> dict:
+    """
+    old_id -> new_id 重编号后写出新语料，返回 meta
+    """
+    corpus = CsrCorpus(corpus_dir)
+    lut = tfidf_engine.build_lut(ordered_old_ids, corpus.num_terms)
+    vocab_size = len(ordered_old_ids)
+
+    parts_dir = out_dir.rstrip("/") + ".parts"
+    tasks = [
+        (corpus_dir, start, end, os.path.join(parts_dir, f"part_{i:05d}"), vocab_size)
+        for i, (start, end) in enumerate(shard_ranges(corpus.n_docs, shard_docs))
+    ]
+
+    with CorpusWriter(out_dir, vocab_size=vocab_size, id_width=corpus.meta["id_width"]) as writer:
+        for part_dir in _run(rewrite_shard, tasks, workers, _init_rewrite, (lut,)):
+            part = CsrCorpus(part_dir)
+            for start, offsets, ids, counts in part.iter_blocks():
+                n = len(offsets) - 1
+                writer.add_block(
+                    offsets, ids, counts,
+                    part.times[start:start + n],
+                    part.weibo_ids[start:start + n],
+                )
+            del part
+            shutil.rmtree(part_dir)
+
+    shutil.rmtree(parts_dir, ignore_errors=True)
+    return writer.meta
@@ -0,0 +1,193 @@
+import json
+from typing import Iterator, Tuple
+
+
+# =========================================================
+# TinyDB JSON 流式读取
+# TinyDB 文件结构：{"_default": {"1": {...}, "2": {...}}, ...}
+# 逐条解析记录，缓冲区只保留当前记录，内存与文件大小无关
+# =========================================================
+
+class _StreamReader:
+
+    WHITESPACE = " \t\r\n"
+
+    def __init__(self, f, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+
+    def skip_ws(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in self.WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or self.eof:
+                return
+            self.fill()
+
+    def peek(self) -> str:
+        self.skip_ws()
+        if self.pos >= len(self.buf):
+            raise ValueError("[ERROR] TinyDB 文件意外结束")
+        return self.buf[self.pos]
+
+    def expect(self, ch: str):
+        if self.peek() != ch:
+            raise ValueError(f"[ERROR] TinyDB 文件格式错误：期望 {ch!r}，实际 {self.buf[self.pos]!r}")
+        self.pos += 1
+
+    def decode(self):
+        self.skip_ws()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self.fill()
+                continue
+            # 数字恰好落在缓冲区末尾时可能被截断，多读一块再解析
+            if end == len(self.buf) and not self.eof:
+                self.fill()
+                continue
+            self.pos = end
+            return obj
+
+    def iter_members(self):
+        """
+        当前位置是一个对象：逐个产出 (key, value)
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.decode()
+            self.expect(":")
+            value = self.decode()
+            yield key, value
+            ch = self.peek()
+            self.pos += 1
+            if ch == "}":
+                return
+            if ch != ",":
+                raise ValueError(f"[ERROR] TinyDB 文件格式错误：意外字符 {ch!r}")
+
+    def iter_keys_lazy(self):
+        """
+        顶层对象：只产出 key，value 由调用方决定是流式读取还是整体跳过
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.decode()
+            self.expect(":")
+            yield key
+            ch = self.peek()
+            self.pos += 1
+            if ch == "}":
+                return
+            if ch != ",":
+                raise ValueError(f"[ERROR] TinyDB 文件格式错误：意外字符 {ch!r}")
+
+
+def iter_tinydb_records(
+    path: str,
+    table: str = "_default",
+    chunk_size: int = 1 << 16
+) -> Iterator[Tuple[str, dict]]:
+    """
+    逐条产出 (doc_id, record)，顺序与文件中一致
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        reader = _StreamReader(f, chunk_size)
+        for key in reader.iter_keys_lazy():
+            if key == table:
+                yield from reader.iter_members()
+            else:
+                reader.decode()   # 其他表整体跳过
+
+
+def iter_json_array(path: str, chunk_size: int = 1 << 16) -> Iterator:
+    """
+    顶层是数组的 JSON 文件（freq.json 等）：逐个产出元素
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        reader = _StreamReader(f, chunk_size)
+        reader.expect("[")
+        if reader.peek() == "]":
+            return
+        while True:
+            yield reader.decode()
+            ch = reader.peek()
+            reader.pos += 1
+            if ch == "]":
+                return
+            if ch != ",":
+                raise ValueError(f"[ERROR] JSON 数组格式错误：意外字符 {ch!r}")
+
+
+# =========================================================
+# 流式 JSON 写出：与 json.dump(..., ensure_ascii=False, indent=2) 输出逐字节一致
+# =========================================================
+
+class JsonArrayWriter:
+
+    def __init__(self, f, indent: int = 2):
+        self.f = f
+        self.indent = indent
+        self.count = 0
+
+    def write(self, item):
+        text = json.dumps(item, ensure_ascii=False, indent=self.indent)
+        if self.indent:
+            pad = " " * self.indent
+            text = pad + text.replace("\n", "\n" + pad)
+        self.f.write(("[\n" if self.count == 0 else ",\n") if self.indent else ("[" if self.count == 0 else ", "))
+        self.f.write(text)
+        self.count += 1
+
+    def close(self):
+        if self.count == 0:
+            self.f.write("[]")
+        else:
+            self.f.write("\n]" if self.indent else "]")
+
+
+class JsonObjectWriter:
+
+    def __init__(self, f, indent: int = 2):
+        self.f = f
+        self.indent = indent
+        self.count = 0
+
+    def write(self, key: str, value):
+        text = json.dumps(value, ensure_ascii=False, indent=self.indent)
+        key_text = json.dumps(key, ensure_ascii=False)
+        if self.indent:
+            pad = " " * self.indent
+            text = text.replace("\n", "\n" + pad)
+            self.f.write("{\n" if self.count == 0 else ",\n")
+            self.f.write(f"{pad}{key_text}: {text}")
+        else:
+            self.f.write("{" if self.count == 0 else ", ")
+            self.f.write(f"{key_text}: {text}")
+        self.count += 1
+
+    def close(self):
+        if self.count == 0:
+            self.f.write("{}")
+        else:
+            self.f.write("\n}" if self.indent else "}")
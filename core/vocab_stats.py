@@ -0,0 +1,274 @@
+import json
+import os
+import time
+from typing import Dict
+
+import numpy as np
+
+from core import tfidf as tfidf_engine
+
+
+# =========================================================
+# 增量 DF / TF-IDF 统计 + 词表版本
+#
+# 统计量全部在"原始 id"空间（data/process_1/vocab.json 的 id，即 TinyDB 词表 id，只增不改）：
+#   DF[w]      出现过 w 的文档数
+#   TF_SUM[w]  sum(count / doc_len)；IDF 只与词有关，TF-IDF = IDF(当前 DF, 当前文档数) * TF_SUM
+# 新增一批文档只需把这一批的 DF / TF_SUM 加上去，不用回头扫全量语料
+#
+# 词表版本：第 N 版是第 N-1 版的前缀，已有词的新 id 永远不变，只在末尾追加，
+# 旧模型 / 推理缓存里的 id 在新版本下仍然有效
+#
+# store_dir/
+#   meta.json            文档数 / 非零项数 / 当前版本 / 版本与导入历史
+#   df.npy               int64[n_terms]
+#   tf_sum.npy           float64[n_terms]
+#   first_seen.npy       int64[n_terms]   首次出现的全局位置（TF-IDF 并列时的排序依据）
+#   selected.npy         int64[vocab_size] 当前版本 new_id -> 原始 id
+#   weibo_ids.txt        已计入统计量的 微博id（每行一个），防止同一文档被重复累加；
+#                        vocab/json_structure.py --exclude_store 据此只导出新增文档
+#   vocab_v0001.json ... 各版本词表 {new_id: word}
+# =========================================================
+
+STORE_FORMAT = 1
+COUNTED_IDS = "weibo_ids.txt"
+
+
+def _save_array(path: str, arr: np.ndarray):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, arr)
+    os.replace(tmp_path, path)
+
+
+def _save_json(path: str, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_counted_ids(store_dir: str) -> set:
+    """
+    统计库中已计入的 微博id；统计库不存在时为空集合
+    """
+    path = os.path.join(store_dir, COUNTED_IDS)
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return set(line.rstrip("\n") for line in f if line.strip())
+
+
+def _source_stat(source: str):
+    # 语料目录以 meta.json 为准
+    if os.path.isdir(source):
+        source = os.path.join(source, "meta.json")
+    return os.stat(source)
+
+
+def _id_strings(weibo_ids):
+    return [w.decode("utf-8") if isinstance(w, bytes) else str(w) for w in weibo_ids]
+
+
+class StatsStore:
+
+    ARRAYS = ("df", "tf_sum", "first_seen", "selected")
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        self.meta = {
+            "format": STORE_FORMAT,
+            "doc_count": 0,
+            "nnz": 0,
+            "version": 0,
+            "versions": [],
+            "ingested": [],
+            "untracked_docs": 0,
+        }
+        self.df = np.zeros(0, dtype=np.int64)
+        self.tf_sum = np.zeros(0, dtype=np.float64)
+        self.first_seen = np.zeros(0, dtype=np.int64)
+        self.selected = np.zeros(0, dtype=np.int64)
+        self.counted_ids = set()
+        self.load()
+
+    # ======================
+    # 持久化
+    # ======================
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.store_dir, name)
+
+    def load(self):
+        meta_path = self._path("meta.json")
+        if not os.path.exists(meta_path):
+            return
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != STORE_FORMAT:
+            raise ValueError(f"[ERROR] 不支持的统计库格式: {meta.get('format')}")
+        # 旧版统计库没有登记 微博id，已有文档全部视为无法核对
+        meta.setdefault("untracked_docs", meta["doc_count"])
+        self.meta = meta
+        for name in self.ARRAYS:
+            setattr(self, name, np.load(self._path(f"{name}.npy")))
+        self.counted_ids = load_counted_ids(self.store_dir)
+
+    def save(self):
+        """
+        每个文件单独原子替换，meta.json 最后写
+        """
+        os.makedirs(self.store_dir, exist_ok=True)
+        for name in self.ARRAYS:
+            _save_array(self._path(f"{name}.npy"), getattr(self, name))
+        tmp_path = self._path(COUNTED_IDS + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for weibo_id in sorted(self.counted_ids):
+                f.write(weibo_id + "\n")
+        os.replace(tmp_path, self._path(COUNTED_IDS))
+        _save_json(self._path("meta.json"), self.meta)
+
+    # ======================
+    # 统计量
+    # ======================
+
+    @property
+    def doc_count(self) -> int:
+        return self.meta["doc_count"]
+
+    @property
+    def version(self) -> int:
+        return self.meta["version"]
+
+    @property
+    def n_terms(self) -> int:
+        return len(self.df)
+
+    def _grow(self, n_terms: int):
+        extra = n_terms - len(self.df)
+        if extra <= 0:
+            return
+        self.df = np.concatenate([self.df, np.zeros(extra, dtype=np.int64)])
+        self.tf_sum = np.concatenate([self.tf_sum, np.zeros(extra, dtype=np.float64)])
+        self.first_seen = np.concatenate([self.first_seen, np.full(extra, -1, dtype=np.int64)])
+
+    def add_block(self, offsets, ids, counts, weibo_ids=None):
+        """
+        累加一个文档块（原始 id 空间的 CSR 三元组）
+        weibo_ids：可选，本块各文档的 微博id（bytes / str），登记为已计入；没有 id 的文档记为 untracked
+        """
+        ids = np.asarray(ids)
+        self._grow(int(np.max(ids, initial=-1)) + 1)
+        n_terms = self.n_terms
+
+        block_df = tfidf_engine.block_df(ids, n_terms)
+        self.df += block_df
+        self.tf_sum += tfidf_engine.block_tf_sum(offsets, ids, counts, n_terms)
+
+        new = (self.first_seen < 0) & (block_df > 0)
+        self.first_seen[new] = tfidf_engine.first_seen(ids, n_terms)[new] + self.meta["nnz"]
+
+        self.meta["doc_count"] += len(offsets) - 1
+        self.meta["nnz"] += len(ids)
+
+        keys = _id_strings(weibo_ids) if weibo_ids is not None else []
+        self.counted_ids.update(k for k in keys if k)
+        self.meta["untracked_docs"] += len(offsets) - 1 - sum(1 for k in keys if k)
+
+    def overlap(self, weibo_ids) -> int:
+        """
+        weibo_ids 中已经计入统计量的个数（空 id 不计）
+        """
+        return sum(1 for k in _id_strings(weibo_ids) if k and k in self.counted_ids)
+
+    def record_ingest(self, source: str, n_docs: int):
+        st = _source_stat(source)
+        self.meta["ingested"].append({
+            "source": os.path.abspath(source),
+            "size": st.st_size,
+            "mtime": st.st_mtime,
+            "n_docs": n_docs,
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        })
+
+    def already_ingested(self, source: str) -> bool:
+        st = _source_stat(source)
+        path = os.path.abspath(source)
+        return any(
+            rec["source"] == path and rec["size"] == st.st_size and rec["mtime"] == st.st_mtime
+            for rec in self.meta["ingested"]
+        )
+
+    def tfidf(self):
+        """
+        返回 (df, tfidf, order)，可直接交给 core.tfidf 的选词函数
+        """
+        idf = tfidf_engine.compute_idf(self.df, self.doc_count)
+        order = np.where(self.first_seen < 0, self.meta["nnz"], self.first_seen)
+        return self.df, tfidf_engine.round_scores(self.tf_sum * idf), order
+
+    # ======================
+    # 词表版本
+    # ======================
+
+    def extend_vocab(
+        self,
+        raw_vocab: Dict[str, str],
+        min_df: int,
+        max_df_ratio: float,
+        min_tfidf: float,
+        target_max: int,
+        max_new: int = None
+    ) -> int:
+        """
+        按当前统计量选出达到阈值、且还不在词表里的词，按 TF-IDF 降序追加到末尾
+        词表总量不超过 target_max（已有词不删除）；有新增时版本号 +1，返回新增词数
+        """
+        df, tfidf, order = self.tfidf()
+        mask = tfidf_engine.candidate_mask(df, tfidf, self.doc_count, min_df, max_df_ratio, min_tfidf)
+        mask[self.selected] = False
+        candidates = np.flatnonzero(mask)
+        in_vocab = np.fromiter(
+            (str(w) in raw_vocab for w in candidates.tolist()), dtype=bool, count=len(candidates)
+        )
+        candidates = candidates[in_vocab]
+
+        budget = max(target_max - len(self.selected), 0)
+        if max_new is not None:
+            budget = min(budget, max_new)
+        added = tfidf_engine.top_k(candidates, tfidf, budget, order)
+
+        if len(added) == 0 and self.version > 0:
+            return 0
+
+        # 已有词沿用上一版的词形，只给新增词查 raw_vocab
+        vocab = self.load_vocab() if self.version > 0 else {}
+        for new_id, raw_id in enumerate(added.tolist(), start=len(self.selected)):
+            vocab[str(new_id)] = raw_vocab[str(raw_id)]
+
+        self.selected = np.concatenate([self.selected, added.astype(np.int64)])
+        self.meta["version"] += 1
+        self.meta["versions"].append({
+            "version": self.version,
+            "size": int(len(self.selected)),
+            "added": int(len(added)),
+            "doc_count": self.doc_count,
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        })
+        os.makedirs(self.store_dir, exist_ok=True)
+        _save_json(self._path(f"vocab_v{self.version:04d}.json"), vocab)
+        return int(len(added))
+
+    def load_vocab(self, version: int = None) -> Dict[str, str]:
+        """
+        第 version 版词表 {new_id: word}，默认当前版本
+        """
+        version = version or self.version
+        with open(self._path(f"vocab_v{version:04d}.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def lut(self) -> np.ndarray:
+        """
+        原始 id -> 当前版本 new_id（不在词表内为 -1）
+        """
+        return tfidf_engine.build_lut(self.selected, self.n_terms)
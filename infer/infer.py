@@ -1,16 +1,25 @@
 import argparse
 import json
 import csv
-from collections import Counter
-from gensim.models import LdaModel
-import jieba
+import os
+import sys
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tokenier.token_cache import TokenCache
+from tokenier.batch_tokenizer import BatchTokenizer
+from core.lda_engine import InferenceEngine
 
 
 # =========================================================
-# jieba 缓存目录（避免 /tmp 写权限问题）
+# gensim / jieba 都按需加载：jieba 词典走 core/jieba_init.py 的预构建缓存
+# （目录见 core/config.py JIEBA_CACHE_DIR，可用环境变量覆盖）
 # =========================================================
-jieba.dt.tmp_dir = "/home/liuyuan/.jieba_cache"
+def load_lda(path):
+    """
+    gensim 模型文件，或 core/lda_artifact.py 导出的只读推理产物目录（mmap，毫秒级加载）
+    """
+    from core.lda_artifact import load_model
+    return load_model(path)
 
 
 # =========================================================
@@ -37,25 +46,28 @@ def load_csv(path, text_column="微博正文"):
 # =========================================================
 # 文本 -> gensim LDA bow
 # =========================================================
-def text_to_bow(text, vocab, lowercase=True):
+_bow_tokenizer = None   # (vocab, 词表大小, lowercase, cache, BatchTokenizer)：只保留最近一个词表的分词器
+
+
+def text_to_bow(text, vocab, lowercase=True, cache=None):
     """
     text -> [(token_id, freq), ...]
-    vocab: {"0": "中国", "1": "视频", ...}
+    vocab: {"0": "中国", "1": "视频", ...}；也可以直接传 InferenceEngine / BatchTokenizer（有 bow 方法）
+    cache: 可选 TokenCache，重复 / 转发文本直接复用切词结果
+    同一个 vocab 对象连续调用时复用上次构造的 BatchTokenizer（持有 vocab 引用，不会因 id 复用拿到别的词表）；
+    词表按只读处理，修改后请传新的 dict。批量推理请用 core/lda_engine.py InferenceEngine
     """
-    words = jieba.lcut(text)
-
-    if lowercase:
-        words = [w.lower() for w in words]
+    if hasattr(vocab, "bow"):
+        return vocab.bow(text)
 
-    # vocab: id -> word  ==>  word -> id
-    word2id = {w: int(i) for i, w in vocab.items()}
-
-    bow_counter = Counter()
-    for w in words:
-        if w in word2id:
-            bow_counter[word2id[w]] += 1
-
-    return list(bow_counter.items())
+    global _bow_tokenizer
+    cached = _bow_tokenizer
+    if (cached is None or cached[0] is not vocab or cached[1] != len(vocab)
+            or cached[2] != lowercase or cached[3] is not cache):
+        tokenizer = BatchTokenizer.for_inference(vocab, cache=cache)
+        tokenizer.lowercase = lowercase
+        cached = _bow_tokenizer = (vocab, len(vocab), lowercase, cache, tokenizer)
+    return cached[4].bow(text)
 
 
 # =========================================================
@@ -67,54 +79,61 @@ def infer_texts(
     vocab_path,
     topics_json_path=None,
     top_k=5,
+    cache=None,
+    workers=1,
 ):
+    print("[INFO] Loading LDA model and vocab...")
+    engine = InferenceEngine(lda_model_path, vocab_path=vocab_path, topics_path=topics_json_path, cache=cache)
+
+    bows = engine.bows(texts, workers=workers)
+    return infer_bows(bows, engine, top_k=top_k)
+
+
+def infer_corpus(
+    corpus_dir,
+    lda_model_path,
+    topics_json_path=None,
+    top_k=5,
+):
+    """
+    已分词、已映射到训练词表的二进制语料（core/corpus.py）直接推理，跳过分词
+    """
+    from core.corpus import CsrCorpus
+
     print("[INFO] Loading LDA model...")
-    lda = LdaModel.load(lda_model_path)
+    engine = InferenceEngine(lda_model_path, topics_path=topics_json_path)
 
-    print("[INFO] Loading vocab...")
-    vocab = load_json(vocab_path)
+    return infer_bows(CsrCorpus(corpus_dir), engine, top_k=top_k)
 
-    topic_words = load_json(topics_json_path) if topics_json_path else None
 
+def infer_bows(bows, engine, top_k=5):
     all_doc_topics = []
 
-    for idx, text in enumerate(texts):
-        bow = text_to_bow(text, vocab)
-
+    for idx, bow in enumerate(bows):
         if not bow:
             print(f"[WARN] 文档 {idx} 无有效词（不在训练词表中）")
             all_doc_topics.append([])
             continue
 
-        # LDA 推理
-        doc_topics = lda.get_document_topics(
-            bow, minimum_probability=0.0
-        )
-
-        # 按概率排序
-        doc_topics = sorted(
-            doc_topics, key=lambda x: x[1], reverse=True
-        )
+        # LDA 推理（按概率降序）
+        doc_topics = engine.infer_bow(bow)
 
         # ======================
-        # 打印（numpy.float32 可直接打印）
+        # 打印
         # ======================
         print(f"\n[INFO] 文档 {idx} 主题分布（Top {top_k}）")
         for tid, prob in doc_topics[:top_k]:
             print(f"  Topic {tid:>2d} | prob = {prob:.4f}")
-            if topic_words and str(tid) in topic_words:
-                kws = topic_words[str(tid)]
-                print("    keywords:", " ".join(kws[:8]))
+            if engine.topics.get(tid, {}).get("label"):
+                print("    label:", engine.label(tid))
+            kws = engine.keywords(tid, 8)
+            if kws:
+                print("    keywords:", " ".join(kws))
 
         # ======================
-        # 保存用（转成 JSON 可序列化）
+        # 保存用（JSON 可序列化）
         # ======================
-        doc_topics_json = [
-            [int(tid), float(prob)]
-            for tid, prob in doc_topics
-        ]
-
-        all_doc_topics.append(doc_topics_json)
+        all_doc_topics.append([[tid, prob] for tid, prob in doc_topics])
 
     return all_doc_topics
 
@@ -128,20 +147,20 @@ if __name__ == "__main__":
     )
 
     parser.add_argument(
-        "--model", required=True, help="已训练好的 lda.model"
+        "--model", required=True, help="已训练好的 lda.model，或 core/lda_artifact.py 导出的推理产物目录"
     )
     parser.add_argument(
-        "--vocab", required=True, help="vocab.json（id -> word）"
+        "--vocab", default=None, help="vocab.json（id -> word），csv / json 输入必填（推理产物可省略）"
     )
     parser.add_argument(
         "--topics", default=None, help="topics.json（可选）"
     )
     parser.add_argument(
-        "--input", required=True, help="输入 CSV 或 JSON 文件"
+        "--input", required=True, help="输入 CSV / JSON 文件，或二进制语料目录"
     )
     parser.add_argument(
         "--input_type",
-        choices=["csv", "json"],
+        choices=["csv", "json", "corpus"],
         required=True,
         help="输入文件类型",
     )
@@ -158,31 +177,70 @@ if __name__ == "__main__":
         default=None,
         help="保存 doc_topics.json（可选）",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="分词进程数",
+    )
+    parser.add_argument(
+        "--cache_size",
+        type=int,
+        default=100000,
+        help="内存分词缓存条数，0 为关闭",
+    )
+    parser.add_argument(
+        "--cache_db",
+        default=None,
+        help="磁盘分词缓存（sqlite，可选），可与多次推理共享",
+    )
 
     args = parser.parse_args()
 
-    # 读取文本
-    if args.input_type == "csv":
-        texts = load_csv(
-            args.input, text_column=args.text_column
+    if args.input_type == "corpus":
+        all_doc_topics = infer_corpus(
+            corpus_dir=args.input,
+            lda_model_path=args.model,
+            topics_json_path=args.topics,
+            top_k=args.top_k,
         )
     else:
-        raw_json = load_json(args.input)
-        texts = [
-            doc.get(args.text_column, "").strip()
-            for doc in raw_json
-            if doc.get(args.text_column)
-        ]
-
-    print(f"[INFO] 共读取 {len(texts)} 条文本")
-
-    all_doc_topics = infer_texts(
-        texts=texts,
-        lda_model_path=args.model,
-        vocab_path=args.vocab,
-        topics_json_path=args.topics,
-        top_k=args.top_k,
-    )
+        from core.lda_artifact import is_artifact_dir
+        if not args.vocab and not is_artifact_dir(args.model):
+            parser.error("csv / json 输入需要 --vocab")
+
+        # 读取文本
+        if args.input_type == "csv":
+            texts = load_csv(
+                args.input, text_column=args.text_column
+            )
+        else:
+            raw_json = load_json(args.input)
+            texts = [
+                doc.get(args.text_column, "").strip()
+                for doc in raw_json
+                if doc.get(args.text_column)
+            ]
+
+        print(f"[INFO] 共读取 {len(texts)} 条文本")
+
+        cache = None
+        if args.cache_size > 0 or args.cache_db:
+            cache = TokenCache("lcut", args.cache_size, args.cache_db)
+
+        all_doc_topics = infer_texts(
+            texts=texts,
+            lda_model_path=args.model,
+            vocab_path=args.vocab,
+            topics_json_path=args.topics,
+            top_k=args.top_k,
+            cache=cache,
+            workers=args.workers,
+        )
+
+        if cache is not None:
+            cache.close()
+            print(cache.report())
 
     # 保存结果
     if args.output:
@@ -0,0 +1,11 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# config 里的路径指向仓库外（../vocab/stopwords.txt），测试改用仓库自带的停用词表；
+# 须在 import tokenier.jieba_cut 之前设置（模块导入时加载停用词）
+import core.config  # noqa: E402
+
+core.config.STOP_LIST = os.path.join(ROOT, "vocab", "stopwords.txt")
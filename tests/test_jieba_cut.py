@@ -0,0 +1,113 @@
+import os
+
+import pandas as pd
+from tinydb import TinyDB
+
+from tokenier import jieba_cut
+from tokenier.manifest import IngestManifest
+from tokenier.vocab_store import VocabStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_CSV = os.path.join(ROOT, "infer", "test_data", "test.csv")
+
+
+def _write_csvs(csv_dir, n_files=3, rows=40):
+    """
+    从 infer/test_data/test.csv 切出几份小 CSV；最后一份混入前一份的若干行，覆盖跨文件去重
+    """
+    df = pd.read_csv(SAMPLE_CSV, encoding="utf-8")
+    files = []
+    for i in range(n_files):
+        part = df.iloc[i * rows:(i + 1) * rows]
+        if i == n_files - 1:
+            part = pd.concat([part, df.iloc[(i - 1) * rows:(i - 1) * rows + 5]])
+        name = f"part_{i}.csv"
+        part.to_csv(os.path.join(csv_dir, name), index=False, encoding="utf-8")
+        files.append(name)
+    return files
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _run_serial(out_dir, csv_dir, files, flush_docs=0):
+    """
+    与 main() 的串行路径相同：逐文件分块分词，每个文件结束 checkpoint 一次
+    """
+    out_dir.mkdir(exist_ok=True)
+    vocab = VocabStore(str(out_dir / "vocab.json"))
+    info = TinyDB(str(out_dir / "content.json"))
+    manifest = IngestManifest(str(out_dir / "manifest.json"))
+    plan = manifest.plan(str(csv_dir), files)
+    pending = []
+    jieba_cut.init_cache()
+    try:
+        for data_file, start_row in plan:
+            chunks = jieba_cut.iter_csv_chunks(data_file, str(csv_dir), 16, start_row)
+            rows = jieba_cut.cut_process(data_file, chunks, vocab, pending, manifest, info, flush_docs)
+            manifest.mark_file(data_file, start_row + rows)
+            jieba_cut.checkpoint(vocab, info, pending, manifest)
+    finally:
+        info.close()
+
+
+def test_serial_parallel_identical(tmp_path):
+    csv_dir = tmp_path / "csv"
+    csv_dir.mkdir()
+    files = _write_csvs(str(csv_dir))
+
+    serial = tmp_path / "serial"
+    _run_serial(serial, csv_dir, files)
+
+    # 多进程：2 个 worker，每个文件归并后都 checkpoint 一次
+    parallel = tmp_path / "parallel"
+    parallel.mkdir()
+    vocab = VocabStore(str(parallel / "vocab.json"))
+    info = TinyDB(str(parallel / "content.json"))
+    manifest = IngestManifest(str(parallel / "manifest.json"))
+    plan = manifest.plan(str(csv_dir), files)
+    pending = []
+    jieba_cut.parallel_cut(str(csv_dir), plan, vocab, info, pending, workers=2,
+                           flush_every=1, chunk_rows=16, manifest=manifest, flush_docs=10)
+    jieba_cut.checkpoint(vocab, info, pending, manifest)
+    info.close()
+
+    assert _read(serial / "content.json") == _read(parallel / "content.json")
+    assert _read(serial / "vocab.json") == _read(parallel / "vocab.json")
+    # 最后一个文件混入的 5 行已在前一个文件入库，应被清单过滤
+    assert len(TinyDB(str(serial / "content.json"))) == 3 * 40
+
+
+def test_mid_file_flush_resume(tmp_path, monkeypatch):
+    csv_dir = tmp_path / "csv"
+    csv_dir.mkdir()
+    files = _write_csvs(str(csv_dir))
+
+    reference = tmp_path / "reference"
+    _run_serial(reference, csv_dir, files)
+
+    # flush_docs=10：每块 16 行之后都提前落盘；第 2 个文件读到第 2 块时模拟进程被杀
+    original = jieba_cut.tokenize_frame
+    calls = []
+
+    def killed(data_file, df, skip_ids=None):
+        calls.append(data_file)
+        if len(calls) == 5:
+            raise KeyboardInterrupt
+        return original(data_file, df, skip_ids)
+
+    resumed = tmp_path / "resumed"
+    monkeypatch.setattr(jieba_cut, "tokenize_frame", killed)
+    try:
+        _run_serial(resumed, csv_dir, files, flush_docs=10)
+    except KeyboardInterrupt:
+        pass
+    monkeypatch.setattr(jieba_cut, "tokenize_frame", original)
+
+    # 被杀前已入库的文档在清单里，重跑时跳过，结果与一次跑完相同
+    assert len(TinyDB(str(resumed / "content.json"))) == 40 + 16
+    _run_serial(resumed, csv_dir, files, flush_docs=10)
+    assert _read(reference / "content.json") == _read(resumed / "content.json")
+    assert _read(reference / "vocab.json") == _read(resumed / "vocab.json")
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from gensim import corpora
+from gensim.models.ldamodel import LdaModel
+
+from core.corpus import CorpusWriter
+from core.lda_artifact import InferenceArtifact, export_artifact, is_artifact_dir, load_model
+from core.lda_infer import batch_doc_topics
+
+
+def _toy_model(n_docs=80, n_terms=30, num_topics=4):
+    rng = np.random.RandomState(1)
+    corpus = []
+    for _ in range(n_docs):
+        ids = np.sort(rng.choice(n_terms, size=rng.randint(4, 12), replace=False))
+        corpus.append([(int(w), int(c)) for w, c in zip(ids, rng.randint(1, 4, size=len(ids)))])
+    dictionary = corpora.Dictionary([[f"词{i}" for i in range(n_terms)]])
+    lda = LdaModel(corpus=corpus, id2word=dictionary, num_topics=num_topics, passes=2,
+                   iterations=30, chunksize=20, random_state=42, eval_every=None)
+    return lda, corpus
+
+
+def test_artifact_matches_ldamodel(tmp_path):
+    lda, corpus = _toy_model()
+    out_dir = str(tmp_path / "lda.artifact")
+    export_artifact(lda, out_dir)
+
+    artifact = load_model(out_dir)
+    assert isinstance(artifact, InferenceArtifact)
+    assert artifact.num_topics == lda.num_topics
+
+    # 随机数状态相同时逐条推理与 gensim 一致
+    lda.random_state = np.random.RandomState(7)
+    artifact.random_state = np.random.RandomState(7)
+    for bow in corpus[:20]:
+        expected = dict(lda.get_document_topics(bow, minimum_probability=0.0))
+        got = dict(artifact.get_document_topics(bow, minimum_probability=0.0))
+        tids = sorted(set(expected) | set(got))
+        assert np.allclose([expected.get(t, 0.0) for t in tids], [got.get(t, 0.0) for t in tids], atol=1e-5)
+
+    # 整批推理
+    lda.random_state = np.random.RandomState(7)
+    artifact.random_state = np.random.RandomState(7)
+    assert np.allclose(batch_doc_topics(lda, corpus), artifact.doc_topics(corpus), atol=1e-5)
+
+
+def test_artifact_token_table(tmp_path):
+    lda, _ = _toy_model()
+    out_dir = str(tmp_path / "lda.artifact")
+    export_artifact(lda, out_dir)
+
+    tokens = InferenceArtifact(out_dir).tokens
+    assert len(tokens) == lda.num_terms
+    for wid in range(lda.num_terms):
+        word = lda.id2word[wid]
+        assert tokens.word(wid) == word
+        assert tokens.get(word) == wid
+    assert "不存在的词" not in tokens
+    assert tokens.get("不存在的词") is None
+
+
+def test_corpus_dir_is_not_artifact(tmp_path):
+    lda, corpus = _toy_model()
+    export_artifact(lda, str(tmp_path / "lda.artifact"))
+    corpus_dir = str(tmp_path / "corpus_tfidf")
+    with CorpusWriter(corpus_dir) as writer:
+        for bow in corpus:
+            writer.add_bow(dict(bow))
+
+    assert is_artifact_dir(str(tmp_path / "lda.artifact"))
+    assert not is_artifact_dir(corpus_dir)
+    with pytest.raises(ValueError):
+        load_model(corpus_dir)
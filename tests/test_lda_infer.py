@@ -0,0 +1,38 @@
+import numpy as np
+from gensim import corpora
+from gensim.models.ldamodel import LdaModel
+
+from core.lda_infer import batch_doc_topics
+
+
+def _toy_model(n_docs=200, n_terms=50, num_topics=6):
+    rng = np.random.RandomState(1)
+    corpus = []
+    for _ in range(n_docs):
+        ids = np.sort(rng.choice(n_terms, size=rng.randint(3, 12), replace=False))
+        corpus.append([(int(w), int(c)) for w, c in zip(ids, rng.randint(1, 4, size=len(ids)))])
+    dictionary = corpora.Dictionary([[f"w{i}" for i in range(n_terms)]])
+    lda = LdaModel(corpus=corpus, id2word=dictionary, num_topics=num_topics, passes=2,
+                   random_state=42, eval_every=None)
+    return lda, corpus
+
+
+def test_gamma_init_stream_matches_per_doc():
+    # 一次抽 (n, K) 与逐篇抽 n 次 (1, K) 是同一段随机数序列
+    rng = np.random.RandomState(0)
+    block = rng.gamma(100., 1. / 100., (5, 4))
+    rng = np.random.RandomState(0)
+    per_doc = np.vstack([rng.gamma(100., 1. / 100., (1, 4)) for _ in range(5)])
+    assert np.array_equal(block, per_doc)
+
+
+def test_batch_matches_get_document_topics():
+    lda, corpus = _toy_model()
+
+    lda.random_state = np.random.RandomState(5)
+    per_doc = np.array([[p for _, p in lda.get_document_topics(bow, minimum_probability=0.0)] for bow in corpus])
+    lda.random_state = np.random.RandomState(5)
+    batch = batch_doc_topics(lda, corpus, chunk_docs=64)
+
+    assert np.allclose(per_doc, batch, atol=1e-3)
+    assert np.array_equal(per_doc.argmax(axis=1), batch.argmax(axis=1))
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from gensim import corpora
+from gensim.models.ldamodel import LdaModel
+
+from core import lda_metrics
+
+
+def _toy_corpus(n_docs=150, n_terms=60, seed=3):
+    rng = np.random.RandomState(seed)
+    corpus = []
+    for _ in range(n_docs):
+        ids = np.sort(rng.choice(n_terms, size=rng.randint(5, 16), replace=False))
+        corpus.append([(int(w), int(c)) for w, c in zip(ids, rng.randint(1, 4, size=len(ids)))])
+    dictionary = corpora.Dictionary([[f"w{i}" for i in range(n_terms)]])
+    return corpus, dictionary
+
+
+@pytest.mark.parametrize("num_topics", [5, 20, 60])
+def test_perplexity_matches_gensim(num_topics):
+    corpus, dictionary = _toy_corpus()
+    train, heldout = corpus[:120], corpus[120:]
+    lda = LdaModel(corpus=train, id2word=dictionary, num_topics=num_topics, passes=2,
+                   iterations=30, chunksize=40, random_state=42, eval_every=None)
+
+    # E 步的 gamma 初值取自模型的随机数状态，两边用同一个种子
+    lda.random_state = np.random.RandomState(0)
+    expected = np.exp2(-lda.log_perplexity(heldout, total_docs=len(train)))
+    lda.random_state = np.random.RandomState(0)
+    got = lda_metrics.perplexity(lda, heldout, total_docs=len(train))
+
+    assert got == pytest.approx(expected, rel=1e-4)
+
+
+def test_perplexity_empty_heldout():
+    corpus, dictionary = _toy_corpus(n_docs=20)
+    lda = LdaModel(corpus=corpus, id2word=dictionary, num_topics=3, random_state=42, eval_every=None)
+    assert np.isnan(lda_metrics.perplexity(lda, []))
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from gensim import corpora
+
+import core.lda_train as lda_train
+from core.lda_infer import batch_doc_topics
+
+PARAMS = dict(num_topics=4, passes=3, iterations=30, chunksize=16)
+
+
+def _toy_corpus(n_docs=100, n_terms=40, seed=0):
+    """
+    小规模合成语料：每篇 5~15 个不同词，词频 1~3
+    """
+    rng = np.random.RandomState(seed)
+    corpus = []
+    for _ in range(n_docs):
+        ids = np.sort(rng.choice(n_terms, size=rng.randint(5, 16), replace=False))
+        corpus.append([(int(w), int(c)) for w, c in zip(ids, rng.randint(1, 4, size=len(ids)))])
+    dictionary = corpora.Dictionary()
+    dictionary.id2token = {i: f"w{i}" for i in range(n_terms)}
+    dictionary.token2id = {w: i for i, w in dictionary.id2token.items()}
+    dictionary.num_terms = n_terms
+    return corpus, dictionary
+
+
+def _doc_topics(lda_model, corpus):
+    # 推理用同一个随机数种子，只比较模型本身
+    lda_model.random_state = np.random.RandomState(0)
+    return batch_doc_topics(lda_model, corpus)
+
+
+def test_resume_matches_uninterrupted(tmp_path, monkeypatch):
+    corpus, dictionary = _toy_corpus()
+
+    full = lda_train.train_lda(corpus, dictionary, checkpoint_dir=str(tmp_path / "full"),
+                               checkpoint_every=0, **PARAMS)
+
+    # 第 10 个 chunk 的断点写完后模拟进程被杀（100 篇 / 16 = 7 个 chunk，停在第 2 个 pass 中间）
+    original = lda_train.Checkpointer.__call__
+
+    def killed(self, *args):
+        original(self, *args)
+        if self.step == 10:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(lda_train.Checkpointer, "__call__", killed)
+    with pytest.raises(KeyboardInterrupt):
+        lda_train.train_lda(corpus, dictionary, checkpoint_dir=str(tmp_path / "ckpt"),
+                            checkpoint_every=5, **PARAMS)
+    monkeypatch.setattr(lda_train.Checkpointer, "__call__", original)
+
+    resumed = lda_train.train_lda(corpus, dictionary, checkpoint_dir=str(tmp_path / "ckpt"),
+                                  checkpoint_every=5, resume=True, **PARAMS)
+
+    assert np.array_equal(full.state.sstats, resumed.state.sstats)
+    assert np.array_equal(full.alpha, resumed.alpha)
+    assert np.array_equal(_doc_topics(full, corpus), _doc_topics(resumed, corpus))
+
+
+def test_checkpoint_loop_matches_ldamodel(tmp_path):
+    corpus, dictionary = _toy_corpus()
+
+    reference = lda_train.train_lda(corpus, dictionary, **PARAMS)
+    looped = lda_train.train_lda(corpus, dictionary, checkpoint_dir=str(tmp_path / "ckpt"),
+                                 checkpoint_every=0, **PARAMS)
+
+    assert np.array_equal(reference.state.sstats, looped.state.sstats)
+    assert np.array_equal(_doc_topics(reference, corpus), _doc_topics(looped, corpus))
@@ -0,0 +1,220 @@
+from collections import Counter
+from multiprocessing import Pool
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from core.jieba_init import init_jieba
+
+
+_lcut = None
+
+
+def jieba_lcut(text: str) -> List[str]:
+    """
+    首次调用时才导入 jieba 并用预构建缓存初始化词典
+    """
+    global _lcut
+    if _lcut is None:
+        init_jieba()
+        import jieba
+        _lcut = jieba.lcut
+    return _lcut(text)
+
+
+class BatchTokenizer:
+    """
+    文本 -> token id / 词频 的融合分词器，训练（jieba_cut）与推理（infer）共用
+
+    过滤规则（strip / lower / 停用词 / 标点 / 纯数字 / 长度）与词表查找被"编译"进
+    一张 原始 token -> 结果 的记忆表：每个原始 token 只在第一次出现时走一遍规则，
+    之后热路径上每个 token 只有一次 dict 查找，不再逐词分支判断
+    """
+
+    def __init__(
+        self,
+        word2id: Dict[str, int] = None,
+        stops: Iterable[str] = (),
+        puncs: Iterable[str] = (),
+        min_len: int = 2,
+        drop_digits: bool = True,
+        lowercase: bool = True,
+        strip: bool = True,
+        grow: bool = False,
+        cache=None,
+    ):
+        self.word2id = dict(word2id) if word2id is not None else {}
+        self.stops = set(stops)
+        self.puncs = set(puncs)
+        self.min_len = min_len
+        self.drop_digits = drop_digits
+        self.lowercase = lowercase
+        self.strip = strip
+        self.grow = grow
+        self.cache = cache
+
+        self._word_lut: Dict[str, str] = {}   # 原始 token -> 保留词（None 表示丢弃）
+        self._id_lut: Dict[str, int] = {}     # 原始 token -> id（-1 表示丢弃 / 不在词表）
+
+    @classmethod
+    def for_inference(cls, vocab: Dict[str, str], cache=None):
+        """
+        vocab: {"0": "中国", ...}；与原 text_to_bow 一致：只转小写，只保留词表内的词
+        也可以直接传推理产物的 mmap 哈希表（core/lda_artifact.py TokenTable），不再构造 dict
+        """
+        if not isinstance(vocab, dict):
+            tokenizer = cls(min_len=1, drop_digits=False, strip=False, cache=cache)
+            tokenizer.word2id = vocab
+            return tokenizer
+        return cls(
+            word2id={w: int(i) for i, w in vocab.items()},
+            min_len=1,
+            drop_digits=False,
+            strip=False,
+            cache=cache,
+        )
+
+    # ======================
+    # 规则编译
+    # ======================
+
+    def _compile_word(self, token: str):
+        word = token
+        if self.strip:
+            word = word.strip()
+        if self.lowercase:
+            word = word.lower()
+
+        if (
+            not word
+            or word in self.stops
+            or word in self.puncs
+            or (self.drop_digits and word.isdigit())
+            or len(word) < self.min_len
+        ):
+            word = None
+
+        self._word_lut[token] = word
+        return word
+
+    def _compile_id(self, token: str) -> int:
+        word = self._word_lut.get(token, 0)
+        if word == 0:
+            word = self._compile_word(token)
+
+        if word is None:
+            wid = -1
+        else:
+            wid = self.word2id.get(word, -1)
+            if wid < 0 and self.grow:
+                wid = len(self.word2id)
+                self.word2id[word] = wid
+
+        self._id_lut[token] = wid
+        return wid
+
+    # ======================
+    # 单条
+    # ======================
+
+    def cut(self, text: str) -> List[str]:
+        if self.cache is not None:
+            return self.cache.get_or_cut(text, jieba_lcut)
+        return jieba_lcut(text)
+
+    def words(self, text: str = None, tokens: List[str] = None) -> List[str]:
+        """
+        过滤后的词列表（训练侧写 content.json / 词表需要字符串）
+        """
+        lut = self._word_lut
+        out = []
+        for tok in (tokens if tokens is not None else self.cut(text)):
+            word = lut.get(tok, 0)
+            if word == 0:
+                word = self._compile_word(tok)
+            if word is not None:
+                out.append(word)
+        return out
+
+    def encode(self, text: str = None, tokens: List[str] = None):
+        """
+        -> (ids int32[k], counts int32[k])，按首次出现顺序
+        """
+        lut = self._id_lut
+        counter = Counter()
+        for tok in (tokens if tokens is not None else self.cut(text)):
+            wid = lut.get(tok)
+            if wid is None:
+                wid = self._compile_id(tok)
+            if wid >= 0:
+                counter[wid] += 1
+        return (
+            np.fromiter(counter.keys(), dtype=np.int32, count=len(counter)),
+            np.fromiter(counter.values(), dtype=np.int32, count=len(counter)),
+        )
+
+    def bow(self, text: str) -> list:
+        ids, counts = self.encode(text)
+        return list(zip(ids.tolist(), counts.tolist()))
+
+    # ======================
+    # 批量
+    # ======================
+
+    def _encode_many(self, texts: List[str]):
+        lens, ids, counts = [], [], []
+        for text in texts:
+            i, c = self.encode(text)
+            lens.append(len(i))
+            ids.append(i)
+            counts.append(c)
+        return (
+            np.asarray(lens, dtype=np.int64),
+            np.concatenate(ids) if ids else np.zeros(0, dtype=np.int32),
+            np.concatenate(counts) if counts else np.zeros(0, dtype=np.int32),
+        )
+
+    def encode_batch(self, texts: List[str], workers: int = 1, chunksize: int = 256):
+        """
+        -> CSR 三元组 (offsets int64[n+1], ids int32[nnz], counts int32[nnz])
+        workers > 1 时按块分发到进程池，结果按输入顺序拼接
+        """
+        texts = list(texts)
+
+        if workers <= 1 or len(texts) <= chunksize:
+            lens, ids, counts = self._encode_many(texts)
+        else:
+            if self.grow:
+                raise ValueError("grow=True 时 id 在进程间无法一致分配，请用 workers=1")
+            chunks = [texts[i:i + chunksize] for i in range(0, len(texts), chunksize)]
+            # 磁盘缓存连接不能跨进程传递，子进程里只用规则记忆表
+            cache, self.cache = self.cache, None
+            try:
+                with Pool(processes=workers, initializer=_init_worker, initargs=(self,)) as pool:
+                    parts = pool.map(_encode_chunk, chunks)
+            finally:
+                self.cache = cache
+            lens = np.concatenate([p[0] for p in parts])
+            ids = np.concatenate([p[1] for p in parts])
+            counts = np.concatenate([p[2] for p in parts])
+
+        offsets = np.zeros(len(lens) + 1, dtype=np.int64)
+        np.cumsum(lens, out=offsets[1:])
+        return offsets, ids, counts
+
+
+# ======================
+# 进程池
+# ======================
+
+_worker_tokenizer = None
+
+
+def _init_worker(tokenizer: BatchTokenizer):
+    global _worker_tokenizer
+    init_jieba()
+    _worker_tokenizer = tokenizer
+
+
+def _encode_chunk(texts):
+    return _worker_tokenizer._encode_many(texts)
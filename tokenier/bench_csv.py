@@ -0,0 +1,123 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from tokenier.jieba_cut import (
+    CHUNK_ROWS,
+    iter_csv_chunks,
+    tokenize_frame,
+    word_cut,
+    URL_PATTERN,
+)
+
+
+# ======================
+# 构造测试数据
+# ======================
+
+def make_csv(path: str, rows: int, sample_csv: str = None):
+    """
+    用样例 CSV 重复拼接出 rows 行；没有样例时生成合成文本
+    """
+    if sample_csv:
+        base = pd.read_csv(sample_csv, encoding="utf-8")
+    else:
+        base = pd.DataFrame({
+            "微博id": [f"Q{i:08d}" for i in range(100)],
+            "微博正文": [f"今天讨论人工智能的发展 大模型在工业领域的应用 第{i}条" for i in range(100)],
+            "发布时间": ["2025-11-18 10:00"] * 100,
+            "点赞数": [0] * 100,
+        })
+
+    reps = rows // len(base) + 1
+    df = pd.concat([base] * reps, ignore_index=True).iloc[:rows]
+    df.to_csv(path, index=False)
+
+
+# ======================
+# 两种读取路径
+# ======================
+
+def read_csv(csv_file, csv_dir):
+    """
+    原始路径的整表读取（jieba_cut.py 已改为 iter_csv_chunks 流式读取，这里只作对比基线）
+    """
+    return pd.read_csv(os.path.join(csv_dir, csv_file), encoding="utf-8")
+
+
+def run_iterrows(csv_file, csv_dir, with_cut):
+    """
+    原始路径：整表读入 + iterrows
+    """
+    n = 0
+    df = read_csv(csv_file, csv_dir)
+    for _, row in df.iterrows():
+        content = URL_PATTERN.sub("", row["微博正文"])
+        _ = row["微博id"], row["发布时间"]
+        if with_cut:
+            word_cut(content)
+        n += 1
+    return n
+
+
+def run_streaming(csv_file, csv_dir, with_cut, chunk_rows):
+    """
+    新路径：按列分块流式读取 + 列 zip
+    """
+    n = 0
+    for chunk in iter_csv_chunks(csv_file, csv_dir, chunk_rows):
+        if with_cut:
+            docs, _ = tokenize_frame(csv_file, chunk)
+            n += len(docs)
+        else:
+            for content, code, t in zip(
+                chunk["微博正文"].tolist(),
+                chunk["微博id"].tolist(),
+                chunk["发布时间"].tolist(),
+            ):
+                URL_PATTERN.sub("", content)
+                n += 1
+    return n
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    n = fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return n, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV 读取吞吐对比：iterrows vs 流式分块")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--sample_csv", default=None, help="用于拼接的样例 CSV（可选）")
+    parser.add_argument("--chunk_rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--with_cut", action="store_true", help="同时计入 jieba 分词耗时")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} | {'path':<10} | {'rows/s':>10} | {'time(s)':>8} | {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rows in args.rows:
+            csv_file = f"bench_{rows}.csv"
+            make_csv(os.path.join(tmp_dir, csv_file), rows, args.sample_csv)
+
+            for name, fn, fn_args in [
+                ("iterrows", run_iterrows, (csv_file, tmp_dir, args.with_cut)),
+                ("streaming", run_streaming, (csv_file, tmp_dir, args.with_cut, args.chunk_rows)),
+            ]:
+                n, elapsed, peak = measure(fn, *fn_args)
+                print(
+                    f"{rows:>10} | {name:<10} | {n / elapsed:>10.0f} | "
+                    f"{elapsed:>8.2f} | {peak / 1024 / 1024:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
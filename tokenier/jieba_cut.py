@@ -1,17 +1,19 @@
-import encodings
-from multiprocessing import context
+import argparse
+from multiprocessing import Pool
 
-import jieba
-from numpy.char import isdigit
 from tqdm import tqdm
-import json
-import pandas as pd
-from  tinydb import TinyDB ,Query
-from core.config import VOCAB_PATH,CSV_DIR,STOP_LIST,CONTENT_INFO
+from  tinydb import TinyDB
+from core.config import VOCAB_PATH,CSV_DIR,STOP_LIST,CONTENT_INFO,MANIFEST_PATH
+from core.jieba_init import init_jieba
+from tokenier.vocab_store import VocabStore
+from tokenier.token_cache import TokenCache, format_stats
+from tokenier.manifest import IngestManifest
+from tokenier.batch_tokenizer import BatchTokenizer
+import hashlib
 import os
 import re
 import string
-from collections import Counter
+from collections import Counter, deque
 
 
 URL_PATTERN = re.compile(
@@ -27,10 +29,29 @@ PUNCS = set(string.punctuation) | {
 }
 
 
-def read_csv(csv_file):
-    csv_path=os.path.join(CSV_DIR,csv_file)
-    df=pd.read_csv(csv_path,encoding='utf-8')
-    return df
+# 分词只需要这三列
+CSV_COLUMNS = ['微博正文', '微博id', '发布时间']
+CHUNK_ROWS = 5000
+FLUSH_DOCS = 50000   # 缓冲区文档数上限，超过即 checkpoint
+
+
+def iter_csv_chunks(csv_file, csv_dir=CSV_DIR, chunk_rows: int = CHUNK_ROWS, start_row: int = 0):
+    """
+    流式读取 CSV：只解析需要的三列，每次产出 chunk_rows 行的小 DataFrame，
+    内存占用与文件大小无关；start_row > 0 时跳过已处理的前若干数据行
+    """
+    import pandas as pd
+    csv_path = os.path.join(csv_dir, csv_file)
+    reader = pd.read_csv(
+        csv_path,
+        encoding='utf-8',
+        usecols=CSV_COLUMNS,
+        chunksize=chunk_rows,
+        skiprows=range(1, start_row + 1) if start_row else None,
+    )
+    with reader:
+        for chunk in reader:
+            yield chunk
 
 def load_stopwords(stop_path:str=None):
     with open(STOP_LIST,'r',encoding='utf-8') as f:
@@ -45,24 +66,27 @@ def load_stopwords(stop_path:str=None):
                 temp=''
     return stop_list
 
-def info_write(code,content_list,info:TinyDB,time) :
-   
-    ws= dict(Counter(content_list))
-    info.insert({'id':code,'words':ws,"time": time})
-    return
-    
 
-def cut_process(data_file, df, vocab: TinyDB, exec: Query, info: TinyDB):
+def tokenize_frame(data_file, df, skip_ids=None):
+    """
+    对单个数据表（或其中一块）分词，不写库
+    返回 (docs_info, word_counter)：逐文档词频 + 该表的局部词频 Counter
+    skip_ids：已入库的 微博id，直接跳过不分词
+    """
     word_counter = Counter()   # 内存累积词频
     docs_info = []             # 批量保存文档信息
 
-    for _, row in tqdm(df.iterrows(), desc=f"数据表：{data_file}"):
-        content = row['微博正文']
-        code = row['微博id']
-        time = row["发布时间"]
-
+    # 直接按列 zip，避免 iterrows 为每行构造 Series
+    rows = zip(
+        df['微博正文'].tolist(),
+        df['微博id'].tolist(),
+        df['发布时间'].tolist(),
+    )
+    for content, code, time in tqdm(rows, total=len(df), desc=f"数据表：{data_file}"):
+        if skip_ids and str(code) in skip_ids:
+            continue
         content = URL_PATTERN.sub("", content)
-        content_list = word_cut(content)
+        content_list = cached_word_cut(content)
 
         # 累积词频
         word_counter.update(content_list)
@@ -70,61 +94,255 @@ def cut_process(data_file, df, vocab: TinyDB, exec: Query, info: TinyDB):
         # 保存文档信息
         docs_info.append({'id': code, 'words': dict(Counter(content_list)), 'time': time})
 
-    # 批量写入文档信息
-    info.insert_multiple(docs_info)
+    return docs_info, word_counter
+
+
+def write_results(docs_info, word_counter, vocab: VocabStore, pending: list, manifest: IngestManifest = None):
+    # 按 微博id 去重（跨文件 / 跨运行）
+    if manifest is not None:
+        docs_info, word_counter = manifest.filter_new(docs_info, word_counter)
+
+    # 文档先进缓冲区，与词表、清单一起在 checkpoint 时落盘
+    pending.extend(docs_info)
+
+    # 批量更新词表（仅内存，哈希索引 O(1)）
+    vocab.update(word_counter)
+
+
+def cut_process(data_file, df, vocab: VocabStore, pending: list, manifest: IngestManifest = None,
+                info: TinyDB = None, flush_docs: int = 0):
+    """
+    df 可以是完整 DataFrame，也可以是 iter_csv_chunks 产出的分块迭代器；
+    分块时逐块分词，结果进 pending 缓冲区，缓冲区超过 flush_docs 篇时在块之间 checkpoint。
+    返回读取的数据行数
+    """
+    frames = [df] if hasattr(df, "columns") else df
+    skip_ids = manifest.seen_ids if manifest is not None else None
+    rows = 0
+    for frame in frames:
+        rows += len(frame)
+        docs_info, word_counter = tokenize_frame(data_file, frame, skip_ids)
+        write_results(docs_info, word_counter, vocab, pending, manifest)
+        if info is not None:
+            flush_if_full(vocab, info, pending, manifest, flush_docs)
+    return rows
+
+
+def checkpoint(vocab: VocabStore, info: TinyDB, pending: list, manifest: IngestManifest = None):
+    """
+    文档 / 词表 / 清单三者一起落盘：两次 checkpoint 之间被杀，三者都停在上一次 checkpoint，
+    下次增量运行从那里重新处理，不会出现文档已入库而清单没有记录（重复入库、词频翻倍）的情况
+    清单最后写，并记下此时 content.json 的文档数，启动时据此检查上一次 checkpoint 是否完整
+    """
+    if pending:
+        info.insert_multiple(pending)
+        pending.clear()
+    vocab.flush()
+    if manifest is not None:
+        manifest.content_docs = len(info)
+        manifest.save()
+
+
+def flush_if_full(vocab: VocabStore, info: TinyDB, pending: list, manifest: IngestManifest = None,
+                  flush_docs: int = 0):
+    """
+    缓冲区达到 flush_docs 篇时提前 checkpoint，内存上限与单个文件大小无关；
+    文件中途落盘时清单只记下已入库的 微博id（文件仍视为未处理完），下次重跑该文件时已入库的行被跳过
+    """
+    if flush_docs and len(pending) >= flush_docs:
+        checkpoint(vocab, info, pending, manifest)
+
+
+# ======================
+# 多进程分词
+# ======================
+
+_skip_ids = None   # 子进程内：启动时已入库的 微博id
+
+
+def _init_worker(cache_size=0, cache_db=None, skip_ids=None):
+    # 每个子进程各自加载一次 jieba 词典，并各自持有一份缓存（磁盘层共享）
+    global _skip_ids
+    init_jieba()
+    init_cache(cache_size, cache_db)
+    _skip_ids = skip_ids
+
+
+def _tokenize_chunk(task):
+    """
+    子进程任务：分词一块数据行，只返回结果，由主进程统一写库
+    """
+    data_file, chunk = task
+    docs_info, word_counter = tokenize_frame(data_file, chunk, _skip_ids)
+
+    cache_stats = Counter()
+    if token_cache is not None:
+        token_cache.flush()
+        cache_stats.update(token_cache.stats())
+        token_cache.hits = token_cache.disk_hits = token_cache.misses = 0
+    return docs_info, word_counter, cache_stats
+
+
+def parallel_cut(
+    csv_dir,
+    plan,
+    vocab: VocabStore,
+    info: TinyDB,
+    pending: list,
+    workers: int,
+    flush_every: int = 0,
+    chunk_rows: int = CHUNK_ROWS,
+    cache_size: int = 0,
+    cache_db: str = None,
+    manifest: IngestManifest = None,
+    flush_docs: int = 0,
+):
+    """
+    plan: [(data_file, start_row), ...]
+    主进程流式读取 CSV，按块分发到进程池；同时在途的块不超过 2 * workers，
+    峰值内存与 CSV 大小无关。结果按提交顺序逐块归并写库，输出与串行路径逐字节一致
+    """
+    skip_ids = manifest.seen_ids if manifest is not None else None
+    cache_stats = Counter()
+    in_flight = deque()   # (data_file, 结果)；结果为 None 表示该文件的块已全部提交，rows 为处理到的行数
+    files_done = 0
+
+    def drain_one():
+        nonlocal files_done
+        data_file, result, rows = in_flight.popleft()
+        if result is not None:
+            docs_info, word_counter, chunk_stats = result.get()
+            write_results(docs_info, word_counter, vocab, pending, manifest)
+            cache_stats.update(chunk_stats)
+            flush_if_full(vocab, info, pending, manifest, flush_docs)
+            return
+
+        print(data_file)
+        files_done += 1
+        if manifest is not None:
+            manifest.mark_file(data_file, rows)
+        if flush_every and files_done % flush_every == 0:
+            checkpoint(vocab, info, pending, manifest)
+
+    with Pool(
+        processes=workers,
+        initializer=_init_worker,
+        initargs=(cache_size, cache_db, skip_ids),
+    ) as pool:
+        for data_file, start_row in plan:
+            rows = start_row
+            for chunk in iter_csv_chunks(data_file, csv_dir, chunk_rows, start_row):
+                rows += len(chunk)
+                in_flight.append((data_file, pool.apply_async(_tokenize_chunk, ((data_file, chunk),)), None))
+                while len(in_flight) > 2 * workers:
+                    drain_one()
+            in_flight.append((data_file, None, rows))
+        while in_flight:
+            drain_one()
+    return cache_stats
 
-    # 批量更新词表
-    for word, freq in word_counter.items():
-        res = vocab.get(exec.word == word)
-        if res:
-            vocab.update({'freq': res['freq'] + freq}, exec.word == word)
-        else:
-            vocab.insert({'word': word, 'freq': freq, 'lang': 'ch'})
 
 stops=set(load_stopwords())
 
 
-def vocab_create(words_list,vocab:TinyDB,exec: Query):
-    for w in words_list:
-        res=vocab.get(w==exec.word)
-        if res :
-           vocab.update({"freq" :res['freq']+1},w==exec.word)
-        else :
-            vocab.insert({"word":w, "freq":1,"lang":"ch"})
+# ======================
+# 分词缓存
+# ======================
+
+token_cache = None   # TokenCache，由 init_cache 在主进程 / 子进程中初始化
+
+
+def cache_namespace():
+    """
+    缓存命名空间包含停用词与标点表的指纹，过滤规则一变旧缓存自动失效
+    """
+    digest = hashlib.md5("\n".join(sorted(stops | PUNCS)).encode("utf-8")).hexdigest()
+    return f"word_cut:{digest[:12]}"
+
+
+def init_cache(cache_size: int = 0, cache_db: str = None):
+    global token_cache
+    if cache_size <= 0 and not cache_db:
+        token_cache = None
+    else:
+        token_cache = TokenCache(cache_namespace(), cache_size, cache_db)
+    return token_cache
+
+
+def cached_word_cut(content: str):
+    if token_cache is None:
+        return word_cut(content)
+    return token_cache.get_or_cut(content, word_cut)
+
+
+# 过滤规则（strip / lower / 停用词 / 标点 / 数字 / 长度 <= 1）编译进分词器的记忆表
+tokenizer = BatchTokenizer(stops=stops, puncs=PUNCS, min_len=2)
+
 
 def word_cut(context:str):
-    token_list=jieba.lcut(context)
-    words_list=[]
-    for word in token_list:
-        word=word.strip().lower()
-        if word in stops:
-            continue
-        elif word in PUNCS:
-            continue
-        elif word.isdigit():
-            continue
-        elif not word:
-            continue
-        elif  len(word) <= 1:
-            continue
-        else:
-            words_list.append(word)
-    return  words_list
+    return tokenizer.words(context)
 
 
 def main():
-    vocab=TinyDB(VOCAB_PATH)
-    exec=Query()
+    parser = argparse.ArgumentParser(description="CSV 分词 + 词表构建")
+    parser.add_argument("--csv_dir", default=CSV_DIR, help="原始 CSV 目录")
+    parser.add_argument("--workers", type=int, default=1, help="分词进程数，1 为串行")
+    parser.add_argument("--chunk_rows", type=int, default=CHUNK_ROWS, help="流式读取 CSV 的分块行数")
+    parser.add_argument("--cache_size", type=int, default=100000, help="内存分词缓存条数，0 为关闭")
+    parser.add_argument("--cache_db", default=None, help="可选：磁盘分词缓存（sqlite），跨运行共享")
+    parser.add_argument("--manifest", default=MANIFEST_PATH, help="增量入库清单路径")
+    parser.add_argument("--full", action="store_true", help="忽略清单，全量重新分词")
+    parser.add_argument("--flush_every", type=int, default=1,
+                        help="每处理 N 个文件把文档 / 词表 / 清单一起落盘一次，0 为不按文件落盘")
+    parser.add_argument("--flush_docs", type=int, default=FLUSH_DOCS,
+                        help="缓冲区超过 N 篇文档时提前落盘（大文件中途），0 为不限")
+    args = parser.parse_args()
+
+    init_jieba()
+    vocab=VocabStore(VOCAB_PATH)
     content=TinyDB(CONTENT_INFO)
-    
-    if  not isinstance(vocab,TinyDB):
-        print("数据格式出错")
-        return 
-    print(os.listdir(CSV_DIR))
-    for data_file in os.listdir(CSV_DIR):
-        print(data_file)
-        df=read_csv(data_file)
-        cut_process(data_file,df,vocab,exec,content)
+
+    # 固定文件顺序，保证串行 / 并行结果一致
+    data_files = sorted(os.listdir(args.csv_dir))
+    print(data_files)
+
+    # 增量：只处理新文件 / 追加的行
+    manifest = None if args.full else IngestManifest(args.manifest)
+    if manifest is not None and manifest.content_docs is not None and manifest.content_docs != len(content):
+        print(f"[WARN] content.json 有 {len(content)} 篇文档，清单记录的是 {manifest.content_docs} 篇："
+              f"上一次落盘不完整，建议 --full 重新分词")
+    if manifest is not None:
+        plan = manifest.plan(args.csv_dir, data_files)
+        print(f"[INFO] 增量入库：{len(plan)}/{len(data_files)} 个文件需要处理，已入库文档 {len(manifest.seen_ids)} 篇")
+    else:
+        plan = [(data_file, 0) for data_file in data_files]
+
+    pending = []   # 上一次 checkpoint 之后的新文档
+    if args.workers > 1:
+        cache_stats = parallel_cut(
+            args.csv_dir, plan, vocab, content, pending,
+            args.workers, args.flush_every, args.chunk_rows,
+            args.cache_size, args.cache_db, manifest, args.flush_docs
+        )
+    else:
+        init_cache(args.cache_size, args.cache_db)
+        for i, (data_file, start_row) in enumerate(plan, start=1):
+            print(data_file)
+            chunks=iter_csv_chunks(data_file, args.csv_dir, args.chunk_rows, start_row)
+            rows=cut_process(data_file,chunks,vocab,pending,manifest,content,args.flush_docs)
+            if manifest is not None:
+                manifest.mark_file(data_file, start_row + rows)
+            if args.flush_every and i % args.flush_every == 0:
+                checkpoint(vocab, content, pending, manifest)
+
+        cache_stats = token_cache.stats() if token_cache is not None else None
+        if token_cache is not None:
+            token_cache.close()
+
+    checkpoint(vocab, content, pending, manifest)
+    print(f"[OK] 词表大小: {len(vocab)}")
+    if cache_stats:
+        print(format_stats(cache_stats))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
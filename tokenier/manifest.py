@@ -0,0 +1,106 @@
+import json
+import os
+from collections import Counter
+from typing import Dict, List, Tuple
+
+
+class IngestManifest:
+    """
+    增量入库清单：
+    {
+      "files": {"a.csv": {"size": .., "mtime": .., "rows": 已处理数据行数}},
+      "seen_ids": ["QepDf0lkj", ...],
+      "content_docs": 上次落盘时 content.json 的文档数
+    }
+    重跑时只处理新文件、或已有文件追加的行；已见过的 微博id 直接跳过
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files: Dict[str, dict] = {}
+        self.seen_ids = set()
+        self.content_docs = None
+        self.pending_stat: Dict[str, Tuple[int, float]] = {}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.files = data.get("files", {})
+        self.seen_ids = set(data.get("seen_ids", []))
+        self.content_docs = data.get("content_docs")
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"files": self.files, "seen_ids": sorted(self.seen_ids), "content_docs": self.content_docs},
+                f,
+                ensure_ascii=False
+            )
+        os.replace(tmp_path, self.path)
+
+    # ======================
+    # 计划：哪些文件、从哪一行开始
+    # ======================
+
+    def plan(self, csv_dir: str, data_files: List[str]) -> List[Tuple[str, int]]:
+        """
+        返回 [(data_file, start_row), ...]
+        - 新文件：从 0 开始
+        - size / mtime 未变：跳过
+        - 变大：视为追加，从上次处理到的行继续
+        - 变小：视为被重写，从头处理（已见 id 仍会被去重）
+        """
+        tasks = []
+        for data_file in data_files:
+            st = os.stat(os.path.join(csv_dir, data_file))
+            rec = self.files.get(data_file)
+            # 记下规划时的文件状态，处理期间爬虫继续追加的行留给下一次
+            self.pending_stat[data_file] = (st.st_size, st.st_mtime)
+
+            if rec is None:
+                tasks.append((data_file, 0))
+            elif rec["size"] == st.st_size and rec["mtime"] == st.st_mtime:
+                continue
+            elif st.st_size > rec["size"]:
+                tasks.append((data_file, rec["rows"]))
+            else:
+                tasks.append((data_file, 0))
+        return tasks
+
+    def mark_file(self, data_file: str, rows: int):
+        size, mtime = self.pending_stat.pop(data_file)
+        self.files[data_file] = {
+            "size": size,
+            "mtime": mtime,
+            "rows": rows,
+        }
+
+    # ======================
+    # 按 微博id 去重
+    # ======================
+
+    def filter_new(self, docs_info: List[dict], word_counter: Counter):
+        """
+        丢弃已入库的文档，并登记新 id；
+        有文档被丢弃时按保留文档重建词频（顺序与逐行累加一致）
+        """
+        kept = []
+        for doc in docs_info:
+            code = str(doc["id"])
+            if code in self.seen_ids:
+                continue
+            self.seen_ids.add(code)
+            kept.append(doc)
+
+        if len(kept) == len(docs_info):
+            return kept, word_counter
+
+        counter = Counter()
+        for doc in kept:
+            counter.update(doc["words"])
+        return kept, counter
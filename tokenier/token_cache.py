@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import sqlite3
+from collections import OrderedDict
+from typing import Callable, List
+
+
+class TokenCache:
+    """
+    分词结果缓存：key = hash(命名空间 + 去 URL 后的文本)
+    - 内存层：LRU，容量 max_size 条（0 表示不用内存层）
+    - 磁盘层（可选）：sqlite 文件，跨运行、跨进程共享
+    命名空间用来区分不同的分词规则（例如训练用的停用词过滤 vs 推理用的原始切词），
+    停用词表变化时换一个命名空间即可让旧结果自然失效
+    """
+
+    FLUSH_EVERY = 1000
+
+    def __init__(self, namespace: str = "", max_size: int = 100000, db_path: str = None):
+        self.namespace = namespace
+        self.max_size = max_size
+        self.db_path = db_path
+
+        self.lru = OrderedDict()
+        self.pending = []
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.conn = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self.conn = sqlite3.connect(db_path, timeout=30)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS tokens (key BLOB PRIMARY KEY, value TEXT)"
+            )
+            self.conn.commit()
+
+    def key(self, text: str) -> bytes:
+        return hashlib.blake2b(
+            (self.namespace + "\x00" + text).encode("utf-8"),
+            digest_size=16
+        ).digest()
+
+    # ======================
+    # 读写
+    # ======================
+
+    def get(self, text: str):
+        k = self.key(text)
+
+        tokens = self.lru.get(k)
+        if tokens is not None:
+            self.lru.move_to_end(k)
+            self.hits += 1
+            return tokens
+
+        if self.conn is not None:
+            row = self.conn.execute(
+                "SELECT value FROM tokens WHERE key = ?", (k,)
+            ).fetchone()
+            if row is not None:
+                tokens = json.loads(row[0])
+                self._remember(k, tokens)
+                self.disk_hits += 1
+                return tokens
+
+        self.misses += 1
+        return None
+
+    def put(self, text: str, tokens: List[str]):
+        k = self.key(text)
+        self._remember(k, tokens)
+
+        if self.conn is not None:
+            self.pending.append((k, json.dumps(tokens, ensure_ascii=False)))
+            if len(self.pending) >= self.FLUSH_EVERY:
+                self.flush()
+
+    def get_or_cut(self, text: str, cut_fn: Callable[[str], List[str]]) -> List[str]:
+        tokens = self.get(text)
+        if tokens is None:
+            tokens = cut_fn(text)
+            self.put(text, tokens)
+        return tokens
+
+    def _remember(self, k: bytes, tokens: List[str]):
+        if self.max_size <= 0:
+            return
+        self.lru[k] = tokens
+        self.lru.move_to_end(k)
+        if len(self.lru) > self.max_size:
+            self.lru.popitem(last=False)
+
+    def flush(self):
+        if self.conn is None or not self.pending:
+            return
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO tokens (key, value) VALUES (?, ?)",
+            self.pending
+        )
+        self.conn.commit()
+        self.pending = []
+
+    def close(self):
+        self.flush()
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    # ======================
+    # 统计
+    # ======================
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
+
+    def report(self) -> str:
+        return format_stats(self.stats())
+
+
+def format_stats(stats: dict) -> str:
+    total = stats["hits"] + stats["disk_hits"] + stats["misses"]
+    rate = (stats["hits"] + stats["disk_hits"]) / total if total else 0.0
+    return (
+        f"[INFO] 分词缓存：内存命中 {stats['hits']}，磁盘命中 {stats['disk_hits']}，"
+        f"未命中 {stats['misses']}，命中率 {rate:.1%}"
+    )
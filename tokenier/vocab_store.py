@@ -0,0 +1,91 @@
+import json
+import os
+from collections import Counter
+from typing import Dict, Iterable
+
+
+class VocabStore:
+    """
+    内存词表：word -> id 哈希索引，O(1) 分配 id 与累加词频
+    落盘格式与 TinyDB 完全一致：{"_default": {"1": {"word": .., "freq": .., "lang": "ch"}}}
+    vocab/json_structure.py 可直接读取
+    """
+
+    TABLE = "_default"
+
+    def __init__(self, path: str, lang: str = "ch"):
+        self.path = path
+        self.lang = lang
+        self.word2id: Dict[str, int] = {}
+        self.records: Dict[int, dict] = {}
+        self.next_id = 1          # TinyDB 的 doc_id 从 1 开始
+        self.dirty = False
+        self.load()
+
+    # ======================
+    # 读写
+    # ======================
+
+    def load(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        for doc_id, info in data.get(self.TABLE, {}).items():
+            wid = int(doc_id)
+            self.records[wid] = info
+            self.word2id[info["word"]] = wid
+            self.next_id = max(self.next_id, wid + 1)
+
+    def flush(self):
+        """
+        一次性写回磁盘；先写临时文件再替换，中途失败不会损坏旧词表
+        """
+        if not self.dirty:
+            return
+
+        table = {str(wid): info for wid, info in self.records.items()}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({self.TABLE: table}, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    # ======================
+    # 词表操作
+    # ======================
+
+    def add(self, word: str, freq: int = 1) -> int:
+        wid = self.word2id.get(word)
+        if wid is None:
+            wid = self.next_id
+            self.next_id += 1
+            self.word2id[word] = wid
+            self.records[wid] = {"word": word, "freq": freq, "lang": self.lang}
+        else:
+            self.records[wid]["freq"] += freq
+        self.dirty = True
+        return wid
+
+    def update(self, word_counter: Counter):
+        for word, freq in word_counter.items():
+            self.add(word, freq)
+
+    def get_id(self, word: str):
+        return self.word2id.get(word)
+
+    def freq(self, word: str) -> int:
+        wid = self.word2id.get(word)
+        return self.records[wid]["freq"] if wid is not None else 0
+
+    def words(self) -> Iterable[str]:
+        return self.word2id.keys()
+
+    def __len__(self):
+        return len(self.word2id)
+
+    def __contains__(self, word):
+        return word in self.word2id
@@ -2,8 +2,6 @@ import argparse
 import json
 import os
 import matplotlib.pyplot as plt
-from sklearn.manifold import TSNE
-from wordcloud import WordCloud
 import numpy as np
 from matplotlib import font_manager, rcParams
 import warnings
@@ -93,6 +91,8 @@ def plot_all_topic_wordclouds(topics_labeled, output_dir):
       }
     }
     """
+    from wordcloud import WordCloud
+
     os.makedirs(output_dir, exist_ok=True)
 
     font_path = os.path.join(
@@ -143,6 +143,8 @@ def plot_tsne(
     - 每个主题显示中心标签
     - 可选：少量点编号
     """
+    from sklearn.manifold import TSNE
+
     os.makedirs(output_dir, exist_ok=True)
 
     # ---------------------------
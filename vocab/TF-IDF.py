@@ -1,7 +1,16 @@
 import json
-import math
+import os
+import shutil
+import sys
 import argparse
-from typing import Dict, List, Set
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.corpus import CsrCorpus, CorpusWriter, is_corpus_dir
+from core import tfidf as tfidf_engine
+from core.tinydb_stream import JsonArrayWriter
 
 
 # ======================
@@ -49,43 +58,40 @@ def normalize_docs(docs):
 
 
 # ======================
-# DF / IDF / TF-IDF
+# 统计量：全部在 CSR 数组上向量化计算（core/tfidf.py）
 # ======================
 
-def compute_df(docs: List[Dict[str, int]]) -> Dict[str, int]:
-    df = {}
-    for doc in docs:
-        for wid in doc:
-            df[wid] = df.get(wid, 0) + 1
-    return df
-
-
-def compute_idf(df: Dict[str, int], doc_count: int) -> Dict[str, float]:
-    return {
-        wid: math.log((doc_count + 1) / (c + 1)) + 1
-        for wid, c in df.items()
-    }
+def compute_stats(X):
+    """
+    freq.json 构建的 CSR 矩阵 -> (df, tfidf, order) 数组
+    """
+    df, _, tfidf, order = tfidf_engine.term_stats(X)
+    return df, tfidf, order
 
 
-def compute_tfidf(
-    docs: List[Dict[str, int]],
-    idf: Dict[str, float]
-) -> Dict[str, float]:
+def compute_stats_csr(corpus: CsrCorpus):
     """
-    词级 TF-IDF（全语料累计）
+    二进制语料按块 mmap 读取，返回与 compute_stats 相同的数组
     """
-    tfidf = {}
+    n_terms = corpus.num_terms
+    doc_count = corpus.n_docs
 
-    for doc in docs:
-        doc_len = sum(doc.values())
-        if doc_len == 0:
-            continue
+    df = np.zeros(n_terms, dtype=np.int64)
+    order = np.full(n_terms, len(corpus.ids), dtype=np.int64)
+    for start, _, ids, _ in corpus.iter_blocks():
+        block_df = tfidf_engine.block_df(ids, n_terms)
+        df += block_df
+        block_order = tfidf_engine.first_seen(ids, n_terms) + int(corpus.offsets[start])
+        block_order[block_df == 0] = len(corpus.ids)   # 本块没出现的词用全局哨兵，避免 min 时抢占
+        np.minimum(order, block_order, out=order)
+
+    idf = tfidf_engine.compute_idf(df, doc_count)
 
-        for wid, tf in doc.items():
-            tf_norm = tf / doc_len
-            tfidf[wid] = tfidf.get(wid, 0.0) + tf_norm * idf.get(wid, 0.0)
+    tfidf = np.zeros(n_terms, dtype=np.float64)
+    for _, offsets, ids, counts in corpus.iter_blocks():
+        tfidf += tfidf_engine.block_tfidf(offsets, ids, counts, idf)
 
-    return tfidf
+    return df, tfidf_engine.round_scores(tfidf), order
 
 
 # ======================
@@ -93,39 +99,50 @@ def compute_tfidf(
 # ======================
 
 def select_vocab(
-    tfidf: Dict[str, float],
-    df: Dict[str, int],
+    tfidf: np.ndarray,
+    df: np.ndarray,
     doc_count: int,
     min_df: int,
     max_df_ratio: float,
     min_tfidf: float,
     target_min: int,
-    target_max: int
+    target_max: int,
+    order: np.ndarray = None,
+    auto_threshold: bool = False
 ) -> List[str]:
     """
     返回：按 TF-IDF 排序后的 old_id 列表
+    auto_threshold=True 时先在统计数组上自动放宽阈值，保证落在 [target_min, target_max]
     """
+    if auto_threshold:
+        new_min_df, new_ratio, new_min_tfidf = tfidf_engine.search_thresholds(
+            df, tfidf, doc_count,
+            min_df=min_df,
+            max_df_ratio=max_df_ratio,
+            min_tfidf=min_tfidf,
+            target_min=target_min
+        )
+        if (new_min_df, new_ratio, new_min_tfidf) != (min_df, max_df_ratio, min_tfidf):
+            print(
+                f"[INFO] 自动阈值: min_df {min_df} -> {new_min_df}，"
+                f"max_df_ratio {max_df_ratio} -> {new_ratio:.6g}，"
+                f"min_tfidf {min_tfidf} -> {new_min_tfidf:.6g}"
+            )
+        min_df, max_df_ratio, min_tfidf = new_min_df, new_ratio, new_min_tfidf
+
+    ordered = tfidf_engine.select_terms(
+        df, tfidf, doc_count,
+        min_df=min_df,
+        max_df_ratio=max_df_ratio,
+        min_tfidf=min_tfidf,
+        target_max=target_max,
+        order=order
+    )
 
-    # 规则过滤
-    candidates = [
-        wid for wid, score in tfidf.items()
-        if df.get(wid, 0) >= min_df
-        and df.get(wid, 0) <= doc_count * max_df_ratio
-        and score >= min_tfidf
-    ]
-
-    print(f"[INFO] 规则过滤后词数: {len(candidates)}")
-
-    # 按 TF-IDF 排序
-    candidates.sort(key=lambda w: tfidf[w], reverse=True)
-
-    # 强制压缩到目标区间
-    if len(candidates) > target_max:
-        candidates = candidates[:target_max]
-    elif len(candidates) < target_min:
+    if len(ordered) < target_min:
         print("[WARN] 词表小于目标下限，请检查阈值")
 
-    return candidates
+    return [str(w) for w in ordered.tolist()]
 
 
 # ======================
@@ -134,35 +151,124 @@ def select_vocab(
 
 def rebuild_vocab_and_docs(
     vocab: Dict[str, str],
-    docs: List[Dict[str, int]],
+    X,
     ordered_old_ids: List[str]
 ):
     """
-    old_id -> new_id（0..N-1）
+    old_id -> new_id（0..N-1），查表数组一次完成重编号
     """
-
-    old_to_new = {
-        old_id: str(new_id)
+    new_vocab = {
+        str(new_id): vocab[old_id]
         for new_id, old_id in enumerate(ordered_old_ids)
     }
 
-    # 新 vocab
+    new_X, _ = tfidf_engine.remap_matrix(X, [int(w) for w in ordered_old_ids])
+    return new_vocab, tfidf_engine.matrix_to_docs(new_X)
+
+
+def rebuild_corpus_csr(
+    vocab: Dict[str, str],
+    corpus: CsrCorpus,
+    ordered_old_ids: List[str],
+    out_dir: str
+):
+    """
+    old_id -> new_id 查表数组重编号，去掉词表外的词与空文档，按块写出新语料
+    """
+    lut = tfidf_engine.build_lut([int(w) for w in ordered_old_ids], corpus.num_terms)
+
     new_vocab = {
         str(new_id): vocab[old_id]
         for new_id, old_id in enumerate(ordered_old_ids)
     }
 
-    # 新 docs
-    new_docs = []
-    for doc in docs:
-        new_doc = {}
-        for old_id, tf in doc.items():
-            if old_id in old_to_new:
-                new_doc[old_to_new[old_id]] = tf
-        if new_doc:
-            new_docs.append(new_doc)
+    with CorpusWriter(out_dir, vocab_size=len(new_vocab)) as writer:
+        for start, offsets, ids, counts in corpus.iter_blocks():
+            n = len(offsets) - 1
+            new_offsets, new_ids, new_counts, non_empty = tfidf_engine.remap_block(
+                offsets, ids, counts, lut
+            )
+            writer.add_block(
+                new_offsets,
+                new_ids,
+                new_counts,
+                corpus.times[start:start + n][non_empty],
+                corpus.weibo_ids[start:start + n][non_empty],
+            )
+
+    return new_vocab, writer.meta
+
+
+# ======================
+# 分片模式（语料大于内存）
+# ======================
+
+def write_freq_json(corpus: CsrCorpus, path: str):
+    """
+    二进制语料 -> freq.json，按块流式写出
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        writer = JsonArrayWriter(f)
+        for _, offsets, ids, counts in corpus.iter_blocks():
+            X = tfidf_engine.build_matrix(offsets, np.asarray(ids), np.asarray(counts), corpus.num_terms)
+            for doc in tfidf_engine.matrix_to_docs(X):
+                writer.write(doc)
+        writer.close()
+
+
+def run_sharded(args, vocab: Dict[str, str]):
+    """
+    freq.json 先流式转成二进制语料；之后分片统计、选词、分片重编号，
+    全程不把整个语料放进内存
+    """
+    from core.corpus import convert_freq_json
+    from core.tfidf_shard import sharded_rewrite, sharded_stats
+
+    json_input = not is_corpus_dir(args.docs)
+    if json_input:
+        corpus_dir = f"{args.out_dir}/_shard_input"
+        meta = convert_freq_json(args.vocab, args.docs, corpus_dir, keep_empty=True)
+        print(f"[INFO] freq.json 已流式转换为二进制语料（{meta['n_docs']} 篇）")
+    else:
+        corpus_dir = args.docs
+
+    doc_count = CsrCorpus(corpus_dir).n_docs
+    print(f"[INFO] 文档数: {doc_count}")
+    print(f"[INFO] 原词表大小: {len(vocab)}")
+
+    df, tfidf, order = sharded_stats(corpus_dir, args.shard_docs, args.workers)
+
+    ordered_old_ids = select_vocab(
+        tfidf=tfidf,
+        df=df,
+        doc_count=doc_count,
+        min_df=args.min_df,
+        max_df_ratio=args.max_df_ratio,
+        min_tfidf=args.min_tfidf,
+        target_min=args.target_min,
+        target_max=args.target_max,
+        order=order,
+        auto_threshold=args.auto_threshold
+    )
+
+    out_corpus = f"{args.out_dir}/corpus_tfidf"
+    meta = sharded_rewrite(
+        corpus_dir, [int(w) for w in ordered_old_ids], out_corpus,
+        args.shard_docs, args.workers
+    )
+
+    if json_input:
+        write_freq_json(CsrCorpus(out_corpus), f"{args.out_dir}/freq_tfidf.json")
+        shutil.rmtree(corpus_dir)
+
+    new_vocab = {
+        str(new_id): vocab[old_id]
+        for new_id, old_id in enumerate(ordered_old_ids)
+    }
+    save_json(new_vocab, f"{args.out_dir}/vocab_tfidf.json")
 
-    return new_vocab, new_docs
+    print(f"[OK] 最终词表大小: {len(new_vocab)}")
+    print(f"[OK] 最终文档数: {meta['n_docs']}")
 
 
 # ======================
@@ -175,7 +281,7 @@ def main():
     )
 
     parser.add_argument("--vocab", required=True)
-    parser.add_argument("--docs", required=True)
+    parser.add_argument("--docs", required=True, help="freq.json 或二进制语料目录（core/corpus.py）")
     parser.add_argument("--out_dir", required=True)
 
     parser.add_argument("--min_df", type=int, default=10)
@@ -184,24 +290,46 @@ def main():
 
     parser.add_argument("--target_min", type=int, default=10000)
     parser.add_argument("--target_max", type=int, default=12000)
+    parser.add_argument("--auto_threshold", action="store_true",
+                        help="词数不足 target_min 时自动放宽阈值（min_tfidf -> min_df -> max_df_ratio）")
+
+    parser.add_argument("--shard_docs", type=int, default=0,
+                        help="分片模式：每个分片的文档数（0 = 整体载入内存计算）")
+    parser.add_argument("--workers", type=int, default=1, help="分片模式下的进程数")
 
     args = parser.parse_args()
 
     vocab = load_json(args.vocab)
-    docs_raw = load_json(args.docs)
 
     if not isinstance(vocab, dict):
         raise TypeError("vocab.json 必须是 dict {id: word}")
 
-    docs = normalize_docs(docs_raw)
-    doc_count = len(docs)
+    if args.shard_docs > 0:
+        run_sharded(args, vocab)
+        return
+
+    csr_mode = is_corpus_dir(args.docs)
+    if csr_mode:
+        corpus = CsrCorpus(args.docs)
+        doc_count = corpus.n_docs
+    else:
+        docs = normalize_docs(load_json(args.docs))
+        doc_count = len(docs)
 
     print(f"[INFO] 文档数: {doc_count}")
     print(f"[INFO] 原词表大小: {len(vocab)}")
 
-    df = compute_df(docs)
-    idf = compute_idf(df, doc_count)
-    tfidf = compute_tfidf(docs, idf)
+    if csr_mode:
+        df, tfidf, order = compute_stats_csr(corpus)
+    else:
+        offsets, ids, counts = tfidf_engine.docs_to_arrays(docs)
+        del docs
+        n_terms = max(
+            max((int(w) for w in vocab), default=-1),
+            int(np.max(ids, initial=-1))
+        ) + 1
+        X = tfidf_engine.build_matrix(offsets, ids, counts, n_terms=n_terms)
+        df, tfidf, order = compute_stats(X)
 
     ordered_old_ids = select_vocab(
         tfidf=tfidf,
@@ -211,18 +339,27 @@ def main():
         max_df_ratio=args.max_df_ratio,
         min_tfidf=args.min_tfidf,
         target_min=args.target_min,
-        target_max=args.target_max
+        target_max=args.target_max,
+        order=order,
+        auto_threshold=args.auto_threshold
     )
 
-    new_vocab, new_docs = rebuild_vocab_and_docs(
-        vocab, docs, ordered_old_ids
-    )
+    if csr_mode:
+        new_vocab, meta = rebuild_corpus_csr(
+            vocab, corpus, ordered_old_ids, f"{args.out_dir}/corpus_tfidf"
+        )
+        new_doc_count = meta["n_docs"]
+    else:
+        new_vocab, new_docs = rebuild_vocab_and_docs(
+            vocab, X, ordered_old_ids
+        )
+        save_json(new_docs, f"{args.out_dir}/freq_tfidf.json")
+        new_doc_count = len(new_docs)
 
     save_json(new_vocab, f"{args.out_dir}/vocab_tfidf.json")
-    save_json(new_docs, f"{args.out_dir}/freq_tfidf.json")
 
     print(f"[OK] 最终词表大小: {len(new_vocab)}")
-    print(f"[OK] 最终文档数: {len(new_docs)}")
+    print(f"[OK] 最终文档数: {new_doc_count}")
 
 
 if __name__ == "__main__":
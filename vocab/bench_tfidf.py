@@ -0,0 +1,221 @@
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core import tfidf as tfidf_engine
+
+
+# =========================================================
+# TF-IDF 基准：原 dict 实现 vs core/tfidf.py 向量化引擎
+# 合成语料：词 id 服从 Zipf 分布，每篇约 avg_len 个不同词
+# dict 实现在大规模下内存吃不消，超过 --dict_max_docs 只跑向量化引擎
+# --shard_docs > 0 时测分片 map-reduce 模式在不同进程数下的吞吐
+# =========================================================
+
+
+# ======================
+# 原 dict 实现（改造前的 vocab/TF-IDF.py，作为基准与正确性参照）
+# ======================
+
+def dict_compute_df(docs):
+    df = {}
+    for doc in docs:
+        for wid in doc:
+            df[wid] = df.get(wid, 0) + 1
+    return df
+
+
+def dict_compute_idf(df, doc_count):
+    return {
+        wid: math.log((doc_count + 1) / (c + 1)) + 1
+        for wid, c in df.items()
+    }
+
+
+def dict_compute_tfidf(docs, idf):
+    tfidf = {}
+    for doc in docs:
+        doc_len = sum(doc.values())
+        if doc_len == 0:
+            continue
+        for wid, tf in doc.items():
+            tf_norm = tf / doc_len
+            tfidf[wid] = tfidf.get(wid, 0.0) + tf_norm * idf.get(wid, 0.0)
+    return tfidf
+
+
+def dict_select(tfidf, df, doc_count, min_df, max_df_ratio, min_tfidf, target_max):
+    candidates = [
+        wid for wid, score in tfidf.items()
+        if df.get(wid, 0) >= min_df
+        and df.get(wid, 0) <= doc_count * max_df_ratio
+        and score >= min_tfidf
+    ]
+    candidates.sort(key=lambda w: tfidf[w], reverse=True)
+    return candidates[:target_max]
+
+
+def dict_rebuild(docs, ordered_old_ids):
+    old_to_new = {old_id: str(new_id) for new_id, old_id in enumerate(ordered_old_ids)}
+    new_docs = []
+    for doc in docs:
+        new_doc = {}
+        for old_id, tf in doc.items():
+            if old_id in old_to_new:
+                new_doc[old_to_new[old_id]] = tf
+        if new_doc:
+            new_docs.append(new_doc)
+    return new_docs
+
+
+# ======================
+# 合成语料
+# ======================
+
+def synth_arrays(n_docs: int, vocab_size: int, avg_len: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    lens = rng.poisson(avg_len, size=n_docs) + 1
+    doc_index = np.repeat(np.arange(n_docs, dtype=np.int64), lens)
+    raw = (rng.zipf(1.1, size=len(doc_index)) - 1) % vocab_size
+
+    # 同一篇内重复的词合并成词频
+    key, counts = np.unique(doc_index * vocab_size + raw, return_counts=True)
+    ids = (key % vocab_size).astype(np.int32)
+    per_doc = np.bincount(key // vocab_size, minlength=n_docs)
+    offsets = np.zeros(n_docs + 1, dtype=np.int64)
+    np.cumsum(per_doc, out=offsets[1:])
+    return offsets, ids, counts.astype(np.int32)
+
+
+def arrays_to_docs(offsets, ids, counts):
+    return tfidf_engine.matrix_to_docs(tfidf_engine.build_matrix(offsets, ids, counts))
+
+
+# ======================
+# 计时
+# ======================
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, time.perf_counter() - start
+
+
+def run_engine(X, params):
+    df, _, tfidf, order = tfidf_engine.term_stats(X)
+    ordered = tfidf_engine.select_terms(df, tfidf, X.shape[0], order=order, **params)
+    new_X, _ = tfidf_engine.remap_matrix(X, ordered)
+    return df, tfidf, ordered, new_X
+
+
+def run_dict(docs, params):
+    df = dict_compute_df(docs)
+    idf = dict_compute_idf(df, len(docs))
+    tfidf = dict_compute_tfidf(docs, idf)
+    ordered = dict_select(tfidf, df, len(docs), **params)
+    return df, tfidf, ordered, dict_rebuild(docs, ordered)
+
+
+def bench(n_docs: int, args):
+    params = dict(
+        min_df=args.min_df,
+        max_df_ratio=args.max_df_ratio,
+        min_tfidf=args.min_tfidf,
+        target_max=args.target_max,
+    )
+    offsets, ids, counts = synth_arrays(n_docs, args.vocab_size, args.avg_len)
+    print(f"\n[INFO] 文档数 {n_docs}，非零项 {len(ids)}，词表 {args.vocab_size}")
+
+    X = tfidf_engine.build_matrix(offsets, ids, counts, n_terms=args.vocab_size)
+    (df_arr, tfidf_arr, ordered_arr, _), t_engine = timed(run_engine, X, params)
+    print(f"  向量化引擎（统计 + 选词 + 重编号）     {t_engine:8.2f}s")
+
+    if n_docs > args.dict_max_docs:
+        print(f"  dict 实现                              跳过（> --dict_max_docs {args.dict_max_docs}）")
+        return
+
+    docs = arrays_to_docs(offsets, ids, counts)
+    _, t_convert = timed(tfidf_engine.docs_to_arrays, docs)
+    (df_d, tfidf_d, ordered_d, _), t_dict = timed(run_dict, docs, params)
+    print(f"  freq.json -> CSR 数组                  {t_convert:8.2f}s")
+    print(f"  dict 实现（统计 + 选词 + 重编号）      {t_dict:8.2f}s")
+    print(f"  加速比（含转换）                       {t_dict / (t_engine + t_convert):8.1f}x")
+
+    # 正确性
+    keys = np.array([int(w) for w in tfidf_d], dtype=np.int64)
+    ref = np.array(list(tfidf_d.values()), dtype=np.float64)
+    max_err = float(np.max(np.abs(tfidf_arr[keys] - ref), initial=0.0))
+    df_ok = all(df_arr[int(w)] == c for w, c in df_d.items())
+    same_order = [str(w) for w in ordered_arr.tolist()] == ordered_d
+    print(f"  DF 一致: {df_ok}  TF-IDF 最大误差: {max_err:.3e}  选词顺序一致: {same_order}")
+
+
+def bench_sharded(n_docs: int, args):
+    """
+    分片模式：合成语料先写成二进制语料，再按不同进程数跑 map-reduce 统计
+    选词顺序必须与整块计算完全相同，否则报错
+    """
+    import shutil
+    import tempfile
+    from core.corpus import CorpusWriter
+    from core.tfidf_shard import sharded_stats
+
+    offsets, ids, counts = synth_arrays(n_docs, args.vocab_size, args.avg_len)
+    params = dict(
+        min_df=args.min_df,
+        max_df_ratio=args.max_df_ratio,
+        min_tfidf=args.min_tfidf,
+        target_max=args.target_max,
+    )
+    X = tfidf_engine.build_matrix(offsets, ids, counts, n_terms=args.vocab_size)
+    ref_df, _, ref, ref_order = tfidf_engine.term_stats(X)
+    ref_selected = tfidf_engine.select_terms(ref_df, ref, n_docs, order=ref_order, **params)
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_tfidf_")
+    try:
+        corpus_dir = os.path.join(tmp_dir, "corpus")
+        with CorpusWriter(corpus_dir, vocab_size=args.vocab_size) as writer:
+            writer.add_block(offsets, ids, counts)
+        del X, offsets, ids, counts
+
+        print(f"\n[INFO] 分片模式：文档数 {n_docs}，每片 {args.shard_docs} 篇")
+        for workers in args.workers:
+            (df, tfidf, order), t = timed(sharded_stats, corpus_dir, args.shard_docs, workers)
+            rel_err = float(np.max(np.abs(tfidf - ref) / np.maximum(ref, 1e-12), initial=0.0))
+            selected = tfidf_engine.select_terms(df, tfidf, n_docs, order=order, **params)
+            same_order = np.array_equal(selected, ref_selected)
+            print(f"  {workers} 进程  {t:8.2f}s  {n_docs / t:10.0f} 篇/s  相对误差 {rel_err:.1e}  选词顺序一致: {same_order}")
+            assert same_order, f"分片统计（{workers} 进程）选词顺序与整块计算不同"
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TF-IDF 向量化引擎基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--vocab_size", type=int, default=200000)
+    parser.add_argument("--avg_len", type=int, default=40)
+    parser.add_argument("--dict_max_docs", type=int, default=100000)
+    parser.add_argument("--min_df", type=int, default=10)
+    parser.add_argument("--max_df_ratio", type=float, default=0.4)
+    parser.add_argument("--min_tfidf", type=float, default=0.02)
+    parser.add_argument("--target_max", type=int, default=12000)
+    parser.add_argument("--shard_docs", type=int, default=0,
+                        help="> 0 时改为测分片 map-reduce 模式（core/tfidf_shard.py）")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    for n_docs in args.sizes:
+        if args.shard_docs > 0:
+            bench_sharded(n_docs, args)
+        else:
+            bench(n_docs, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+import json
+import os
+import sys
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.corpus import CsrCorpus, CorpusWriter, is_corpus_dir
+
+
+# =========================================================
+# 近重复文档检测：MinHash 签名 + 分带 LSH
+# 转发链 / 复制粘贴的新闻在分词后词集合几乎相同，
+# 签名只看词集合（不看词频），Jaccard 近似 = 签名相同位置的比例
+# =========================================================
+
+HASH_PRIME = np.uint64(4294967311)     # > 2^32 的素数
+MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+def load_json(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_json(data, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def freq_json_to_arrays(docs):
+    """
+    freq.json [ {id: freq}, ... ] -> CSR 三元组
+    """
+    lens = np.fromiter((len(d) for d in docs), dtype=np.int64, count=len(docs))
+    offsets = np.zeros(len(docs) + 1, dtype=np.int64)
+    np.cumsum(lens, out=offsets[1:])
+    ids = np.fromiter((int(k) for d in docs for k in d), dtype=np.int32, count=int(offsets[-1]))
+    counts = np.fromiter((int(v) for d in docs for v in d.values()), dtype=np.int32, count=int(offsets[-1]))
+    return offsets, ids, counts
+
+
+def iter_blocks(offsets, ids, counts, block_docs):
+    n_docs = len(offsets) - 1
+    for start in range(0, n_docs, block_docs):
+        end = min(start + block_docs, n_docs)
+        lo, hi = int(offsets[start]), int(offsets[end])
+        yield start, np.asarray(offsets[start:end + 1]) - lo, ids[lo:hi], counts[lo:hi]
+
+
+# ======================
+# 签名
+# ======================
+
+def minhash_signatures(blocks, n_docs: int, num_perm: int = 64, seed: int = 42) -> np.ndarray:
+    """
+    返回 uint32[n_docs, num_perm]；空文档整行为 0xFFFFFFFF
+    h_k(x) = (a_k * x + b_k) mod P，逐块向量化后按文档 reduceat 取最小值
+    """
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, 2 ** 32 - 1, size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, 2 ** 32 - 1, size=num_perm, dtype=np.uint64)
+
+    sig = np.full((n_docs, num_perm), MAX_HASH, dtype=np.uint32)
+
+    for start, offsets, ids, _ in blocks:
+        lens = np.diff(offsets)
+        non_empty = np.flatnonzero(lens)
+        if len(non_empty) == 0:
+            continue
+        h = (a[None, :] * ids.astype(np.uint64)[:, None] + b[None, :]) % HASH_PRIME
+        h = np.minimum(h, MAX_HASH).astype(np.uint32)
+        sig[start + non_empty] = np.minimum.reduceat(h, offsets[non_empty], axis=0)
+
+    return sig
+
+
+# ======================
+# LSH 分带 -> 连通分量
+# ======================
+
+def lsh_clusters(sig: np.ndarray, doc_lens: np.ndarray, bands: int, threshold: float):
+    """
+    同一个 band 哈希相同的文档成为候选对，再用签名估计 Jaccard 验证；
+    只连"桶内首个文档 - 其余文档"的边，边数 O(n * bands)，无需两两比较
+    返回 labels（连通分量编号，同簇同号）
+    """
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    n_docs, num_perm = sig.shape
+    rows = num_perm // bands
+    valid = np.flatnonzero(doc_lens > 0)
+
+    src, dst = [], []
+    for band in range(bands):
+        part = sig[valid, band * rows:(band + 1) * rows].astype(np.uint64)
+
+        # 多项式滚动哈希，把一个 band 压成一个 uint64
+        key = np.zeros(len(valid), dtype=np.uint64)
+        for col in range(rows):
+            key = key * np.uint64(1000003) + part[:, col]
+
+        order = np.argsort(key, kind="stable")
+        sorted_key = key[order]
+        group_start = np.concatenate(([True], sorted_key[1:] != sorted_key[:-1]))
+        group_id = np.cumsum(group_start) - 1
+        first = order[np.flatnonzero(group_start)][group_id]
+
+        member = first != order
+        src.append(valid[first[member]])
+        dst.append(valid[order[member]])
+
+    src = np.concatenate(src) if src else np.zeros(0, dtype=np.int64)
+    dst = np.concatenate(dst) if dst else np.zeros(0, dtype=np.int64)
+
+    # 签名验证，剔除 band 碰撞带来的假阳性
+    if len(src):
+        pairs = np.unique(np.stack([src, dst], axis=1), axis=0)
+        src, dst = pairs[:, 0], pairs[:, 1]
+        sim = (sig[src] == sig[dst]).mean(axis=1)
+        keep = sim >= threshold
+        src, dst = src[keep], dst[keep]
+
+    graph = coo_matrix(
+        (np.ones(len(src), dtype=np.int8), (src, dst)),
+        shape=(n_docs, n_docs)
+    )
+    _, labels = connected_components(graph, directed=False)
+    return labels
+
+
+# ======================
+# 去重 / 合并
+# ======================
+
+def dedup_arrays(offsets, ids, counts, labels, mode: str, block_docs: int = 4096):
+    """
+    mode = "drop"     : 每簇只保留编号最小的文档
+    mode = "collapse" : 每簇合并为一篇，词频为簇内各文档之和（保留代表文档的位置 / 时间 / id）
+                        簇的"权重"就体现在累加的词频里，下游 TF-IDF / LDA 照常读取，不需要额外的权重文件
+    返回 (保留的代表文档下标, 新 offsets, 新 ids, 新 counts)
+    """
+    n_docs = len(offsets) - 1
+    # 每个簇的代表 = 簇内最小下标
+    rep_of_label = np.full(labels.max() + 1 if n_docs else 0, n_docs, dtype=np.int64)
+    np.minimum.at(rep_of_label, labels, np.arange(n_docs))
+    rep = rep_of_label[labels]
+    keep_docs = np.flatnonzero(rep == np.arange(n_docs))
+
+    if mode == "drop":
+        lens = np.diff(offsets)[keep_docs]
+        new_offsets = np.zeros(len(keep_docs) + 1, dtype=np.int64)
+        np.cumsum(lens, out=new_offsets[1:])
+        token_mask = np.repeat(rep == np.arange(n_docs), np.diff(offsets))
+        return keep_docs, new_offsets, np.asarray(ids)[token_mask], np.asarray(counts)[token_mask]
+
+    # collapse：(代表文档, 词 id) 为键累加词频
+    doc_index = np.repeat(np.arange(n_docs), np.diff(offsets))
+    new_doc = np.searchsorted(keep_docs, rep[doc_index])
+    key = new_doc.astype(np.int64) * (int(np.max(ids, initial=0)) + 1) + np.asarray(ids, dtype=np.int64)
+    uniq, inverse = np.unique(key, return_inverse=True)
+    summed = np.bincount(inverse, weights=np.asarray(counts, dtype=np.float64)).astype(np.int32)
+
+    vocab_span = int(np.max(ids, initial=0)) + 1
+    new_doc_of_uniq = uniq // vocab_span
+    new_ids = (uniq % vocab_span).astype(np.int32)
+    lens = np.bincount(new_doc_of_uniq, minlength=len(keep_docs))
+    new_offsets = np.zeros(len(keep_docs) + 1, dtype=np.int64)
+    np.cumsum(lens, out=new_offsets[1:])
+    return keep_docs, new_offsets, new_ids, summed
+
+
+def report(n_docs, nnz, keep_docs, new_nnz, labels):
+    cluster_sizes = np.bincount(labels) if len(labels) else np.zeros(0, dtype=np.int64)
+    dup_clusters = int((cluster_sizes > 1).sum())
+    info = {
+        "docs_before": int(n_docs),
+        "docs_after": int(len(keep_docs)),
+        "dup_clusters": dup_clusters,
+        "largest_cluster": int(cluster_sizes.max()) if len(cluster_sizes) else 0,
+        "nnz_before": int(nnz),
+        "nnz_after": int(new_nnz),
+        "doc_reduction": 1 - len(keep_docs) / n_docs if n_docs else 0.0,
+        "nnz_reduction": 1 - new_nnz / nnz if nnz else 0.0,
+    }
+    print(f"[INFO] 近重复簇: {dup_clusters} 个，最大簇 {info['largest_cluster']} 篇")
+    print(f"[OK] 文档数 {info['docs_before']} -> {info['docs_after']}（减少 {info['doc_reduction']:.1%}）")
+    print(f"[OK] 非零项 {info['nnz_before']} -> {info['nnz_after']}（减少 {info['nnz_reduction']:.1%}）")
+    return info
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="近重复文档去重（MinHash + LSH），在 TF-IDF / LDA 之前运行"
+    )
+    parser.add_argument("--docs", required=True, help="freq.json 或二进制语料目录")
+    parser.add_argument("--out", required=True, help="输出 freq.json 或语料目录（与输入同格式）")
+    parser.add_argument("--mode", choices=["drop", "collapse"], default="drop",
+                        help="drop 每簇只留一篇；collapse 每簇合并为一篇，词频为簇内之和")
+    parser.add_argument("--num_perm", type=int, default=64, help="MinHash 签名长度")
+    parser.add_argument("--bands", type=int, default=16, help="LSH 分带数（num_perm 需能整除）")
+    parser.add_argument("--threshold", type=float, default=0.8, help="签名估计 Jaccard 阈值")
+    parser.add_argument("--block_docs", type=int, default=1024, help="计算签名时每块文档数")
+    args = parser.parse_args()
+
+    if args.num_perm % args.bands:
+        parser.error("--num_perm 必须能被 --bands 整除")
+
+    csr_mode = is_corpus_dir(args.docs)
+    if csr_mode:
+        corpus = CsrCorpus(args.docs)
+        offsets, ids, counts = corpus.offsets, corpus.ids, corpus.counts
+    else:
+        offsets, ids, counts = freq_json_to_arrays(load_json(args.docs))
+
+    n_docs = len(offsets) - 1
+    print(f"[INFO] 文档数: {n_docs}")
+
+    sig = minhash_signatures(
+        iter_blocks(offsets, ids, counts, args.block_docs),
+        n_docs,
+        num_perm=args.num_perm
+    )
+    labels = lsh_clusters(sig, np.diff(offsets), args.bands, args.threshold)
+    keep_docs, new_offsets, new_ids, new_counts = dedup_arrays(
+        offsets, ids, counts, labels, args.mode
+    )
+
+    if csr_mode:
+        with CorpusWriter(args.out, vocab_size=corpus.num_terms) as writer:
+            writer.add_block(
+                new_offsets, new_ids, new_counts,
+                corpus.times[keep_docs], corpus.weibo_ids[keep_docs]
+            )
+        report_path = os.path.join(args.out, "dedup_report.json")
+    else:
+        ids_list, counts_list = new_ids.tolist(), new_counts.tolist()
+        new_docs = [
+            {str(w): c for w, c in zip(ids_list[a:b], counts_list[a:b])}
+            for a, b in zip(new_offsets[:-1].tolist(), new_offsets[1:].tolist())
+        ]
+        save_json(new_docs, args.out)
+        report_path = os.path.splitext(args.out)[0] + "_dedup_report.json"
+
+    info = report(n_docs, len(ids), keep_docs, len(new_ids), labels)
+    info["mode"] = args.mode
+    save_json(info, report_path)
+    print(f"[OK] 去重报告: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
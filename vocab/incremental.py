@@ -0,0 +1,156 @@
+import json
+import os
+import sys
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core import tfidf as tfidf_engine
+from core.corpus import CsrCorpus, CorpusWriter, is_corpus_dir
+from core.tinydb_stream import iter_json_array
+from core.vocab_stats import StatsStore
+
+
+# =========================================================
+# 增量 TF-IDF：只用新增文档更新统计库（core/vocab_stats.py），
+# 词表只追加新词，已有词 id 不变；新增文档按当前版本词表重编号输出
+#
+# 第一次对全量语料运行即初始化统计库，结果与 TF-IDF.py 相同
+#
+# --docs 只能包含还没计入统计库的文档，否则 DF / TF-IDF 会被重复累加：
+#   统计库登记已计入的 微博id，输入与之有重叠时直接拒绝；
+#   增量语料用 vocab/json_structure.py --corpus_out ... --exclude_store <统计库> 导出
+#   freq.json 不带 微博id，只能用于初始化空统计库
+# =========================================================
+
+BLOCK_DOCS = 4096
+
+
+def load_json(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def iter_doc_blocks(docs_path: str):
+    """
+    产出 (offsets, ids, counts, times, weibo_ids)，原始 id 空间
+    """
+    if is_corpus_dir(docs_path):
+        corpus = CsrCorpus(docs_path)
+        for start, offsets, ids, counts in corpus.iter_blocks(BLOCK_DOCS):
+            n = len(offsets) - 1
+            yield (
+                offsets, np.asarray(ids), np.asarray(counts),
+                np.asarray(corpus.times[start:start + n]),
+                np.asarray(corpus.weibo_ids[start:start + n]),
+            )
+        return
+
+    batch = []
+    for doc in iter_json_array(docs_path):
+        if isinstance(doc, dict):
+            batch.append(doc)
+        if len(batch) >= BLOCK_DOCS:
+            yield tfidf_engine.docs_to_arrays(batch) + (None, None)
+            batch = []
+    if batch:
+        yield tfidf_engine.docs_to_arrays(batch) + (None, None)
+
+
+def input_weibo_ids(docs_path: str):
+    """
+    二进制语料的 微博id 数组；freq.json 没有 id，返回 None
+    """
+    if is_corpus_dir(docs_path):
+        return np.asarray(CsrCorpus(docs_path).weibo_ids)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="增量 TF-IDF：更新 DF / IDF 统计库，词表只追加新词（已有 id 不变）"
+    )
+    parser.add_argument("--store", required=True, help="统计库目录")
+    parser.add_argument("--vocab", required=True, help="原始词表 {id: word}（data/process_1/vocab.json）")
+    parser.add_argument("--docs", required=True, help="新增文档：freq.json 或二进制语料目录（原始 id）")
+    parser.add_argument("--out_dir", required=True, help="输出 vocab_tfidf.json 与 corpus_delta/")
+
+    parser.add_argument("--min_df", type=int, default=10)
+    parser.add_argument("--max_df_ratio", type=float, default=0.4)
+    parser.add_argument("--min_tfidf", type=float, default=0.02)
+    parser.add_argument("--target_max", type=int, default=12000, help="词表总量上限（已有词不删）")
+    parser.add_argument("--max_new", type=int, default=None, help="本次最多追加的新词数")
+    parser.add_argument("--no_extend", action="store_true", help="只更新统计量，不生成新版本词表")
+    parser.add_argument("--force", action="store_true",
+                        help="跳过重复检查（同一文件已导入过 / 微博id 与统计库重叠 / 无法核对 id）强制导入")
+    args = parser.parse_args()
+
+    store = StatsStore(args.store)
+    if store.already_ingested(args.docs) and not args.force:
+        print(f"[WARN] {args.docs} 已导入过统计库，跳过（--force 强制重新导入）")
+        return
+
+    weibo_ids = input_weibo_ids(args.docs)
+    if store.doc_count > 0 and not args.force:
+        if weibo_ids is None:
+            parser.error("统计库非空时 --docs 需要带 微博id 的二进制语料目录（freq.json 无法核对是否重复）；"
+                         "用 vocab/json_structure.py --exclude_store 导出增量语料")
+        if store.meta["untracked_docs"]:
+            parser.error(f"统计库中有 {store.meta['untracked_docs']} 篇文档没有登记 微博id，无法核对是否重复；"
+                         "请用二进制语料重建统计库，或 --force")
+        overlap = store.overlap(weibo_ids)
+        if overlap:
+            parser.error(f"--docs 中有 {overlap} 篇文档已计入统计库，重复导入会让 DF / TF-IDF 翻倍；"
+                         "用 vocab/json_structure.py --exclude_store 导出增量语料")
+
+    if args.no_extend and store.version == 0:
+        parser.error("统计库还没有词表版本，第一次运行不能使用 --no_extend")
+
+    raw_vocab = load_json(args.vocab)
+    before_docs = store.doc_count
+
+    # 第一遍：累加统计量
+    for offsets, ids, counts, _, block_ids in iter_doc_blocks(args.docs):
+        store.add_block(offsets, ids, counts, block_ids)
+    new_docs = store.doc_count - before_docs
+    print(f"[INFO] 新增文档 {new_docs} 篇，统计库累计 {store.doc_count} 篇")
+
+    if not args.no_extend:
+        old_size = len(store.selected)
+        added = store.extend_vocab(
+            raw_vocab,
+            min_df=args.min_df,
+            max_df_ratio=args.max_df_ratio,
+            min_tfidf=args.min_tfidf,
+            target_max=args.target_max,
+            max_new=args.max_new
+        )
+        print(f"[INFO] 词表 v{store.version}：{old_size} -> {len(store.selected)}（新增 {added}）")
+
+    # 第二遍：新增文档按当前版本重编号
+    os.makedirs(args.out_dir, exist_ok=True)
+    lut = store.lut()
+    with CorpusWriter(f"{args.out_dir}/corpus_delta", vocab_size=len(store.selected)) as writer:
+        for offsets, ids, counts, times, weibo_ids in iter_doc_blocks(args.docs):
+            new_offsets, new_ids, new_counts, non_empty = tfidf_engine.remap_block(
+                offsets, ids, counts, lut
+            )
+            writer.add_block(
+                new_offsets, new_ids, new_counts,
+                None if times is None else times[non_empty],
+                None if weibo_ids is None else weibo_ids[non_empty],
+            )
+
+    with open(f"{args.out_dir}/vocab_tfidf.json", "w", encoding="utf-8") as f:
+        json.dump(store.load_vocab(), f, ensure_ascii=False, indent=2)
+
+    store.record_ingest(args.docs, new_docs)
+    store.save()
+
+    print(f"[OK] 词表版本 v{store.version}，大小 {len(store.selected)}")
+    print(f"[OK] 新增文档重编号后 {writer.meta['n_docs']} 篇，写入 {args.out_dir}/corpus_delta")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,12 @@
 import json
+import os
+import sys
 import argparse
-from typing import Dict, List, Set
+from typing import Dict, Set
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.tinydb_stream import iter_tinydb_records, JsonArrayWriter, JsonObjectWriter
+from core.vocab_stats import load_counted_ids
 
 
 def load_stopwords(stopword_file: str) -> Set[str]:
@@ -36,24 +41,22 @@ def vocab_2_json(
 ) -> Dict[str, str]:
     """
     TinyDB 格式词表 → 普通 JSON {word_id: word}
-    同时过滤停用词
+    同时过滤停用词；逐条读取、边读边写，返回的映射供 freq_2_json 使用
     """
-    with open(tinydb_file, "r", encoding="utf-8") as f:
-        vocab_tiny = json.load(f)
-
     vocab_new = {}
 
-    for word_id, info in vocab_tiny["_default"].items():
-        word = info["word"]
+    with open(output_file, "w", encoding="utf-8") as f:
+        writer = JsonObjectWriter(f)
+        for word_id, info in iter_tinydb_records(tinydb_file):
+            word = info["word"]
 
-        # 停用词过滤
-        if stopwords and word in stopwords:
-            continue
+            # 停用词过滤
+            if stopwords and word in stopwords:
+                continue
 
-        vocab_new[word_id] = word
-
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(vocab_new, f, ensure_ascii=False, indent=2)
+            vocab_new[word_id] = word
+            writer.write(word_id, word)
+        writer.close()
 
     print(f"[OK] 词表保存到 {output_file}（保留 {len(vocab_new)} 个词）")
     return vocab_new
@@ -62,34 +65,72 @@ def vocab_2_json(
 
 def freq_2_json(
     tinydb_file: str,
-    output_file: str,
-    vocab: Dict[str, str]
-) -> List[Dict[str, int]]:
-  
+    output_file: str | None,
+    vocab: Dict[str, str],
+    corpus_dir: str | None = None,
+    exclude_ids: Set[str] | None = None
+) -> int:
+    """
+    TinyDB 文档词频 → freq.json [ {word_id: freq}, ... ] 和/或二进制 CSR 语料
+    一次只处理一条记录，内存只与词表大小有关；
+    二进制语料额外保留 微博id 与发布时间
+    exclude_ids：跳过这些 微博id（增量导出时传统计库已计入的 id）
+    """
+    from core.corpus import CorpusWriter, parse_time
+
     # 构造反向映射：word -> word_id
     word2id = {word: wid for wid, word in vocab.items()}
 
-    with open(tinydb_file, "r", encoding="utf-8") as f:
-        docs_tiny = json.load(f)
-
-    docs_new = []
-
-    for doc_info in docs_tiny["_default"].values():
-        words = doc_info.get("words", {})
-
-        filtered = {}
-        for word, freq in words.items():
-            if word in word2id and freq > 0:
-                filtered[word2id[word]] = freq
-
-        if filtered:
-            docs_new.append(filtered)
-
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(docs_new, f, ensure_ascii=False, indent=2)
-
-    print(f"[OK] 文档词频保存到 {output_file}（共 {len(docs_new)} 篇）")
-    return docs_new
+    f = open(output_file, "w", encoding="utf-8") if output_file else None
+    json_writer = JsonArrayWriter(f) if f else None
+    corpus_writer = None
+    if corpus_dir:
+        vocab_size = max((int(wid) for wid in vocab), default=-1) + 1
+        corpus_writer = CorpusWriter(corpus_dir, vocab_size=vocab_size)
+
+    n_docs = 0
+    n_excluded = 0
+    try:
+        for _, doc_info in iter_tinydb_records(tinydb_file):
+            if exclude_ids and str(doc_info.get("id", "")) in exclude_ids:
+                n_excluded += 1
+                continue
+            words = doc_info.get("words", {})
+
+            filtered = {}
+            for word, freq in words.items():
+                if word in word2id and freq > 0:
+                    filtered[word2id[word]] = freq
+
+            if not filtered:
+                continue
+
+            n_docs += 1
+            if json_writer:
+                json_writer.write(filtered)
+            if corpus_writer:
+                corpus_writer.add(
+                    [int(wid) for wid in filtered],
+                    list(filtered.values()),
+                    parse_time(doc_info.get("time")),
+                    doc_info.get("id", "")
+                )
+
+        if json_writer:
+            json_writer.close()
+    finally:
+        if f:
+            f.close()
+        if corpus_writer:
+            corpus_writer.close()
+
+    if exclude_ids is not None:
+        print(f"[INFO] 跳过已计入统计库的文档 {n_excluded} 篇")
+    if output_file:
+        print(f"[OK] 文档词频保存到 {output_file}（共 {n_docs} 篇）")
+    if corpus_dir:
+        print(f"[OK] 二进制语料保存到 {corpus_dir}（共 {n_docs} 篇，nnz={corpus_writer.meta['nnz']}）")
+    return n_docs
 
 
 
@@ -101,8 +142,18 @@ def main():
     parser.add_argument("--doc_tinydb", required=True, help="TinyDB 文档词频 JSON")
     parser.add_argument("--stopwords", required=True, help="停用词 txt 文件")
     parser.add_argument("--out_dir", required=True, help="输出目录")
+    parser.add_argument("--corpus_out", default=None,
+                        help="同时输出二进制 CSR 语料目录（保留 微博id / 发布时间）")
+    parser.add_argument("--no_freq_json", action="store_true",
+                        help="不写 freq.json，只输出二进制语料（需配合 --corpus_out）")
+    parser.add_argument("--exclude_store", default=None,
+                        help="增量导出：跳过 vocab/incremental.py 统计库中已计入的 微博id（需配合 --corpus_out）")
 
     args = parser.parse_args()
+    if args.no_freq_json and not args.corpus_out:
+        parser.error("--no_freq_json 需要配合 --corpus_out 使用")
+    if args.exclude_store and not args.corpus_out:
+        parser.error("--exclude_store 需要配合 --corpus_out 使用（incremental.py 靠语料中的 微博id 核对重复）")
 
     vocab_out = f"{args.out_dir}/vocab.json"
     freq_out = f"{args.out_dir}/freq.json"
@@ -119,12 +170,13 @@ def main():
     )
 
     
-    valid_vocab_ids = set(vocab.keys())
     freq_2_json(
-    args.doc_tinydb,
-    freq_out,
-    vocab
-)
+        args.doc_tinydb,
+        None if args.no_freq_json else freq_out,
+        vocab,
+        corpus_dir=args.corpus_out,
+        exclude_ids=load_counted_ids(args.exclude_store) if args.exclude_store else None
+    )
 
     print("\n 更大规模的停用词筛查")
 
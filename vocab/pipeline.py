@@ -0,0 +1,173 @@
+import json
+import os
+import sys
+import time
+import argparse
+from array import array
+from typing import Dict, Set
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core import tfidf as tfidf_engine
+from core.corpus import CorpusWriter, parse_time
+from core.tinydb_stream import JsonArrayWriter, iter_tinydb_records
+from vocab.json_structure import load_stopwords
+
+
+# =========================================================
+# 一体化预处理：TinyDB -> 停用词过滤 -> TF-IDF 选词 -> 重编号语料
+#
+# 等价于 filter_stop.sh（json_structure.py）+ tf_idf.sh（TF-IDF.py），但：
+#   - TinyDB 只流式解析一遍，直接得到 CSR 数组（int32 id / 词频 + 时间 / 微博id）
+#   - 不写 data/process_1 的中间 JSON，也不再读回来重新解析
+#   - 统计、选词、重编号全部在数组上完成，最后只写训练用的语料和词表
+# =========================================================
+
+
+def load_vocab(tinydb_file: str, stopwords: Set[str]) -> Dict[str, int]:
+    """
+    TinyDB 词表 -> {word: old_id}，同时过滤停用词（old_id 与 json_structure.py 输出的 id 相同）
+    """
+    word2id = {}
+    for word_id, info in iter_tinydb_records(tinydb_file):
+        word = info["word"]
+        if word in stopwords:
+            continue
+        word2id[word] = int(word_id)
+    return word2id
+
+
+def load_docs(tinydb_file: str, word2id: Dict[str, int]):
+    """
+    TinyDB 文档词频逐条流式读取 -> CSR 数组
+    与 freq_2_json 相同：只保留词表内且词频 > 0 的词，空文档丢弃
+    """
+    ids = array("i")
+    counts = array("i")
+    lens = array("q")
+    times = array("q")
+    weibo_ids = []
+
+    for _, doc_info in iter_tinydb_records(tinydb_file):
+        n = 0
+        for word, freq in doc_info.get("words", {}).items():
+            wid = word2id.get(word)
+            if wid is not None and freq > 0:
+                ids.append(wid)
+                counts.append(freq)
+                n += 1
+        if n == 0:
+            continue
+        lens.append(n)
+        times.append(parse_time(doc_info.get("time")))
+        weibo_ids.append(str(doc_info.get("id", "")).encode("utf-8"))
+
+    offsets = np.zeros(len(lens) + 1, dtype=np.int64)
+    np.cumsum(np.frombuffer(lens, dtype=np.int64), out=offsets[1:])
+    return (
+        offsets,
+        np.frombuffer(ids, dtype=np.int32),
+        np.frombuffer(counts, dtype=np.int32),
+        np.frombuffer(times, dtype=np.int64),
+        weibo_ids,
+    )
+
+
+def write_outputs(out_dir: str, new_vocab: Dict[str, str], X, times, weibo_ids, write_json: bool):
+    with CorpusWriter(f"{out_dir}/corpus_tfidf", vocab_size=len(new_vocab)) as writer:
+        writer.add_block(X.indptr, X.indices, X.data, times, weibo_ids)
+
+    with open(f"{out_dir}/vocab_tfidf.json", "w", encoding="utf-8") as f:
+        json.dump(new_vocab, f, ensure_ascii=False, indent=2)
+
+    if write_json:
+        with open(f"{out_dir}/freq_tfidf.json", "w", encoding="utf-8") as f:
+            json_writer = JsonArrayWriter(f)
+            for doc in tfidf_engine.matrix_to_docs(X):
+                json_writer.write(doc)
+            json_writer.close()
+
+    return writer.meta
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="TinyDB → 停用词过滤 → TF-IDF 选词 → 重编号语料（一遍完成，不落中间 JSON）"
+    )
+    parser.add_argument("--vocab_tinydb", required=True, help="TinyDB 词表 JSON")
+    parser.add_argument("--doc_tinydb", required=True, help="TinyDB 文档词频 JSON")
+    parser.add_argument("--stopwords", required=True, help="停用词 txt / json 文件")
+    parser.add_argument("--out_dir", required=True, help="输出目录（corpus_tfidf/ + vocab_tfidf.json）")
+
+    parser.add_argument("--min_df", type=int, default=10)
+    parser.add_argument("--max_df_ratio", type=float, default=0.4)
+    parser.add_argument("--min_tfidf", type=float, default=0.02)
+    parser.add_argument("--target_min", type=int, default=10000)
+    parser.add_argument("--target_max", type=int, default=12000)
+    parser.add_argument("--auto_threshold", action="store_true",
+                        help="词数不足 target_min 时自动放宽阈值（同 TF-IDF.py）")
+    parser.add_argument("--json", action="store_true",
+                        help="额外写出 freq_tfidf.json（兼容旧的 JSON 训练流程）")
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    start = time.perf_counter()
+
+    stopwords = load_stopwords(args.stopwords)
+    print(f"[INFO] 加载停用词 {len(stopwords)} 个")
+
+    word2id = load_vocab(args.vocab_tinydb, stopwords)
+    id2word = {wid: word for word, wid in word2id.items()}
+    print(f"[INFO] 停用词过滤后词表: {len(word2id)}")
+
+    offsets, ids, counts, times, weibo_ids = load_docs(args.doc_tinydb, word2id)
+    doc_count = len(offsets) - 1
+    print(f"[INFO] 文档数: {doc_count}，非零项: {len(ids)}（解析 {time.perf_counter() - start:.2f}s）")
+
+    n_terms = max(id2word, default=-1) + 1
+    X = tfidf_engine.build_matrix(offsets, ids, counts, n_terms=n_terms)
+    df, _, tfidf, order = tfidf_engine.term_stats(X)
+
+    min_df, max_df_ratio, min_tfidf = args.min_df, args.max_df_ratio, args.min_tfidf
+    if args.auto_threshold:
+        min_df, max_df_ratio, min_tfidf = tfidf_engine.search_thresholds(
+            df, tfidf, doc_count,
+            min_df=min_df,
+            max_df_ratio=max_df_ratio,
+            min_tfidf=min_tfidf,
+            target_min=args.target_min
+        )
+        print(f"[INFO] 使用阈值: min_df={min_df} max_df_ratio={max_df_ratio:.6g} min_tfidf={min_tfidf:.6g}")
+
+    ordered = tfidf_engine.select_terms(
+        df, tfidf, doc_count,
+        min_df=min_df,
+        max_df_ratio=max_df_ratio,
+        min_tfidf=min_tfidf,
+        target_max=args.target_max,
+        order=order
+    )
+    if len(ordered) < args.target_min:
+        print("[WARN] 词表小于目标下限，请检查阈值（或加 --auto_threshold）")
+
+    new_X, non_empty = tfidf_engine.remap_matrix(X, ordered)
+    new_vocab = {str(new_id): id2word[old_id] for new_id, old_id in enumerate(ordered.tolist())}
+    kept = np.flatnonzero(non_empty)
+
+    meta = write_outputs(
+        args.out_dir,
+        new_vocab,
+        new_X,
+        times[kept],
+        [weibo_ids[i] for i in kept],
+        args.json
+    )
+
+    print(f"[OK] 最终词表大小: {len(new_vocab)}")
+    print(f"[OK] 最终文档数: {meta['n_docs']}，非零项: {meta['nnz']}")
+    print(f"[OK] 总耗时 {time.perf_counter() - start:.2f}s，输出目录 {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+#!/bin/bash
+
+VOCAB_TINYDB="/home/liuyuan/Class_data/vocab/vocab.json"
+DOC_TINYDB="/home/liuyuan/Class_data/content_info/content.json"
+STOPWORDS="/home/liuyuan/Class_data/vocab/stop_merge.json"
+OUT_DIR="/home/liuyuan/Class_data/data/IT-IDF"
+
+mkdir -p $OUT_DIR
+
+# 等价于 filter_stop.sh + tf_idf.sh，不再生成 data/process_1 中间文件
+# 只写二进制语料 corpus_tfidf/，OLDA/OLDA.sh 直接读取；需要 freq_tfidf.json 时再加 --json
+python pipeline.py \
+    --vocab_tinydb $VOCAB_TINYDB \
+    --doc_tinydb $DOC_TINYDB \
+    --stopwords $STOPWORDS \
+    --out_dir $OUT_DIR \
+    --min_df 5 \
+    --max_df_ratio 0.5 \
+    --min_tfidf 0.01
+
+echo "[INFO] 预处理完成，语料与词表输出到 $OUT_DIR"